@@ -0,0 +1,240 @@
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from log_config import configure_logging
+from password_resolver import password_or_candidates
+from instrumentation import STAGE_METRIC, Metrics, get_metrics, profile_call, use_metrics, write_metrics
+from entity_registry import EntityRegistry
+from parquet_export import FORMATS as EXPORT_FORMATS, ColumnarExporter
+from record_sink import RecordSink, connect_sqlite
+from record_writer import JsonlWriter
+from result_cache import cached_process_pdf, get_cache
+from test5 import process_pdf
+
+# metrics is the worker's Metrics.state() for this file, merged by the parent
+BatchResult = namedtuple("BatchResult", ["path", "broker", "records", "error", "elapsed", "metrics"],
+                         defaults=(None,))
+
+
+def collect_pdf_paths(sources):
+    """
+    Expand directories, glob patterns and plain file paths into a sorted list of PDFs.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for name in os.listdir(source):
+                full = os.path.join(source, name)
+                if name.lower().endswith(".pdf") and os.path.isfile(full):
+                    paths.append(full)
+        elif any(ch in source for ch in "*?["):
+            paths.extend(p for p in glob.glob(source, recursive=True) if os.path.isfile(p))
+        else:
+            paths.append(source)
+    return sorted(set(paths))
+
+
+def _parse(path, category, subcategory, password, cache_path):
+    if cache_path:
+        return cached_process_pdf(path, category, subcategory, get_cache(cache_path), password=password)
+    # Transactions pickle back to the parent smaller than dicts; the writers serialise them
+    return process_pdf(path, category, subcategory, password=password, as_dicts=False)
+
+
+def _process_one(path, category, subcategory, password=None, cache_path=None, profile=None):
+    """
+    Worker entry point: parse one PDF and never raise, so one bad note
+    cannot take down the whole batch. Stage metrics for the file are
+    collected separately and shipped back with the result.
+    profile is an optional (output_dir, backend) pair.
+    """
+    with use_metrics(Metrics()) as metrics:
+        start = time.perf_counter()
+        broker, records, error = None, [], None
+        try:
+            if profile:
+                label = os.path.splitext(os.path.basename(path))[0]
+                broker, records = profile_call(label, profile[0], _parse, path, category, subcategory,
+                                               password, cache_path, backend=profile[1])
+            else:
+                broker, records = _parse(path, category, subcategory, password, cache_path)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        metrics.observe(STAGE_METRIC, elapsed, stage="file", broker=broker or "failed")
+    return BatchResult(path, broker, records, error, elapsed, metrics.state())
+
+
+def iter_batch(sources, category, subcategory, workers=None, password=None, max_pending=None, cache_path=None,
+               profile=None):
+    """
+    Parse many PDFs across a process pool, yielding a BatchResult
+    (path, broker, records, error, elapsed) as each file finishes.
+    With cache_path, previously parsed notes are served from the result cache.
+    """
+    paths = collect_pdf_paths(sources)
+    if not paths:
+        return
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield _process_one(path, category, subcategory, password, cache_path, profile)
+        return
+
+    # Keep only a window of files in flight so huge batches don't queue
+    # thousands of futures (and their results) at once.
+    max_pending = max_pending or workers * 4
+    pending = set()
+    remaining = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in remaining:
+            pending.add(pool.submit(_process_one, path, category, subcategory, password, cache_path, profile))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for path in remaining:
+                    pending.add(pool.submit(_process_one, path, category, subcategory, password, cache_path, profile))
+                    break
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class BatchStats:
+    """Running totals and per-file latencies for a batch run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latencies = []
+        self.files = 0
+        self.failed = 0
+        self.records = 0
+
+    def add(self, result):
+        self.files += 1
+        self.latencies.append(result.elapsed)
+        if result.error:
+            self.failed += 1
+        self.records += len(result.records)
+        if result.metrics:
+            get_metrics().merge(result.metrics)
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "records": self.records,
+            "wall_seconds": round(wall, 3),
+            "files_per_sec": round(self.files / wall, 2) if wall > 0 else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 1),
+        }
+
+
+def run_batch(sources, category, subcategory, workers=None, password=None, on_result=None, cache_path=None,
+              profile=None):
+    """
+    Run a whole batch, calling on_result for every finished file, and return the stats summary.
+    """
+    stats = BatchStats()
+    for result in iter_batch(sources, category, subcategory, workers=workers, password=password,
+                             cache_path=cache_path, profile=profile):
+        stats.add(result)
+        if on_result:
+            on_result(result)
+    return stats.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a batch of contract-note PDFs in parallel.")
+    parser.add_argument("sources", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--category", default="Equity")
+    parser.add_argument("--subcategory", default="Mutual Fund")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--password", default=None, help="password for encrypted notes")
+    parser.add_argument("--pan", default=None, help="client PAN, to derive candidate passwords for encrypted notes")
+    parser.add_argument("--dob", default=None, help="client date of birth (DD/MM/YYYY), for candidate passwords")
+    parser.add_argument("--holder-name", default=None, help="client name, for candidate passwords")
+    parser.add_argument("--cache", default=None, metavar="PATH", help="SQLite result cache to reuse parsed notes")
+    parser.add_argument("--output", default=None, metavar="PATH",
+                        help="stream records as JSON Lines to PATH ('-' for stdout)")
+    parser.add_argument("--db", default=None, metavar="PATH",
+                        help="upsert entities/actions into this SQLite database in batches")
+    parser.add_argument("--export", default=None, metavar="DIR",
+                        help="append records to a Parquet/Arrow dataset partitioned by broker and contract month")
+    parser.add_argument("--export-format", default="parquet", choices=list(EXPORT_FORMATS))
+    parser.add_argument("--entities", default=None, metavar="PATH",
+                        help="entity registry snapshot used by --db (loaded and saved between runs)")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage metrics to PATH (.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument("--profile-dir", default=None, metavar="DIR", help="profile every file into DIR")
+    parser.add_argument("--profiler", default="cprofile", choices=["cprofile", "pyinstrument"])
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="parser log level (logs go to stderr)")
+    parser.add_argument("--log-json", action="store_true", help="emit logs as JSON lines")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, json_format=args.log_json)
+
+    # Progress goes to stderr when stdout carries the records
+    log = sys.stderr if args.output == "-" else sys.stdout
+    writer = JsonlWriter(args.output) if args.output else None
+    db = connect_sqlite(args.db) if args.db else None
+    registry = EntityRegistry.load(args.entities) if db and args.entities else None
+    sink = RecordSink(db, registry=registry) if db else None
+    exporter = ColumnarExporter(args.export, format=args.export_format) if args.export else None
+
+    def report(result):
+        if writer:
+            writer.write_many(result.records)
+        if sink:
+            sink.write_many(result.records, broker=result.broker)
+        if exporter and result.records:
+            exporter.write(result.records, broker=result.broker, source=os.path.basename(result.path))
+        if result.error:
+            print(f"FAILED  {result.path}: {result.error}", file=log)
+        else:
+            print(f"OK      {result.path}: {result.broker} ({len(result.records)} records, {result.elapsed * 1000:.0f} ms)",
+                  file=log)
+
+    password = password_or_candidates(args.password, args.pan, args.dob, args.holder_name)
+    try:
+        summary = run_batch(args.sources, args.category, args.subcategory,
+                            workers=args.workers, password=password, on_result=report,
+                            cache_path=args.cache,
+                            profile=(args.profile_dir, args.profiler) if args.profile_dir else None)
+    finally:
+        if writer:
+            writer.close()
+        if exporter:
+            exporter.close()
+        if sink:
+            sink.close()
+            db.close()
+        if registry is not None:
+            registry.save(args.entities)
+    print(f"\n{summary['files']} files ({summary['failed']} failed), {summary['records']} records "
+          f"in {summary['wall_seconds']}s -> {summary['files_per_sec']} files/sec, "
+          f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms", file=log)
+    if args.metrics:
+        write_metrics(args.metrics)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+process_pdf per extraction backend: every available backend forced for
+the whole document, and the default per-broker choice, with a check that
+each produces exactly the records pdfplumber does.
+
+    python -m benchmarks.bench_backends PDF/ [--repeat 5]
+"""
+import argparse
+import time
+
+from batch import collect_pdf_paths
+from pdf_backends import DEFAULT_BACKEND, available_backends
+from test5 import BROKER_BACKENDS, is_pdf_encrypted, process_pdf
+
+
+def best_of(path, backend, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = process_pdf(path, "Equity", "Mutual Fund", backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = [DEFAULT_BACKEND] + [name for name in available_backends() if name != DEFAULT_BACKEND]
+    print(f"per-broker backends: {BROKER_BACKENDS}")
+    for path in (p for p in collect_pdf_paths(args.sources) if not is_pdf_encrypted(p)):
+        timings, expected, same = [], None, True
+        for backend in backends + [None]:
+            seconds, result = best_of(path, backend, args.repeat)
+            if expected is None:
+                expected = result
+            same = same and result == expected
+            timings.append(f"{backend or 'per-broker'} {seconds * 1000:7.1f} ms")
+        print(f"{path.rsplit('/', 1)[-1]:<24} {expected[0][:20]:<20} {len(expected[1]):3d} records  "
+              f"{'  '.join(timings)}  identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Rows/sec of the JSON row builders: the old DataFrame.iterrows() versions
+against the columnar ones in test5.py, on a synthetic 100k-row table set.
+
+    python -m benchmarks.bench_builders [--rows 100000] [--rows-per-table 100]
+"""
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+
+import pandas as pd
+
+from models import to_dicts
+from test5 import build_json_from_tables, build_json_phillip_with_contract_note, try_float
+
+MOTILAL_COLUMNS = ["Scrip Code", "Mode", "Order Type", "Scrip Name", "ISIN", "Order No", "Folio No",
+                   "NAV", "STT", "Unit", "Reedem Amt", "Purchase Amt"]
+PHILLIP_COLUMNS = ["Order No.", "Security / Contract Description", "Buy(B) / Sell(S)", "Quantity",
+                   "Gross Rate/ Trade Price Per Unit (Rs.)@", "STT", "Net Total (Before Levies) (Rs.)"]
+
+
+def motilal_tables(rows, rows_per_table, seed=1):
+    rnd = random.Random(seed)
+    tables = []
+    for start in range(0, rows, rows_per_table):
+        data = []
+        for i in range(min(rows_per_table, rows - start)):
+            units = rnd.uniform(1, 50000)
+            nav = rnd.uniform(10, 500)
+            data.append([f"SC{i:04d}-GR", "DEMAT", "PURCHASE", f"SCHEME {i % 300} - DIRECT PLAN - GROWTH",
+                         f"INF{rnd.randrange(10**8):08d}A", str(rnd.randrange(10**10)), str(rnd.randrange(10**8)),
+                         f"{nav:.4f}", "0.0000", f"{units:,.4f}", "0.0000", f"{units * nav:,.4f}"])
+        # Totals rows without a scheme name are part of every real table
+        data.append(["Total Brokerage", None, None, None, None, None, None, None, None, None, None, "0.0000"])
+        df = pd.DataFrame(data, columns=MOTILAL_COLUMNS)
+        df["__page__"] = 1
+        df["__contract_date__"] = "11/04/2025"
+        df["__stamp_duty__"] = 16.5
+        df["__broker__"] = "Motilal Oswal Financial Services Limited"
+        tables.append(df)
+    return tables
+
+
+def phillip_tables(rows, rows_per_table, seed=2):
+    rnd = random.Random(seed)
+    tables = []
+    for start in range(0, rows, rows_per_table):
+        data = []
+        for i in range(min(rows_per_table, rows - start)):
+            qty = rnd.randrange(1, 5000)
+            rate = rnd.uniform(10, 3000)
+            data.append([str(rnd.randrange(10**15)), f"STOCK{i % 500} LTD ISIN: INE{rnd.randrange(10**6):06d}F01042",
+                         rnd.choice(["BUY", "SELL"]), str(qty), f"{rate:.2f}", f"{qty * rate / 1000:.2f}",
+                         f"{qty * rate:,.2f}"])
+        df = pd.DataFrame(data, columns=PHILLIP_COLUMNS)
+        df["__page__"] = 1
+        df["__contract_date__"] = "14/07/2025"
+        df["__stamp_duty__"] = 0.0
+        df["__broker__"] = "Phillip Capital (India) Pvt Ltd"
+        tables.append(df)
+    return tables
+
+
+def legacy_build_json_from_tables(tables, category, subcategory):
+    """The pre-columnar Motilal builder (one iterrows() Series per row)."""
+    results = []
+    for df in tables:
+        df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+        if "isin" not in df.columns:
+            continue
+        for _, row in df.iterrows():
+            scrip_name = str(row.get("scrip_name") or row.get("scheme_name") or "").strip()
+            if not scrip_name or scrip_name.lower() == "none":
+                continue
+            isin = str(row.get("isin") or "").strip()
+            entity_table = {
+                "scripname": scrip_name, "scripcode": str(row.get("scrip_code") or ""), "benchmark": "0",
+                "category": category, "subcategory": subcategory, "nickname": scrip_name, "isin": isin,
+            }
+            action_table = {
+                "scrip_code": str(row.get("scrip_code") or ""),
+                "mode": str(row.get("mode") or ""),
+                "order_type": str(row.get("order_type") or ""),
+                "scrip_name": scrip_name,
+                "isin": isin,
+                "order_number": str(row.get("order_no") or ""),
+                "folio_number": str(row.get("folio_no") or ""),
+                "nav": try_float(row.get("nav")),
+                "stt": try_float(row.get("stt")),
+                "unit": try_float(row.get("unit")),
+                "redeem_amount": try_float(row.get("redeem_amt") or row.get("reedem_amt")),
+                "purchase_amount": try_float(row.get("purchase_amt") or row.get("purchase_amount")),
+                "net_amount": try_float(row.get("purchase_amt") or row.get("purchase_amount")),
+                "order_date": row.get("__contract_date__", "Unknown"),
+                "stamp_duty": row.get("__stamp_duty__", 0.0),
+                "page_number": row.get("__page__", None),
+            }
+            results.append({"entityTable": entity_table, "actionTable": action_table})
+    return results
+
+
+def legacy_build_json_phillip_with_contract_note(tables, category, subcategory):
+    """The pre-columnar Phillip equity builder (row.to_dict() per iterrows() row)."""
+    results = []
+    print("tables :- ", tables)
+    col_map = {
+        "order_no": ["order_no.", "order_no"],
+        "security": ["security_/_contract_description", "security_/_contract\ndescription"],
+        "buy_sell": ["buy(b)_/_sell(s)", "buy/sell"],
+        "quantity": ["quantity"],
+        "gross_rate": ["gross_rate/_trade_price_per_unit_(rs.)@", "gross_rate/_trade_price"],
+        "stt": ["stt"],
+        "net_total": ["net_total_(before_levies)_(rs.)", "net_total"],
+    }
+
+    def get_val(row, keys, default=""):
+        for k in keys:
+            if k in row:
+                return row[k]
+        return default
+
+    for df in tables:
+        df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+        print("df.columns :-", df.columns)
+        df = df[~df.iloc[:, 0].astype(str).str.contains("NSE - CAPITAL", na=False, case=False)]
+        print("cleaned df:-", df)
+        for _, row in df.iterrows():
+            row = row.to_dict()
+            isin_match = re.search(r"isin[: ]+([A-Z0-9]+)", " ".join([str(v) for v in row.values()]), re.IGNORECASE)
+            isin = isin_match.group(1) if isin_match else ""
+            scrip_name = str(get_val(row, col_map["security"], "")).strip()
+            order_type = "PURCHASE" if str(get_val(row, col_map["buy_sell"], "")).upper() == "BUY" else "SELL"
+            net_total = try_float(get_val(row, col_map["net_total"], 0))
+            entity_table = {
+                "scrip_name": scrip_name, "scrip_code": scrip_name.split()[0] if scrip_name else "",
+                "benchmark": "0", "category": category, "subcategory": subcategory,
+                "nickname": scrip_name, "isin": isin,
+            }
+            action_table = {
+                "scrip_code": scrip_name.split()[0] if scrip_name else "",
+                "mode": "DEMAT",
+                "order_type": order_type,
+                "scrip_name": scrip_name,
+                "isin": isin,
+                "order_number": str(get_val(row, col_map["order_no"], "")),
+                "folio_number": "0",
+                "nav": try_float(get_val(row, col_map["gross_rate"], 0)),
+                "stt": try_float(get_val(row, col_map["stt"], 0)),
+                "unit": try_float(get_val(row, col_map["quantity"], 0)),
+                "redeem_amount": 0.0 if order_type == "PURCHASE" else net_total,
+                "purchase_amount": net_total if order_type == "PURCHASE" else 0.0,
+                "net_amount": net_total,
+                "order_date": "",
+                "stamp_duty": 0.0,
+                "page_number": row.get("__page__", None),
+                "contract_note_no": "",
+            }
+            results.append({"entityTable": entity_table, "actionTable": action_table})
+    return results
+
+
+def measure(builder, make_tables):
+    tables = make_tables()  # builders rename columns in place, so every run gets fresh tables
+    rows = sum(len(df) for df in tables)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        records = builder(tables, "Equity", "Mutual Fund")
+        elapsed = time.perf_counter() - start
+    return records, rows / elapsed, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rows-per-table", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("build_json_from_tables", legacy_build_json_from_tables, build_json_from_tables,
+         lambda: motilal_tables(args.rows, args.rows_per_table)),
+        ("build_json_phillip_with_contract_note", legacy_build_json_phillip_with_contract_note,
+         build_json_phillip_with_contract_note, lambda: phillip_tables(args.rows, args.rows_per_table)),
+    ]
+    for name, legacy, current, make_tables in cases:
+        old_records, old_rate, old_secs = measure(legacy, make_tables)
+        # Builders return Transactions; include the conversion to the JSON shape
+        new_records, new_rate, new_secs = measure(lambda *a, builder=current: to_dicts(builder(*a)), make_tables)
+        same = old_records == new_records
+        print(f"{name}: iterrows {old_rate:,.0f} rows/s ({old_secs:.2f}s) -> "
+              f"columnar {new_rate:,.0f} rows/s ({new_secs:.2f}s), "
+              f"{old_secs / new_secs:.1f}x, identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+process_pdf throughput with the parser logging at WARNING (the default,
+debug dumps never formatted) against DEBUG (every table, row and page of
+text formatted and written, as the old eager print() calls did), end to
+end and for the broker builders alone. Output goes to os.devnull so the
+numbers measure formatting and I/O calls, not a terminal.
+
+    python -m benchmarks.bench_logging PDF/ [--repeat 3]
+    python -m benchmarks.bench_logging --synthetic 20 [--rows 40]
+
+--synthetic parses table-heavy notes of every kind in
+benchmarks.synthetic_notes instead of (or as well as) the given PDFs.
+End to end, pdfplumber's layout analysis dwarfs the debug dumps; the
+builder timings (tables extracted outside the timer) show what the
+formatting itself cost.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from batch import collect_pdf_paths
+from benchmarks.synthetic_notes import KINDS, generate_note
+from log_config import configure_logging
+from test5 import extract_pdf_content, is_pdf_encrypted, process_pdf, select_builder
+
+
+def timed_at(level, fn, repeat):
+    """Best-of-repeat seconds for fn() with the root logger at level, writing to os.devnull."""
+    with open(os.devnull, "w") as sink:
+        configure_logging(level, stream=sink)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    logging.getLogger().handlers.clear()
+    return best
+
+
+def builder_inputs(paths):
+    """(path, builder, tables) per note with a known builder, extracted once."""
+    inputs = []
+    for path in paths:
+        extracted = extract_pdf_content(path, "Equity", "Mutual Fund", include_text=False)
+        try:
+            builder = select_builder(extracted["broker"], extracted["text"])
+        except ValueError:
+            builder = None
+        if builder:
+            inputs.append((path, builder, extracted["tables"]))
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="*", help="PDF files or directories")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="PAGES",
+                        help="also parse synthetic notes of every kind with this many pages")
+    parser.add_argument("--rows", type=int, default=40, help="transaction rows per synthetic page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not args.sources and not args.synthetic:
+        parser.error("give PDF sources or --synthetic PAGES")
+
+    with tempfile.TemporaryDirectory(prefix="bench_logging_") as workdir:
+        # Encrypted notes would stop at the password prompt
+        paths = [p for p in collect_pdf_paths(args.sources) if not is_pdf_encrypted(p)]
+        for kind in KINDS if args.synthetic else ():
+            path = os.path.join(workdir, f"{kind}-{args.synthetic}p.pdf")
+            with open(path, "wb") as f:
+                f.write(generate_note(kind, args.synthetic, args.rows))
+            paths.append(path)
+
+        def parse_all():
+            for path in paths:
+                process_pdf(path, "Equity", "Mutual Fund")
+
+        for level in ("WARNING", "DEBUG"):
+            seconds = timed_at(level, parse_all, args.repeat)
+            print(f"process_pdf {level:<8} {len(paths)} files in {seconds:.3f}s -> {len(paths) / seconds:.2f} files/sec")
+
+        for path, builder, tables in builder_inputs(paths):
+            # Builders rename columns in place, so each run gets fresh copies
+            run = lambda: builder([df.copy() for df in tables], "Equity", "Mutual Fund")
+            quiet, verbose = (timed_at(level, run, args.repeat) for level in ("WARNING", "DEBUG"))
+            print(f"{builder.__name__:<45} {os.path.basename(path):<24} WARNING {quiet * 1000:8.2f} ms  "
+                  f"DEBUG {verbose * 1000:8.2f} ms  x{verbose / quiet:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory held by N parsed transactions: the {"entityTable", "actionTable"}
+dict pair the builders used to emit for every row, against __slots__
+Transactions sharing one Entity per scheme. Both are built from the same
+field values, so the numbers compare container overhead only.
+
+    python -m benchmarks.bench_models [--records 1000000] [--isins 2000]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from models import EntityCache, MotilalEntity, Transaction, to_columns
+
+
+def field_values(n, isins, seed=1):
+    rnd = random.Random(seed)
+    schemes = [(f"SCHEME {i} - DIRECT PLAN - GROWTH", f"SC{i:05d}-GR", f"INF{i:09d}") for i in range(isins)]
+    return [schemes[rnd.randrange(isins)] + (str(10**9 + i), str(rnd.randrange(10**8)), rnd.uniform(10, 500),
+                                              rnd.uniform(1, 5000), rnd.uniform(1000, 10**6), i % 7 + 1)
+            for i in range(n)]
+
+
+def as_dicts(values):
+    records = []
+    for scrip_name, scrip_code, isin, order_no, folio, nav, unit, amount, page in values:
+        records.append({
+            "entityTable": {"scripname": scrip_name, "scripcode": scrip_code, "benchmark": "0",
+                            "category": "Equity", "subcategory": "Mutual Fund", "nickname": scrip_name,
+                            "isin": isin},
+            "actionTable": {"scrip_code": scrip_code, "mode": "DEMAT", "order_type": "PURCHASE",
+                            "scrip_name": scrip_name, "isin": isin, "order_number": order_no,
+                            "folio_number": folio, "nav": nav, "stt": 0.0, "unit": unit, "redeem_amount": 0.0,
+                            "purchase_amount": amount, "net_amount": amount, "order_date": "11/04/2025",
+                            "stamp_duty": 0.0, "page_number": page},
+        })
+    return records
+
+
+def as_transactions(values):
+    entities = EntityCache("Equity", "Mutual Fund", MotilalEntity)
+    return [Transaction(entities.get(scrip_name, scrip_code, isin), "DEMAT", "PURCHASE", order_no, folio, nav, 0.0,
+                        unit, 0.0, amount, amount, "11/04/2025", 0.0, page)
+            for scrip_name, scrip_code, isin, order_no, folio, nav, unit, amount, page in values]
+
+
+def measure(build, values):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(values)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--isins", type=int, default=2000)
+    args = parser.parse_args()
+
+    values = field_values(args.records, args.isins)
+    dicts, dict_bytes, dict_secs = measure(as_dicts, values)
+    del dicts
+    transactions, slot_bytes, slot_secs = measure(as_transactions, values)
+
+    mb = 1024 * 1024
+    print(f"dict records   {dict_bytes / mb:8.1f} MB  ({dict_bytes / args.records:6.0f} B/record, "
+          f"built in {dict_secs:.2f}s)")
+    print(f"Transactions   {slot_bytes / mb:8.1f} MB  ({slot_bytes / args.records:6.0f} B/record, "
+          f"built in {slot_secs:.2f}s)  x{dict_bytes / slot_bytes:.1f} smaller")
+
+    start = time.perf_counter()
+    columns = to_columns(transactions)
+    print(f"to_columns     {len(columns)} columns x {len(columns['isin'])} rows in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+CPU per PDF for text + tables: two separate passes that each open the
+document and lay out every page (how test2 used to work), against one
+pass where a PageLayout snapshot per page serves both.
+
+    python -m benchmarks.bench_page_layout PDF/ [--repeat 5]
+"""
+import argparse
+import time
+
+import pdfplumber
+
+from batch import collect_pdf_paths
+from page_layout import PageLayout
+from test5 import is_pdf_encrypted
+
+
+def separate_passes(path):
+    with pdfplumber.open(path) as pdf:
+        texts = [page.extract_text() or "" for page in pdf.pages]
+    with pdfplumber.open(path) as pdf:
+        tables = [page.extract_tables() for page in pdf.pages]
+    return texts, tables
+
+
+def shared_snapshot(path):
+    texts, tables = [], []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            with PageLayout(page) as layout:
+                texts.append(layout.text)
+                tables.append(layout.extract_tables())
+    return texts, tables
+
+
+def best_of(fn, path, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn(path)
+        best = min(best, time.process_time() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for path in (p for p in collect_pdf_paths(args.sources) if not is_pdf_encrypted(p)):
+        separate, expected = best_of(separate_passes, path, args.repeat)
+        shared, got = best_of(shared_snapshot, path, args.repeat)
+        print(f"{path.rsplit('/', 1)[-1]:<24} separate {separate * 1000:7.1f} ms  shared {shared * 1000:7.1f} ms  "
+              f"x{separate / shared:.2f}  identical output: {expected == got}")
+
+
+if __name__ == "__main__":
+    main()
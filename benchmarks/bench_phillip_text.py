@@ -0,0 +1,188 @@
+"""
+parse_phillip_text_format over a synthetic Phillip Capital text feed:
+the previous per-line multi-regex parser against the precompiled one,
+on a str and on a streamed file, checking all three produce the same
+DataFrame. Before timing, both are run on edge-case lines (time and
+order number before the ISIN, the ISIN at the start of a line, dotted
+tokens, amounts before the ISIN, a "Date" label split from its date) and
+on randomly mutated lines; any difference is printed.
+
+    python -m benchmarks.bench_phillip_text [--lines 1000000] [--every 20] [--fuzz 30000]
+"""
+import argparse
+import io
+import os
+import random
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+from test5 import extract_date_from_text, parse_phillip_text_format
+
+FILLER = [
+    "PHILLIPCAPITAL (INDIA) PRIVATE LIMITED",
+    "3RD ROAD Date 21/06/2024",
+    "Settlement No 2024118 Trade Date 21/06/2024",
+    "INFORMATION ON GRIEVANCE REDRESSAL IS AVAILABLE ON OUR WEBSITE",
+    "Brokerage 0.00 GST 0.00 Stamp Duty 0.00",
+    "",
+]
+SCHEMES = [("MAAFRG-GR-L1", "MIRAE ASSET ARBITRAGE FUND - REGULAR PLAN - GROWTH", "INF769K01FP7"),
+           ("RMFAF-GR-L1", "NIPPON INDIA ARBITRAGE FUND - GROWTH", "INF204K01IY1"),
+           ("HDFCTOP-DG", "HDFC TOP 100 FUND - DIRECT PLAN - GROWTH", "INF179K01YV8")]
+
+
+def synthetic_text(lines, every, seed=1):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(lines):
+        if i % every:
+            out.append(FILLER[rnd.randrange(len(FILLER))])
+            continue
+        code, scheme, isin = SCHEMES[rnd.randrange(len(SCHEMES))]
+        units, nav = rnd.uniform(10, 10**6), rnd.uniform(10, 500)
+        clock = f"{rnd.randrange(9, 16):02d}:{rnd.randrange(60):02d}:{rnd.randrange(60):02d}"
+        line = f"{code} {scheme} {isin} {clock} {rnd.randrange(10**9, 10**10)} {units:.3f} {nav:.4f} {units * nav:,.2f}"
+        if rnd.random() < 0.1:
+            # pdfplumber sometimes splits the ISIN and the order time
+            line = line.replace(isin, f"{isin[:8]} {isin[8:]}").replace(clock, f"{clock[:6]} {clock[6:]}")
+        out.append(line)
+    return "\n".join(out)
+
+
+EDGE_CASES = [
+    "MAAFRG-GR-L1 13:16:01 1234567890 MIRAE ASSET ARBITRAGE FUND INF769K01FP7 1886.91 10.6 20001.25",
+    "INF769K01FP7 MIRAE ASSET ARBITRAGE FUND 13:16:01 1234567890 1886.91 10.6 20001.25",
+    "MAAFRG-GR-L1 MIRAE ASSET ARBITRAGE FUND-INF769K01FP7 13:16:01 1234567890 1886.91 10.6 20001.25",
+    "MAAFRG-GR-L1 MIRAE ASSET FUND INF769K01FP7 13:16:01 1234567890 1.2.3 1.5,3 10.6. 20,001.25",
+    "MAAFRG-GR-L1 1886.91 10.6 20001.25 MIRAE ASSET ARBITRAGE FUND INF769K01FP7 A B C",
+    "MAAFRG-GR-L1 MIRAE ASSET ARBITRAGE FUND INF769K01FP7 13:16:01 12345678901234 1886.91 10.6 20001.25",
+    "MAAFRG-GR-L1  MIRAE  ASSET FUND INF769K01FP7 INF204K01IY1 13:16:01 1234567890 7 8 9",
+    "MAAFRG-GR-L1 MIRAE ASSET ARBITRAGE FUND INF769K0 1FP7 13:16: 01 1234567890 1886.9 1 10.6 20001.25\r",
+    "TOO FEW TOKENS INF769K01FP7 1 2 3",
+]
+DATE_CASES = [
+    "Trade Date\n\n   21/06/2024\n",
+    "01/01/2020 Date\nDate 22/06/2024\n",
+    "no date here\n",
+    "Date:\n21/06/2024 and Date 23/06/2024\n",
+]
+
+
+def mutate(line, rnd):
+    """Shuffle, drop, duplicate or splice tokens of a transaction line."""
+    tokens = line.split(" ")
+    for _ in range(rnd.randrange(1, 4)):
+        i = rnd.randrange(len(tokens))
+        op = rnd.randrange(6)
+        if op == 0:
+            j = rnd.randrange(len(tokens))
+            tokens[i], tokens[j] = tokens[j], tokens[i]
+        elif op == 1 and len(tokens) > 1:
+            del tokens[i]
+        elif op == 2:
+            tokens.insert(i, tokens[rnd.randrange(len(tokens))])
+        elif op == 3:
+            tokens[i] = tokens[i] + rnd.choice([".", ",", ".5", "-", ""]) + rnd.choice(tokens)
+        elif op == 4:
+            tokens[i] = rnd.choice(["1.2.3", "1,2.3.4", ".", ",", "12:00:00", "0123456789", "INFX", "Date"])
+        else:
+            tokens.insert(i, "")
+    return " ".join(tokens)
+
+
+def parses_alike(text):
+    """Legacy and current output agree, for the text as a str and as a stream of lines."""
+    expected = legacy_parse(text)
+    for got in (parse_phillip_text_format(text), parse_phillip_text_format(io.StringIO(text))):
+        if len(got) != len(expected) or (expected and not expected[0].equals(got[0])):
+            return False
+    return True
+
+
+def equivalence_failures(fuzz, seed=2):
+    failures = [case for case in EDGE_CASES if not parses_alike(case)]
+    failures += [case for case in DATE_CASES if not parses_alike(case + EDGE_CASES[0])]
+    rnd = random.Random(seed)
+    base = synthetic_text(200, 1, seed).split("\n") + EDGE_CASES
+    for _ in range(fuzz):
+        line = mutate(rnd.choice(base), rnd)
+        if not parses_alike(line):
+            failures.append(line)
+    return failures
+
+
+def legacy_parse(text):
+    """The previous implementation: several regexes and split()s per line, the date per transaction."""
+    transactions = []
+    for line in text.split('\n'):
+        if re.search(r'INF[A-Z0-9]{6}', line):
+            parts = line.split()
+            if len(parts) >= 8:
+                mutual_fund_name = parts[0] if parts else ""
+                isin_match = re.search(r'(INF[A-Z0-9]{6}[A-Z0-9]*)', line)
+                if not isin_match:
+                    continue
+                isin = isin_match.group(1)
+                scheme_part = line[:isin_match.start()].strip()
+                scheme_parts = scheme_part.split(' ', 1)
+                mutual_fund_scheme = scheme_parts[1] if len(scheme_parts) > 1 else scheme_part
+                numbers = re.findall(r'[\d,]+\.?\d*', line)
+                if len(numbers) < 3:
+                    continue
+                time_match = re.search(r'(\d{2}:\d{2}:\d{2})', line)
+                order_match = re.search(r'(\d{10})', line)
+                transactions.append({
+                    'MUTUAL FUND NAME': mutual_fund_name,
+                    'MUTUAL FUND SCHEME': mutual_fund_scheme,
+                    'ISIN': isin,
+                    'ORDER TIME': time_match.group(1) if time_match else "",
+                    'ORDER No': order_match.group(1) if order_match else "",
+                    'PURCHASE UNITS': numbers[-3].replace(',', ''),
+                    'BUY RATE': numbers[-2].replace(',', ''),
+                    'BUY TOTAL': numbers[-1].replace(',', ''),
+                    'DATE': extract_date_from_text(text),
+                })
+    return [pd.DataFrame(transactions)] if transactions else []
+
+
+def timed(fn, arg):
+    start = time.perf_counter()
+    result = fn(arg)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--every", type=int, default=20, help="one transaction line per this many lines")
+    parser.add_argument("--fuzz", type=int, default=30_000, help="randomly mutated lines to compare")
+    args = parser.parse_args()
+
+    failures = equivalence_failures(args.fuzz)
+    for line in failures[:20]:
+        print(f"differs from legacy: {line!r}")
+    print(f"edge cases and {args.fuzz} mutated lines: {len(failures)} differ from legacy")
+
+    text = synthetic_text(args.lines, args.every)
+    legacy_secs, expected = timed(legacy_parse, text)
+    compiled_secs, got = timed(parse_phillip_text_format, text)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        with open(path, encoding="utf-8") as f:
+            streamed_secs, streamed = timed(parse_phillip_text_format, f)
+
+    rows = len(expected[0]) if expected else 0
+    print(f"legacy    {legacy_secs:6.2f}s  ({args.lines / legacy_secs:,.0f} lines/s, {rows} transactions)")
+    print(f"compiled  {compiled_secs:6.2f}s  ({args.lines / compiled_secs:,.0f} lines/s)  x{legacy_secs / compiled_secs:.1f}")
+    print(f"streamed  {streamed_secs:6.2f}s  ({args.lines / streamed_secs:,.0f} lines/s, from a file)")
+    same = bool(expected) and expected[0].equals(got[0]) and expected[0].equals(streamed[0])
+    print(f"identical output: {same and not failures}")
+
+
+if __name__ == "__main__":
+    main()
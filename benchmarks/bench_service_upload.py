@@ -0,0 +1,103 @@
+"""
+/health latency on service.py while a large multipart upload is being
+split: the upload's parsing must not hold up other connections.
+
+    python -m benchmarks.bench_service_upload [--mb 19] [--polls 200]
+
+Starts the service in-process on a free port, sends one multipart upload
+of --mb megabytes and polls /health on a second connection until the
+upload is answered. The slowest /health reply should stay far below the
+time parse_multipart takes on the same body.
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import threading
+import time
+
+from service import ParseService, parse_multipart
+
+BOUNDARY = "----contract-note-bench"
+
+
+def multipart_body(size):
+    pdf = b"%PDF-1.4\n" + os.urandom(size)
+    head = (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"category\"\r\n\r\nEquity\r\n"
+            f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"note.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode("latin-1")
+    return head + pdf + f"\r\n--{BOUNDARY}--\r\n".encode("latin-1")
+
+
+def start_service(max_body):
+    """Run a one-worker ParseService on a background loop; returns (port, stop)."""
+    ready = threading.Event()
+    state = {}
+
+    async def run():
+        service = ParseService(workers=1, max_body=max_body)
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0, limit=64 * 1024)
+        state["port"] = server.sockets[0].getsockname()[1]
+        state["stop"] = stop = asyncio.Event()
+        state["loop"] = asyncio.get_running_loop()
+        ready.set()
+        async with server:
+            await stop.wait()
+        service.close()
+
+    thread = threading.Thread(target=asyncio.run, args=(run(),), daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        state["loop"].call_soon_threadsafe(state["stop"].set)
+        thread.join()
+
+    return state["port"], stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=19.0, help="upload size in MiB (the default limit is 20)")
+    parser.add_argument("--polls", type=int, default=200, help="most /health requests to send")
+    args = parser.parse_args()
+
+    body = multipart_body(int(args.mb * 2**20))
+    content_type = f"multipart/form-data; boundary={BOUNDARY}"
+    start = time.perf_counter()
+    parse_multipart(body, content_type)
+    split_secs = time.perf_counter() - start
+
+    port, stop = start_service(len(body) + 1)
+    upload = {}
+
+    def send_upload():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.request("POST", "/parse", body=body, headers={"Content-Type": content_type})
+        upload["status"] = conn.getresponse().status
+        conn.close()
+
+    sender = threading.Thread(target=send_upload)
+    sender.start()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    latencies = []
+    try:
+        while sender.is_alive() and len(latencies) < args.polls:
+            start = time.perf_counter()
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+        sender.join()
+        stop()
+
+    worst = max(latencies) if latencies else 0.0
+    print(f"parse_multipart on {len(body) / 2**20:.1f} MiB: {split_secs * 1000:7.1f} ms")
+    print(f"/health during the upload: {len(latencies)} replies, slowest {worst * 1000:7.1f} ms "
+          f"(upload answered {upload.get('status')})")
+    print(f"health answered while the upload was parsed: {bool(latencies) and worst < split_secs / 2}")
+
+
+if __name__ == "__main__":
+    main()
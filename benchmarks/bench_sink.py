@@ -0,0 +1,80 @@
+"""
+Rows/sec loading builder records into SQLite: one INSERT and commit per
+record (what a per-row API loop does) against RecordSink's batched
+executemany upserts.
+
+    python -m benchmarks.bench_sink [--records 100000] [--isins 2000] [--naive-records 5000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from record_sink import ACTION_COLUMNS, ENTITY_COLUMNS, RecordSink, action_row, connect_sqlite, entity_row
+
+
+def synthetic_records(n, isins, seed=1):
+    rnd = random.Random(seed)
+    pool = [f"INF{i:09d}" for i in range(isins)]
+    for i in range(n):
+        isin = rnd.choice(pool)
+        units, nav = rnd.uniform(1, 5000), rnd.uniform(10, 500)
+        yield {
+            "entityTable": {"scrip_name": f"SCHEME {isin} - DIRECT PLAN - GROWTH", "scrip_code": isin[-6:],
+                            "benchmark": "0", "category": "Equity", "subcategory": "Mutual Fund",
+                            "nickname": f"SCHEME {isin}", "isin": isin},
+            "actionTable": {"scrip_code": isin[-6:], "mode": "DEMAT", "order_type": "PURCHASE",
+                            "scrip_name": f"SCHEME {isin}", "isin": isin, "order_number": str(10**9 + i),
+                            "folio_number": "0", "nav": nav, "stt": 0.0, "unit": units, "redeem_amount": 0.0,
+                            "purchase_amount": units * nav, "net_amount": units * nav, "order_date": "11/04/2025",
+                            "stamp_duty": 0.0, "page_number": 1},
+        }
+
+
+def naive_load(conn, records):
+    """Row-at-a-time upserts with a commit each, like a per-record API call."""
+    entity_sql = (f"INSERT OR REPLACE INTO entities ({', '.join(ENTITY_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(ENTITY_COLUMNS))})")
+    action_sql = (f"INSERT OR REPLACE INTO actions ({', '.join(ACTION_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(ACTION_COLUMNS))})")
+    for record in records:
+        conn.execute(entity_sql, entity_row(record["entityTable"]))
+        conn.execute(action_sql, action_row(record["actionTable"]))
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--isins", type=int, default=2000)
+    parser.add_argument("--naive-records", type=int, default=5000,
+                        help="records for the per-row baseline (it is slow)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect_sqlite(os.path.join(tmp, "naive.sqlite"))
+        RecordSink(conn)  # schema only
+        records = list(synthetic_records(args.naive_records, args.isins))
+        start = time.perf_counter()
+        naive_load(conn, records)
+        naive = args.naive_records / (time.perf_counter() - start)
+        conn.close()
+
+        conn = connect_sqlite(os.path.join(tmp, "batched.sqlite"))
+        records = list(synthetic_records(args.records, args.isins))
+        start = time.perf_counter()
+        with RecordSink(conn, batch_size=args.batch_size) as sink:
+            sink.write_many(records)
+        batched = args.records / (time.perf_counter() - start)
+        stored = conn.execute("SELECT COUNT(*) FROM actions").fetchone()[0]
+        conn.close()
+
+    print(f"per-row  {naive:10.0f} rows/sec ({args.naive_records} records)")
+    print(f"batched  {batched:10.0f} rows/sec ({args.records} records, {stored} stored, "
+          f"{sink.written_entities} entity upserts)  x{batched / naive:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Throughput and peak RSS of every parsing stage on synthetic contract
+notes, from one page up to thousand-page documents.
+
+    python -m benchmarks.bench_suite [--kinds motilal,mfss,equity] [--pages 1,10,100] [--rows 20]
+                                     [--encrypted] [--scanned 1] [--repeat 3] [--output bench.json]
+                                     [--baseline previous.json]
+
+Stages: open_pdf, extract_pdf_content, the broker's build_json_* builder
+(on tables extracted outside the timer) and end-to-end process_pdf. Each
+(document, stage) runs in a fresh worker process so peak RSS belongs to
+that stage alone. Results go to --output as JSON together with the git
+commit, so runs on two commits can be diffed with --baseline. The
+per_page_ratio column is seconds per page against the previous page
+count: values well above 1 mean the stage scales superlinearly.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+from benchmarks.synthetic_notes import KINDS, generate_note
+
+STAGES = ("open_pdf", "extract_pdf_content", "build_json", "process_pdf")
+PASSWORD = "synthetic"
+CATEGORY, SUBCATEGORY = "Equity", "Mutual Fund"
+
+
+def reset_peak_rss():
+    """Start a new high-water mark (Linux only; elsewhere peaks include the worker's imports)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_stage(stage, path, password):
+    """Worker: time one stage on one document; returns (seconds, records, peak RSS bytes)."""
+    import test5
+
+    if stage == "build_json":
+        extracted = test5.extract_pdf_content(path, CATEGORY, SUBCATEGORY, password=password, include_text=False)
+        try:
+            builder = test5.select_builder(extracted["broker"], extracted["text"])
+        except ValueError:  # e.g. a Phillip note whose only parsed page is scanned
+            builder = None
+        tables = extracted["tables"]
+        del extracted
+    reset_peak_rss()
+    start = time.perf_counter()
+    if stage == "open_pdf":
+        with test5.open_pdf(path, password=password) as pdf:
+            records = len(pdf.pages)
+    elif stage == "extract_pdf_content":
+        extracted = test5.extract_pdf_content(path, CATEGORY, SUBCATEGORY, password=password, include_text=False)
+        records = sum(len(df) for df in extracted["tables"])
+    elif stage == "build_json":
+        records = len(builder(tables, CATEGORY, SUBCATEGORY)) if builder else 0
+    else:
+        records = len(test5.process_pdf(path, CATEGORY, SUBCATEGORY, password=password)[1])
+    return time.perf_counter() - start, records, peak_rss_bytes()
+
+
+def measure(stage, path, password, repeat):
+    """
+    Best-of-repeat seconds and the largest peak RSS, each run in its own
+    process. A stage that raises is reported with its error instead of
+    stopping the suite (e.g. process_pdf on a Phillip note whose first
+    page is scanned).
+    """
+    best, records, peak = float("inf"), 0, 0
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                seconds, records, rss = pool.submit(run_stage, stage, path, password).result()
+            except Exception as e:
+                return None, 0, 0, f"{type(e).__name__}: {e}"
+        best, peak = min(best, seconds), max(peak, rss)
+    return best, records, peak, None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return {(r["document"], r["stage"]): r for r in json.load(f)["results"] if "error" not in r}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated note kinds")
+    parser.add_argument("--pages", default="1,10,100", help="comma-separated page counts (add 1000 for the big run)")
+    parser.add_argument("--rows", type=int, default=20, help="transaction rows per page")
+    parser.add_argument("--encrypted", action="store_true", help="also run password-protected copies")
+    parser.add_argument("--scanned", type=int, default=0, help="also run copies with the first N pages scanned")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None, help="where generated PDFs go (default: a temp dir)")
+    parser.add_argument("--output", default="bench_suite.json", metavar="PATH")
+    parser.add_argument("--baseline", default=None, metavar="PATH", help="earlier --output to compare against")
+    args = parser.parse_args()
+
+    kinds = args.kinds.split(",")
+    page_counts = sorted(int(p) for p in args.pages.split(","))
+    stages = args.stages.split(",")
+    variants = [("plain", None, 0)]
+    if args.encrypted:
+        variants.append(("encrypted", PASSWORD, 0))
+    if args.scanned:
+        variants.append((f"scanned{args.scanned}", None, args.scanned))
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="contract_note_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    print(f"{'document':<28} {'stage':<20} {'seconds':>9} {'pages/s':>9} {'records':>8} {'peak MB':>8} "
+          f"{'per_page_ratio':>14} {'vs baseline':>11}", file=sys.stderr)
+    for kind in kinds:
+        for variant, password, scanned in variants:
+            previous = {}
+            for pages in page_counts:
+                document = f"{kind}-{variant}-{pages}p"
+                path = os.path.join(workdir, f"{document}-{args.rows}r.pdf")
+                if not os.path.exists(path):
+                    with open(path, "wb") as f:
+                        f.write(generate_note(kind, pages, args.rows, password=password, scanned=scanned))
+                for stage in stages:
+                    seconds, records, peak, error = measure(stage, path, password, args.repeat)
+                    if error:
+                        results.append({"document": document, "kind": kind, "variant": variant, "pages": pages,
+                                        "rows_per_page": args.rows, "stage": stage, "error": error})
+                        print(f"{document:<28} {stage:<20} failed: {error}", file=sys.stderr)
+                        continue
+                    ratio = None
+                    if stage in previous:
+                        prev_pages, prev_seconds = previous[stage]
+                        ratio = round((seconds / pages) / (prev_seconds / prev_pages), 2) if prev_seconds else None
+                    previous[stage] = (pages, seconds)
+                    before = baseline.get((document, stage))
+                    change = round(seconds / before["seconds"], 2) if before and before["seconds"] else None
+                    results.append({
+                        "document": document, "kind": kind, "variant": variant, "pages": pages,
+                        "rows_per_page": args.rows, "bytes": os.path.getsize(path), "stage": stage,
+                        "seconds": round(seconds, 6), "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+                        "records": records, "peak_rss_mb": round(peak / 2**20, 1), "per_page_ratio": ratio,
+                        "vs_baseline": change,
+                    })
+                    print(f"{document:<28} {stage:<20} {seconds:9.4f} {pages / seconds if seconds else 0:9.1f} "
+                          f"{records:8d} {peak / 2**20:8.1f} {ratio if ratio is not None else '-':>14} "
+                          f"{change if change is not None else '-':>11}", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"kinds": kinds, "pages": page_counts, "rows_per_page": args.rows, "repeat": args.repeat,
+                     "encrypted": args.encrypted, "scanned": args.scanned},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{len(results)} measurements written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Table extraction time per page: pdfplumber's default whole-page
+extract_tables() against the broker's table profile (crop to the
+transaction band, stop at the totals rows).
+
+    python -m benchmarks.bench_table_profiles PDF/ [--repeat 5]
+"""
+import argparse
+import os
+import time
+
+from batch import collect_pdf_paths
+from test5 import BROKER_TABLE_PROFILES, detect_broker_name, extract_page_tables, is_pdf_encrypted, open_pdf
+
+
+def time_tables(path, profile, repeat):
+    """Best-of-repeat seconds and table rows for the first page; text is extracted outside the timer."""
+    best, rows = float("inf"), 0
+    for _ in range(repeat):
+        with open_pdf(path) as pdf:
+            page = pdf.pages[0]
+            page.extract_text()
+            start = time.perf_counter()
+            tables = extract_page_tables(page, profile)
+            best = min(best, time.perf_counter() - start)
+            rows = sum(len(t) for t in tables)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for path in (p for p in collect_pdf_paths(args.sources) if not is_pdf_encrypted(p)):
+        with open_pdf(path) as pdf:
+            broker = detect_broker_name(pdf.pages[0].extract_text() or "")
+        profile = BROKER_TABLE_PROFILES.get(broker, {})
+        full, full_rows = time_tables(path, None, args.repeat)
+        cropped, cropped_rows = time_tables(path, profile, args.repeat)
+        print(f"{os.path.basename(path):<24} full {full * 1000:6.1f} ms ({full_rows} rows)  "
+              f"profile {cropped * 1000:6.1f} ms ({cropped_rows} rows)  x{full / cropped:.2f}")
+
+
+if __name__ == "__main__":
+    main()
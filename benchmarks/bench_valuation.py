@@ -0,0 +1,125 @@
+"""
+XIRR and holdings for many synthetic portfolios: the vectorised
+valuation engine against a per-portfolio Python Newton loop (timed on a
+sample and extrapolated), checking both give the same rates.
+
+    python -m benchmarks.bench_valuation [--portfolios 100000] [--flows 24] [--sample 2000]
+"""
+import argparse
+import math
+import time
+from datetime import date
+
+import numpy as np
+
+from valuation import (BISECTION_BOUNDS, BISECTION_STEPS, DAYS_PER_YEAR, NEWTON_GUESS, NEWTON_STEPS, TOLERANCE,
+                       PortfolioFlows, value_portfolios)
+
+
+def synthetic_flows(portfolios, flows, seed=1):
+    """Monthly SIPs with the odd redemption, NAV drifting at a per-portfolio rate."""
+    rng = np.random.default_rng(seed)
+    count = rng.integers(2, 2 * flows, portfolios)
+    index = np.repeat(np.arange(portfolios), count)
+    start = date(2019, 1, 1).toordinal() + rng.integers(0, 365, portfolios)
+    offset = np.arange(len(index)) - np.repeat(np.cumsum(count) - count, count)
+    day = start[index] + offset * 30 + rng.integers(0, 5, len(index))
+    growth = rng.normal(0.12, 0.1, portfolios)
+    nav = 10 * np.exp(growth[index] * (day - start[index]) / DAYS_PER_YEAR)
+    redeem = (rng.random(len(index)) < 0.05) & (offset > 0)
+    amount = np.where(redeem, 1, -1) * rng.uniform(1000, 50000, len(index))
+    units = -amount / nav
+    keys = [(str(10**9 + k), f"INF{k:09d}") for k in range(portfolios)]
+    return PortfolioFlows(keys, index, day, amount, units, nav)
+
+
+def scalar_xirr(days, amounts):
+    """The per-portfolio loop this replaces."""
+    first = min(days)
+    years = [(d - first) / DAYS_PER_YEAR for d in days]
+    rate = NEWTON_GUESS
+    for _ in range(NEWTON_STEPS):
+        npv = sum(a * (1 + rate) ** -t for a, t in zip(amounts, years))
+        slope = sum(-t * a * (1 + rate) ** (-t - 1) for a, t in zip(amounts, years))
+        if slope == 0:
+            return math.nan
+        stepped = rate - npv / slope
+        if stepped <= -1:
+            return math.nan
+        if abs(stepped - rate) <= TOLERANCE * (1 + abs(rate)):
+            return stepped
+        rate = stepped
+    return math.nan
+
+
+def scalar_bisect(days, amounts):
+    """Reference for the portfolios Newton gives up on (the engine bisects those)."""
+    first = min(days)
+    years = [(d - first) / DAYS_PER_YEAR for d in days]
+
+    def npv(rate):
+        return sum(a * (1 + rate) ** -t for a, t in zip(amounts, years))
+
+    lo, hi = BISECTION_BOUNDS
+    f_lo, f_hi = npv(lo), npv(hi)
+    if (f_lo > 0) == (f_hi > 0):
+        return math.nan
+    for _ in range(BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        if (f_mid > 0) == (f_lo > 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--portfolios", type=int, default=100_000)
+    parser.add_argument("--flows", type=int, default=24, help="average transactions per portfolio")
+    parser.add_argument("--sample", type=int, default=2000, help="portfolios to run the scalar loop on")
+    args = parser.parse_args()
+
+    flows = synthetic_flows(args.portfolios, args.flows)
+    as_of = date.fromordinal(int(flows.day.max()) + 30)
+    start = time.perf_counter()
+    valuation = value_portfolios(flows, as_of=as_of)
+    vector_secs = time.perf_counter() - start
+    rates = valuation["xirr"]
+    print(f"vectorised  {args.portfolios} portfolios / {len(flows.index)} flows in {vector_secs:.2f}s "
+          f"({args.portfolios / vector_secs:,.0f} portfolios/s), {np.isnan(rates).sum()} without an XIRR")
+
+    sample = min(args.sample, args.portfolios)
+    terminal = as_of.toordinal()
+    order = np.argsort(flows.index, kind="stable")
+    bounds = np.searchsorted(flows.index[order], np.arange(sample + 1))
+    start = time.perf_counter()
+    expected, cases = [], []
+    for k in range(sample):
+        rows = order[bounds[k]:bounds[k + 1]]
+        days, amounts = flows.day[rows].tolist(), flows.amount[rows].tolist()
+        if valuation["market_value"][k] > 0:
+            days.append(terminal)
+            amounts.append(float(valuation["market_value"][k]))
+        expected.append(scalar_xirr(days, amounts))
+        cases.append((days, amounts))
+    scalar_secs = (time.perf_counter() - start) * args.portfolios / sample
+    print(f"scalar loop {scalar_secs:.2f}s extrapolated from {sample} portfolios  x{scalar_secs / vector_secs:.0f} slower")
+
+    expected = np.array(expected)
+    both = ~np.isnan(expected) & ~np.isnan(rates[:sample])
+    diff = np.abs(expected[both] - rates[:sample][both]) / (1 + np.abs(expected[both]))
+    print(f"agreement   {both.sum()}/{sample} comparable, max relative diff {diff.max() if both.any() else 0:.2e}")
+
+    # Rows scalar Newton can't settle went through the engine's bisection
+    bisected = np.flatnonzero(np.isnan(expected))
+    reference = np.array([scalar_bisect(*cases[k]) for k in bisected])
+    got = rates[:sample][bisected]
+    mismatched = (np.isnan(reference) != np.isnan(got)) | (
+        np.abs(np.nan_to_num(reference) - np.nan_to_num(got)) > 1e-6 * (1 + np.abs(np.nan_to_num(reference))))
+    print(f"bisection   {len(bisected)} rows checked against a scalar bisection, {mismatched.sum()} mismatched")
+
+
+if __name__ == "__main__":
+    main()
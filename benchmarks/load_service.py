@@ -0,0 +1,108 @@
+"""
+Load generator for service.py: upload the PDFs in PDF/ from many
+concurrent clients and report status codes, throughput and latency.
+
+    python service.py --workers 4 &
+    python -m benchmarks.load_service PDF/ --concurrency 16 --requests 200
+
+429s are expected once concurrency exceeds workers + queue limit; pass
+--retry to back off and resend them instead.
+"""
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from batch import collect_pdf_paths, percentile
+
+
+def upload_loop(base_url, payloads, total, counter, args, results):
+    """One client: keep-alive connection, uploads until total requests have been sent."""
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=args.timeout)
+    query = urlencode({"category": args.category, "subcategory": args.subcategory})
+    headers = {"Content-Type": "application/pdf"}
+    if args.password:
+        headers["X-PDF-Password"] = args.password
+    while True:
+        with counter["lock"]:
+            if counter["sent"] >= total:
+                break
+            i = counter["sent"]
+            counter["sent"] += 1
+        name, data = payloads[i % len(payloads)]
+        while True:
+            start = time.perf_counter()
+            try:
+                conn.request("POST", f"/parse?{query}", body=data, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                status = response.status
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                status, body = "conn_error", b""
+            elapsed = time.perf_counter() - start
+            if status in (429, 413, "conn_error"):
+                conn.close()  # the service hangs up without reading the rest of the upload
+            if status == 429 and args.retry:
+                results.append((429, elapsed, name, 0))
+                time.sleep(float(response.getheader("Retry-After", "1")))
+                continue
+            records = len(json.loads(body)["records"]) if status == 200 else 0
+            results.append((status, elapsed, name, records))
+            break
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload PDFs to the parse service concurrently.")
+    parser.add_argument("sources", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--category", default="Equity")
+    parser.add_argument("--subcategory", default="Mutual Fund")
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--retry", action="store_true", help="resend 429s after Retry-After")
+    args = parser.parse_args()
+
+    payloads = []
+    for path in collect_pdf_paths(args.sources):
+        with open(path, "rb") as f:
+            payloads.append((os.path.basename(path), f.read()))
+    if not payloads:
+        parser.error("no PDFs found")
+
+    counter = {"lock": threading.Lock(), "sent": 0}
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        clients = [pool.submit(upload_loop, args.url, payloads, args.requests, counter, args, results)
+                   for _ in range(args.concurrency)]
+        for client in clients:
+            client.result()
+    wall = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _, _ in results)
+    ok = [elapsed for status, elapsed, _, _ in results if status == 200]
+    summary = {
+        "requests": len(results),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "records": sum(records for _, _, _, records in results),
+        "wall_seconds": round(wall, 3),
+        "ok_per_sec": round(len(ok) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ok, 50) * 1000, 1),
+        "p95_ms": round(percentile(ok, 95) * 1000, 1),
+        "p99_ms": round(percentile(ok, 99) * 1000, 1),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Synthetic contract notes shaped like the real Motilal Oswal MF notes and
+Phillip Capital MFSS / equity notes, for benchmarking without client data.
+
+    python -m benchmarks.synthetic_notes motilal --pages 100 --rows 20 -o motilal_100.pdf
+    python -m benchmarks.synthetic_notes mfss --scanned 1 --password secret -o scanned.pdf
+
+The same seed always gives the same document. Pages are drawn with
+Helvetica text and ruled table grids so pdfplumber finds the tables the
+way it does on the real notes; scanned pages are the same drawing
+rasterised into a JPEG with no text layer. Encryption needs PyPDF2.
+"""
+import argparse
+import io
+import random
+import sys
+import zlib
+
+try:
+    import PyPDF2
+except ImportError:  # only needed for encrypted notes
+    PyPDF2 = None
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # only needed for scanned pages
+    Image = None
+
+KINDS = ("motilal", "mfss", "equity")
+CHAR_WIDTH = 0.55  # average Helvetica glyph width, in font sizes
+SCAN_DPI = 100
+
+SCHEMES = [
+    ("EDNID1-GR", "EDELWEISS NIFTY 50 INDEX FUND - DIRECT PLAN - GROWTH", "INF754K01NB3"),
+    ("PP001ZG-GR", "PARAG PARIKH FLEXI CAP FUND - DIRECT PLAN GROWTH", "INF879O01027"),
+    ("IC9453-GR", "ICICI PRUDENTIAL INDIA OPPORTUNITIES FUND DIRECT", "INF109KC1RH9"),
+    ("MAAFRG-GR-L1", "MIRAE ASSET ARBITRAGE FUND - REGULAR PLAN - GROWTH", "INF769K01FP7"),
+    ("RMFAF-GR-L1", "NIPPON INDIA ARBITRAGE FUND - GROWTH", "INF204K01IY1"),
+    ("HDFCTOP-DG", "HDFC TOP 100 FUND - DIRECT PLAN - GROWTH", "INF179K01YV8"),
+]
+# Scheme names that also name a broker (HDFC, ICICI) would win broker detection on a Phillip note
+NEUTRAL_SCHEMES = [scheme for scheme in SCHEMES if not scheme[1].startswith(("HDFC", "ICICI"))]
+STOCKS = [("RELIANCE INDUSTRIES LTD", "INE002A01018"), ("INFOSYS LTD", "INE009A01021"),
+          ("AXIS BANK LTD", "INE238A01034"), ("TATA CONSULTANCY SERV LT", "INE467B01029")]
+
+
+class Canvas:
+    """One page as text runs and ruling lines, in pdfplumber's top-down coordinates."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.texts = []  # (x, top, size, text)
+        self.lines = []  # (x0, top0, x1, top1)
+
+    def text(self, x, top, text, size=7):
+        self.texts.append((x, top, size, text))
+
+    def line(self, x0, top0, x1, top1):
+        self.lines.append((x0, top0, x1, top1))
+
+    def table(self, x, top, widths, rows, row_height=14, size=6):
+        """Ruled grid with one text run per cell (clipped to fit); returns the bottom edge."""
+        bottom = top + row_height * len(rows)
+        right = x + sum(widths)
+        for i in range(len(rows) + 1):
+            self.line(x, top + i * row_height, right, top + i * row_height)
+        edge = x
+        for width in widths + [0]:
+            self.line(edge, top, edge, bottom)
+            edge += width
+        for r, row in enumerate(rows):
+            edge = x
+            for width, cell in zip(widths, row):
+                if cell:
+                    fits = max(1, int((width - 4) / (size * CHAR_WIDTH)))
+                    self.text(edge + 2, top + r * row_height + (row_height - size) / 2, str(cell)[:fits], size)
+                edge += width
+        return bottom
+
+    def content(self):
+        ops = ["0.5 w"]
+        for x0, top0, x1, top1 in self.lines:
+            ops.append(f"{x0:.2f} {self.height - top0:.2f} m {x1:.2f} {self.height - top1:.2f} l S")
+        for x, top, size, text in self.texts:
+            escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"BT /F1 {size} Tf {x:.2f} {self.height - top - size * 0.8:.2f} Td ({escaped}) Tj ET")
+        return "\n".join(ops).encode("latin-1", "replace")
+
+    def raster(self, dpi=SCAN_DPI):
+        """The page as a greyscale JPEG, as a scanner would produce it."""
+        if Image is None:
+            raise ValueError("Scanned pages require Pillow, which is not installed")
+        scale = dpi / 72.0
+        image = Image.new("L", (int(self.width * scale), int(self.height * scale)), 255)
+        draw = ImageDraw.Draw(image)
+        for x0, top0, x1, top1 in self.lines:
+            draw.line([(x0 * scale, top0 * scale), (x1 * scale, top1 * scale)], fill=0)
+        for x, top, _, text in self.texts:
+            draw.text((x * scale, top * scale), text, fill=0)
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=70)
+        return image.size, out.getvalue()
+
+
+def write_pdf(canvases, scanned=()):
+    """Canvases -> PDF bytes; pages whose index is in scanned become image-only."""
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    def stream(data, extra=b""):
+        packed = zlib.compress(data)
+        return b"<< /Length %d /Filter /FlateDecode%s >>\nstream\n%s\nendstream" % (len(packed), extra, packed)
+
+    for index, canvas in enumerate(canvases):
+        resources = b"/Font << /F1 3 0 R >>"
+        if index in scanned:
+            (w, h), jpeg = canvas.raster()
+            image = add(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                        b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n%s\nendstream"
+                        % (w, h, len(jpeg), jpeg))
+            resources = b"/XObject << /Im0 %d 0 R >>" % image
+            content = f"q {canvas.width} 0 0 {canvas.height} 0 0 cm /Im0 Do Q".encode("ascii")
+        else:
+            content = canvas.content()
+        contents = add(stream(content))
+        kids.append(add(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << %s >> /Contents %d 0 R >>"
+                        % (canvas.width, canvas.height, resources, contents)))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def encrypt_pdf(data, password):
+    if PyPDF2 is None:
+        raise ValueError("Encrypted notes require PyPDF2, which is not installed")
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.encrypt(password, use_128bit=True)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _letterhead(canvas, lines, top=20, size=8):
+    for i, line in enumerate(lines):
+        canvas.text(28, top + i * (size + 4), line, size)
+
+
+def motilal_pages(pages, rows, rnd):
+    widths = [55, 40, 50, 190, 65, 55, 60, 45, 40, 60, 55, 70]
+    header = ["Scrip Code", "Mode", "Order Type", "Scrip Name", "ISIN", "Order No", "Folio No", "NAV", "STT",
+              "Unit", "Reedem Amt", "Purchase Amt"]
+    canvases, total = [], 0.0
+    for page in range(pages):
+        canvas = Canvas(842, 595)
+        _letterhead(canvas, [
+            "MF CONTRACT NOTE", "Motilal Oswal Financial Services Limited",
+            "Corr Add: Palm Spring Centre, 2nd floor, Link road, malad (w), Mumbai - 400064",
+            "Client Name SYNTHETIC CLIENT (H00000) Pan Of Constituent AAXXX-XX-0X",
+            "Order Date 11/04/2025 Sett No 2526008", "BSE Mutual Fund Contract Note : 11/04/2025",
+        ])
+        data = [header]
+        for _ in range(rows):
+            code, name, isin = SCHEMES[rnd.randrange(len(SCHEMES))]
+            nav, amount = rnd.uniform(10, 500), rnd.randrange(1, 100) * 5000.0
+            total += amount
+            data.append([code, "DEMAT", "PURCHASE", name, isin, str(rnd.randrange(10**9, 10**10)),
+                         str(rnd.randrange(10**7, 10**11)), f"{nav:.4f}", "0.0000", f"{amount / nav:.4f}", "0.0000",
+                         f"{amount:.4f}"])
+        row_height = min(14, (595 - 200 - 90) / len(data))
+        bottom = canvas.table(28, 200, widths, data, row_height=row_height)
+        if page == pages - 1:
+            _letterhead(canvas, ["Total Brokerage 0.0000", "STT 0.0000", f"STAMPDUTY {total * 0.00005:.4f}",
+                                 f"NET AMOUNT DUE TO US Rs. {total:.4f}"], top=bottom + 8, size=7)
+        canvases.append(canvas)
+    terms = Canvas(842, 595)
+    _letterhead(terms, ["* As per Regulatory requirements, terms and conditions apply."] * 10)
+    canvases.append(terms)
+    return canvases
+
+
+def mfss_pages(pages, rows, rnd):
+    widths = [80, 250, 75, 55, 70, 70, 45, 60, 45, 80, 60, 45, 55, 55, 70]
+    canvases = []
+    for page in range(pages):
+        canvas = Canvas(1224, 792)
+        _letterhead(canvas, [
+            "MUTUAL FUND TRANSACTION CONFIRMATION NOTE (MFSS)", "PHILLIPCAPITAL (INDIA) PVT. LTD.",
+            "NO.1, 18 TH FLOOR,URMI ESTATE,95, GANPATRAO KADAM MARG,MUMBAI - 400013",
+            "To: SYNTHETIC CLIENT (XN0 00000)", "3RD ROAD Date 21/06/2024",
+            "Sub: Confirmation of Order(s) entry on the MFSS on 21/06/2024",
+        ])
+        data = [[""] * 5 + ["REQUEST FOR SUBSCRIPTION"] + [""] * 4 + ["REQUEST FOR REDEMPTION"] + [""] * 4,
+                ["MUTUAL FUND NAME", "MUTUAL FUND SCHEME", "ISIN", "ORDER TIME", "ORDER No", "PURCHASE UNITS",
+                 "UNIT/ DEMAT", "BUY RATE", "TOT BROK", "BUY TOTAL", "SELL UNITS", "UNIT/ DEMAT", "SELL RATE",
+                 "SELL TOT BROK", "SELL TOTAL"]]
+        for _ in range(rows):
+            code, name, isin = NEUTRAL_SCHEMES[rnd.randrange(len(NEUTRAL_SCHEMES))]
+            nav, amount = rnd.uniform(10, 500), rnd.randrange(1, 100) * 100000.0
+            clock = f"{rnd.randrange(9, 16):02d}:{rnd.randrange(60):02d}:{rnd.randrange(60):02d}"
+            data.append([code, name, isin, clock, str(rnd.randrange(10**9, 10**10)), f"{amount / nav:.3f}", "",
+                         f"{nav:.4f}", "", f"{amount:.2f}", "", "", "", "", ""])
+        row_height = min(14, (792 - 260 - 90) / len(data))
+        bottom = canvas.table(28, 260, widths, data, row_height=row_height)
+        _letterhead(canvas, ["Net Obligation 0.00", "CGST (@ 9.00%) 0.00", "Stamp Duty 0.00"], top=bottom + 8, size=7)
+        canvases.append(canvas)
+    return canvases
+
+
+def equity_pages(pages, rows, rnd):
+    widths = [110, 260, 70, 70, 150, 70, 150]
+    header = ["Order No.", "Security / Contract Description", "Buy(B) / Sell(S)", "Quantity",
+              "Gross Rate/ Trade Price Per Unit (Rs.)@", "STT", "Net Total (Before Levies) (Rs.)"]
+    canvases = []
+    for page in range(pages):
+        canvas = Canvas(1224, 792)
+        _letterhead(canvas, [
+            "CONTRACT NOTE CUM TAX INVOICE", "PHILLIPCAPITAL (INDIA) PVT. LTD.",
+            "CONTRACT NOTE NO 2025/SYN/000001 TRADE DATE 14/07/2025",
+            "To: SYNTHETIC CLIENT (XN0 00000)", "Date 14/07/2025",
+        ])
+        data = [header, ["NSE - CAPITAL - Normal", "", "", "", "", "", ""]]
+        for _ in range(rows):
+            name, isin = STOCKS[rnd.randrange(len(STOCKS))]
+            qty, rate = rnd.randrange(1, 5000), rnd.uniform(10, 3000)
+            data.append([str(rnd.randrange(10**15, 10**16)), f"{name} ISIN: {isin}", rnd.choice(["BUY", "SELL"]),
+                         str(qty), f"{rate:.2f}", f"{qty * rate / 1000:.2f}", f"{qty * rate:.2f}"])
+        row_height = min(14, (792 - 260 - 90) / len(data))
+        bottom = canvas.table(28, 260, widths, data, row_height=row_height)
+        _letterhead(canvas, ["Securities Transaction Tax 0.00", "Stamp Duty 0.00"], top=bottom + 8, size=7)
+        canvases.append(canvas)
+    return canvases
+
+
+PAGE_BUILDERS = {"motilal": motilal_pages, "mfss": mfss_pages, "equity": equity_pages}
+
+
+def generate_note(kind, pages=1, rows=10, password=None, scanned=0, seed=1):
+    """
+    PDF bytes for a synthetic note: pages of transactions with rows each,
+    the first `scanned` pages rasterised, encrypted when password is set.
+    """
+    if kind not in PAGE_BUILDERS:
+        raise ValueError(f"Unknown note kind: {kind} (expected one of {', '.join(KINDS)})")
+    canvases = PAGE_BUILDERS[kind](pages, rows, random.Random(seed))
+    data = write_pdf(canvases, scanned=set(range(min(scanned, len(canvases)))))
+    return encrypt_pdf(data, password) if password else data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic contract-note PDF.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=10, help="transaction rows per page")
+    parser.add_argument("--password", default=None, help="encrypt with this user password")
+    parser.add_argument("--scanned", type=int, default=0, help="rasterise the first N pages (no text layer)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", required=True, metavar="PATH")
+    args = parser.parse_args(argv)
+
+    data = generate_note(args.kind, args.pages, args.rows, args.password, args.scanned, args.seed)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"{args.output}: {args.kind}, {args.pages} pages x {args.rows} rows, {len(data)} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import sys
+
+DEFAULT_REGISTRY_PATH = ".entity_registry.json"
+SNAPSHOT_VERSION = 1
+
+ENTITY_FIELDS = ("isin", "scrip_name", "scrip_code", "nickname", "category", "subcategory", "benchmark")
+# The Motilal builder writes scripname/scripcode, the Phillip ones scrip_name/scrip_code
+FIELD_ALIASES = {"scrip_name": ("scrip_name", "scripname"), "scrip_code": ("scrip_code", "scripcode")}
+NAME_FIELDS = ("scrip_name", "nickname")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_ISIN_JUNK_RE = re.compile(r"[^A-Z0-9]")
+
+
+def normalize_scheme_name(name):
+    """
+    Collapse the line breaks and runs of spaces pdfplumber leaves in
+    wrapped cells: "FUND - DIRECT\\nPLAN - GROWTH" -> "FUND - DIRECT PLAN - GROWTH".
+    """
+    if not name:
+        return ""
+    return _WHITESPACE_RE.sub(" ", str(name)).strip()
+
+
+def normalize_isin(isin):
+    """Upper-case and drop the spaces wrapped cells put inside ISINs ("INF769K0 1FP7")."""
+    return _ISIN_JUNK_RE.sub("", str(isin or "").upper())
+
+
+def canonical_entity(entity):
+    """entityTable dict from any builder -> canonical field names, normalised names, interned strings."""
+    out = {}
+    for field in ENTITY_FIELDS:
+        value = None
+        for name in FIELD_ALIASES.get(field, (field,)):
+            value = entity.get(name)
+            if value is not None:
+                break
+        if field == "isin":
+            value = normalize_isin(value)
+        elif field in NAME_FIELDS:
+            value = normalize_scheme_name(value)
+        elif value is not None:
+            value = str(value).strip()
+        out[field] = sys.intern(value) if value else ""
+    return out
+
+
+class EntityRegistry:
+    """
+    One canonical entity per ISIN, shared by every document in a run and
+    persisted between runs. Records can then carry just the ISIN and
+    writers only need to upsert entities that are new or changed.
+    """
+
+    def __init__(self, entities=None):
+        self.entities = entities or {}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __contains__(self, isin):
+        return normalize_isin(isin) in self.entities
+
+    def get(self, isin):
+        return self.entities.get(normalize_isin(isin))
+
+    def intern(self, entity):
+        """
+        Register an entityTable dict and return (isin, changed). The first
+        non-empty value seen for a field wins; later rows only fill blanks.
+        Returns ("", False) for entities without an ISIN.
+        """
+        candidate = canonical_entity(entity)
+        isin = candidate["isin"]
+        if not isin:
+            return "", False
+        known = self.entities.get(isin)
+        if known is None:
+            self.entities[isin] = candidate
+            return isin, True
+        changed = False
+        for field, value in candidate.items():
+            if value and not known[field]:
+                known[field] = value
+                changed = True
+        return isin, changed
+
+    def compact(self, record):
+        """
+        {"entityTable", "actionTable"} -> actionTable carrying only the ISIN
+        reference; the entity itself lives in the registry.
+        """
+        isin, _ = self.intern(record.get("entityTable") or {})
+        action = dict(record.get("actionTable") or {})
+        action["isin"] = isin or normalize_isin(action.get("isin"))
+        return action
+
+    def expand(self, action):
+        """Inverse of compact(): rebuild the full record from the registry."""
+        return {"entityTable": dict(self.get(action.get("isin")) or {}), "actionTable": action}
+
+    def save(self, path=DEFAULT_REGISTRY_PATH):
+        """Write a snapshot atomically (temp file + rename) so a crash never leaves half a file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "entities": self.entities}, f, ensure_ascii=False,
+                      separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_REGISTRY_PATH):
+        """Registry from a snapshot, or an empty one if there is none yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return cls()
+        entities = {}
+        for isin, entity in snapshot["entities"].items():
+            entities[sys.intern(isin)] = {field: sys.intern(entity.get(field) or "") for field in ENTITY_FIELDS}
+        return cls(entities)
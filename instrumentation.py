@@ -0,0 +1,198 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import pyinstrument
+except ImportError:  # optional profiler backend
+    pyinstrument = None
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_METRIC = "contract_note_stage_seconds"
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """
+    Counters and latency histograms keyed by metric name and labels.
+    Thread-safe; state() / merge() move metrics between processes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += seconds
+
+    def state(self):
+        """Picklable copy of all metrics."""
+        with self.lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(hist)] for (name, labels), hist in self.histograms.items()],
+            }
+
+    def merge(self, state):
+        """Add another Metrics.state() (e.g. from a worker process) into this one."""
+        with self.lock:
+            for name, labels, value in state["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, hist in state["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                mine = self.histograms.get(key)
+                if mine is None:
+                    self.histograms[key] = list(hist)
+                else:
+                    self.histograms[key] = [a + b for a, b in zip(mine, hist)]
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        """Counters plus per-histogram count, sum, mean and cumulative buckets."""
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = []
+            for (name, labels), hist in sorted(self.histograms.items()):
+                count = sum(hist[:-1])
+                cumulative, buckets = 0, {}
+                for bound, n in zip(LATENCY_BUCKETS, hist):
+                    cumulative += n
+                    buckets[str(bound)] = cumulative
+                buckets["+Inf"] = count
+                histograms.append({
+                    "name": name, "labels": dict(labels), "count": count, "sum": round(hist[-1], 6),
+                    "mean": round(hist[-1] / count, 6) if count else 0.0, "buckets": buckets,
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format."""
+
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        lines = []
+        data = self.to_dict()
+        seen = set()
+        for c in data["counters"]:
+            if c["name"] not in seen:
+                lines.append(f"# TYPE {c['name']} counter")
+                seen.add(c["name"])
+            lines.append(f"{c['name']}{fmt(sorted(c['labels'].items()))} {c['value']}")
+        for h in data["histograms"]:
+            labels = sorted(h["labels"].items())
+            if h["name"] not in seen:
+                lines.append(f"# TYPE {h['name']} histogram")
+                seen.add(h["name"])
+            for bound, n in h["buckets"].items():
+                lines.append(f"{h['name']}_bucket{fmt(labels, [('le', bound)])} {n}")
+            lines.append(f"{h['name']}_sum{fmt(labels)} {h['sum']}")
+            lines.append(f"{h['name']}_count{fmt(labels)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """The registry spans currently report to."""
+    return _metrics
+
+
+@contextmanager
+def use_metrics(metrics):
+    """Temporarily send all spans and counters to another registry."""
+    global _metrics
+    previous, _metrics = _metrics, metrics
+    try:
+        yield metrics
+    finally:
+        _metrics = previous
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time a pipeline stage into the contract_note_stage_seconds histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage, **labels)
+
+
+def count(name, value=1, **labels):
+    _metrics.inc(name, value, **labels)
+
+
+def write_metrics(path, metrics=None):
+    """Dump metrics as Prometheus text (.prom/.txt) or JSON (anything else)."""
+    metrics = metrics or _metrics
+    with open(path, "w") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(metrics.to_prometheus())
+        else:
+            f.write(metrics.to_json())
+
+
+def profile_call(label, output_dir, fn, *args, backend="cprofile", **kwargs):
+    """
+    Run fn under a profiler and save the result in output_dir as
+    <label>.prof (cProfile, open with pstats/snakeviz) or <label>.html
+    (pyinstrument, if installed).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    safe_label = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in label)
+    if backend == "pyinstrument":
+        if pyinstrument is None:
+            raise ValueError("pyinstrument backend requested but pyinstrument is not installed")
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            with open(os.path.join(output_dir, safe_label + ".html"), "w") as f:
+                f.write(profiler.output_html())
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(os.path.join(output_dir, safe_label + ".prof"))
@@ -0,0 +1,435 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from log_config import configure_logging
+from instrumentation import Metrics, count, get_metrics, span, use_metrics
+from models import to_dicts
+from result_cache import cached_process_pdf, get_cache, read_pdf_bytes
+from test5 import process_pdf
+
+DEFAULT_QUEUE_PATH = ".contract_note_jobs.sqlite"
+
+# Lower runs first; interactive uploads always jump ahead of backfills
+LANES = {"interactive": 0, "bulk": 1}
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 2.0  # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 300.0
+LEASE_SECONDS = 600  # a running job whose worker vanished is requeued after this
+
+# Failures worth retrying: the environment, not the PDF, was the problem.
+# Wrong passwords and unparseable notes fail the same way every time.
+TRANSIENT_ERRORS = (OSError, TimeoutError, MemoryError, sqlite3.OperationalError, BrokenProcessPool)
+
+
+def backoff_delay(attempts, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with full jitter after the given number of failed attempts."""
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+
+class JobQueue:
+    """
+    Durable job queue for contract-note parsing in one SQLite file.
+    Jobs are deduplicated by sha256(pdf) + category + subcategory: submitting
+    the same note again returns the existing job (or its finished result)
+    unless that job failed. Uploaded bytes live in a blob table, one copy
+    per file hash, until the job reaches a final state.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                   id TEXT PRIMARY KEY,
+                   dedup_key TEXT NOT NULL UNIQUE,
+                   file_hash TEXT NOT NULL,
+                   name TEXT,
+                   category TEXT NOT NULL,
+                   subcategory TEXT NOT NULL,
+                   password TEXT,
+                   lane TEXT NOT NULL,
+                   priority INTEGER NOT NULL,
+                   status TEXT NOT NULL,
+                   attempts INTEGER NOT NULL DEFAULT 0,
+                   max_attempts INTEGER NOT NULL,
+                   next_run_at REAL NOT NULL,
+                   lease_until REAL,
+                   created_at REAL NOT NULL,
+                   started_at REAL,
+                   finished_at REAL,
+                   broker TEXT,
+                   records TEXT,
+                   error TEXT
+               );
+               CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, next_run_at, created_at);
+               CREATE TABLE IF NOT EXISTS blobs (
+                   file_hash TEXT PRIMARY KEY,
+                   data BLOB NOT NULL
+               );"""
+        )
+
+    def submit(self, pdf_file, category, subcategory, lane="interactive", password=None, name=None,
+               max_attempts=MAX_ATTEMPTS):
+        """Queue a PDF (path, bytes or file object) and return its job id."""
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane} (expected one of {', '.join(LANES)})")
+        data = read_pdf_bytes(pdf_file)
+        file_hash = hashlib.sha256(data).hexdigest()
+        dedup_key = f"{file_hash}:{category}:{subcategory}"
+        if name is None and isinstance(pdf_file, (str, os.PathLike)):
+            name = os.fspath(pdf_file)
+        now = time.time()
+        with self.transaction():
+            row = self.conn.execute("SELECT id, status, priority FROM jobs WHERE dedup_key = ?",
+                                    (dedup_key,)).fetchone()
+            if row is not None and row["status"] != "failed":
+                # An interactive resubmission of a waiting backfill job promotes it
+                if row["status"] == "queued" and LANES[lane] < row["priority"]:
+                    self.conn.execute("UPDATE jobs SET lane = ?, priority = ? WHERE id = ?",
+                                      (lane, LANES[lane], row["id"]))
+                count("contract_note_jobs_deduplicated_total", lane=lane)
+                return row["id"]
+            self.conn.execute("INSERT OR IGNORE INTO blobs (file_hash, data) VALUES (?, ?)", (file_hash, data))
+            if row is not None:
+                # Failed before: retry the same job from scratch
+                job_id = row["id"]
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', lane = ?, priority = ?, password = ?, attempts = 0, "
+                    "max_attempts = ?, next_run_at = ?, lease_until = NULL, started_at = NULL, "
+                    "finished_at = NULL, error = NULL WHERE id = ?",
+                    (lane, LANES[lane], password, max_attempts, now, job_id),
+                )
+            else:
+                job_id = uuid.uuid4().hex
+                self.conn.execute(
+                    "INSERT INTO jobs (id, dedup_key, file_hash, name, category, subcategory, password, lane, "
+                    "priority, status, max_attempts, next_run_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, dedup_key, file_hash, name, category, subcategory, password, lane, LANES[lane],
+                     max_attempts, now, now),
+                )
+        count("contract_note_jobs_submitted_total", lane=lane)
+        return job_id
+
+    def claim(self, lanes=None, lease=LEASE_SECONDS):
+        """
+        Atomically take the next ready job (highest-priority lane first,
+        then oldest) and mark it running. lanes limits which lanes may be
+        claimed. Returns the job row plus its PDF bytes as "data", or None.
+        """
+        lanes = list(lanes or LANES)
+        now = time.time()
+        placeholders = ",".join("?" * len(lanes))
+        with self.transaction():
+            row = self.conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND next_run_at <= ? AND lane IN ({placeholders}) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (now, *lanes),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, lease_until = ? "
+                "WHERE id = ?",
+                (now, now + lease, row["id"]),
+            )
+            blob = self.conn.execute("SELECT data FROM blobs WHERE file_hash = ?", (row["file_hash"],)).fetchone()
+        job = dict(row)
+        job["attempts"] += 1
+        job["data"] = blob["data"] if blob else None
+        return job
+
+    def complete(self, job_id, broker, records):
+        with self.transaction():
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', broker = ?, records = ?, error = NULL, password = NULL, "
+                "finished_at = ?, lease_until = NULL WHERE id = ?",
+                (broker, json.dumps(to_dicts(records), separators=(",", ":")), time.time(), job_id),
+            )
+            self._drop_blob(job_id)
+
+    def fail(self, job_id, error, transient=False):
+        """
+        Record a failed attempt. Transient failures are retried with
+        exponential backoff until max_attempts; anything else is final.
+        Returns the job's new status.
+        """
+        with self.transaction():
+            row = self.conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if transient and row["attempts"] < row["max_attempts"]:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, next_run_at = ?, lease_until = NULL WHERE id = ?",
+                    (error, time.time() + backoff_delay(row["attempts"]), job_id),
+                )
+                return "queued"
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, password = NULL, finished_at = ?, "
+                "lease_until = NULL WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+            self._drop_blob(job_id)
+            return "failed"
+
+    def _drop_blob(self, job_id):
+        # Keep the bytes while any other job on the same file still needs them
+        self.conn.execute(
+            "DELETE FROM blobs WHERE file_hash = (SELECT file_hash FROM jobs WHERE id = ?) "
+            "AND NOT EXISTS (SELECT 1 FROM jobs j WHERE j.file_hash = blobs.file_hash "
+            "AND j.status IN ('queued', 'running'))",
+            (job_id,),
+        )
+
+    def requeue_expired(self):
+        """Put running jobs whose lease ran out (crashed worker) back in the queue."""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', lease_until = NULL, next_run_at = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (time.time(), time.time()),
+        )
+        return cursor.rowcount
+
+    def get(self, job_id):
+        """Job status without the records: id, name, lane, status, attempts, broker, error, timings."""
+        row = self.conn.execute(
+            "SELECT id, name, lane, status, attempts, max_attempts, broker, error, created_at, started_at, "
+            "finished_at, next_run_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def result(self, job_id):
+        """(broker, records) for a finished job, None while it is still pending."""
+        row = self.conn.execute("SELECT status, broker, records, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        if row["status"] == "failed":
+            raise RuntimeError(f"Job {job_id} failed: {row['error']}")
+        if row["status"] != "done":
+            return None
+        return row["broker"], json.loads(row["records"])
+
+    def wait(self, job_id, timeout=None, poll_interval=0.25):
+        """Poll until the job is done or failed and return its status dict."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job["status"] in ("done", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def stats(self):
+        """Job counts per lane and status."""
+        counts = {}
+        for lane, status, n in self.conn.execute("SELECT lane, status, COUNT(*) FROM jobs GROUP BY lane, status"):
+            counts.setdefault(lane, {})[status] = n
+        return counts
+
+    def transaction(self):
+        return _Transaction(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent claimers never pick the same job."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _run_job(data, category, subcategory, password=None, cache_path=None):
+    """Worker entry point: (broker, records, metrics state). Exceptions propagate so they can be classified."""
+    with use_metrics(Metrics()) as metrics:
+        with span("job"):
+            if cache_path:
+                broker, records = cached_process_pdf(data, category, subcategory, get_cache(cache_path),
+                                                     password=password)
+            else:
+                # Transactions pickle back to the scheduler smaller than dicts; complete() converts them
+                broker, records = process_pdf(data, category, subcategory, password=password, as_dicts=False)
+    return broker, records, metrics.state()
+
+
+class JobRunner:
+    """
+    Drain a JobQueue with a process pool of `workers`. At most bulk_limit
+    workers take bulk jobs (default: all but one), so an interactive upload
+    always finds a free worker even in the middle of a large backfill.
+    """
+
+    def __init__(self, queue, workers=None, bulk_limit=None, cache_path=None, poll_interval=0.5,
+                 on_result=None):
+        self.queue = queue
+        self.workers = workers or os.cpu_count() or 1
+        self.bulk_limit = max(1, self.workers - 1) if bulk_limit is None else bulk_limit
+        self.cache_path = cache_path
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+
+    def run(self, until_idle=False):
+        """Process jobs until interrupted (or, with until_idle, until nothing is queued or running)."""
+        self.queue.requeue_expired()
+        running = {}  # future -> job
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                self._fill(pool, running)
+                if not running:
+                    if until_idle and not self._pending():
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job = running.pop(future)
+                    broken |= self._finish(job, future)
+                if broken:
+                    # A worker died; the pool is unusable and its other jobs are lost with it
+                    for future, job in running.items():
+                        self.queue.fail(job["id"], "worker pool restarted", transient=True)
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(max_workers=self.workers)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _pending(self):
+        row = self.queue.conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        return row[0]
+
+    def _fill(self, pool, running):
+        while len(running) < self.workers:
+            bulk_running = sum(1 for job in running.values() if job["lane"] == "bulk")
+            lanes = [lane for lane in LANES if lane != "bulk" or bulk_running < self.bulk_limit]
+            job = self.queue.claim(lanes)
+            if job is None:
+                return
+            if job["data"] is None:
+                self.queue.fail(job["id"], "uploaded PDF is missing from the queue")
+                continue
+            future = pool.submit(_run_job, job["data"], job["category"], job["subcategory"], job["password"],
+                                 self.cache_path)
+            job.pop("data")  # the worker has its copy; don't hold it here too
+            running[future] = job
+
+    def _finish(self, job, future):
+        """Record one finished attempt; True if the process pool broke."""
+        try:
+            broker, records, state = future.result()
+        except Exception as e:
+            transient = isinstance(e, TRANSIENT_ERRORS)
+            status = self.queue.fail(job["id"], f"{type(e).__name__}: {e}", transient=transient)
+            count("contract_note_jobs_total", lane=job["lane"], status="retry" if status == "queued" else "failed")
+            if self.on_result:
+                self.on_result(job, status, None)
+            return isinstance(e, BrokenProcessPool)
+        get_metrics().merge(state)
+        self.queue.complete(job["id"], broker, records)
+        count("contract_note_jobs_total", lane=job["lane"], status="done")
+        if self.on_result:
+            self.on_result(job, "done", records)
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLite-backed job queue for contract-note parsing.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, metavar="PATH", help="job database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="queue PDFs and print their job ids")
+    submit.add_argument("sources", nargs="+", help="PDF files, directories or glob patterns")
+    submit.add_argument("--category", default="Equity")
+    submit.add_argument("--subcategory", default="Mutual Fund")
+    submit.add_argument("--lane", default="bulk", choices=list(LANES))
+    submit.add_argument("--password", default=None)
+
+    work = commands.add_parser("work", help="run workers against the queue")
+    work.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    work.add_argument("--bulk-limit", type=int, default=None,
+                      help="max workers on bulk jobs (default: workers - 1)")
+    work.add_argument("--cache", default=None, metavar="PATH", help="SQLite result cache to reuse parsed notes")
+    work.add_argument("--until-idle", action="store_true", help="exit once the queue is empty")
+
+    status = commands.add_parser("status", help="show a job")
+    status.add_argument("job_id")
+    status.add_argument("--wait", type=float, default=None, metavar="SECONDS", help="poll until finished")
+
+    result = commands.add_parser("result", help="print a finished job's records as JSON Lines")
+    result.add_argument("job_id")
+
+    commands.add_parser("stats", help="job counts per lane and status")
+    args = parser.parse_args(argv)
+    configure_logging("WARNING")
+
+    from batch import collect_pdf_paths  # only the CLI needs path expansion
+
+    with JobQueue(args.queue) as queue:
+        if args.command == "submit":
+            for path in collect_pdf_paths(args.sources):
+                print(queue.submit(path, args.category, args.subcategory, lane=args.lane,
+                                   password=args.password), path)
+        elif args.command == "work":
+            def report(job, status, records):
+                detail = f"{len(records)} records" if records is not None else "see status"
+                print(f"{status.upper():<7} {job['id']} {job['name'] or ''} [{job['lane']}] ({detail})", flush=True)
+
+            runner = JobRunner(queue, workers=args.workers, bulk_limit=args.bulk_limit, cache_path=args.cache,
+                               on_result=report)
+            try:
+                runner.run(until_idle=args.until_idle)
+            except KeyboardInterrupt:
+                pass
+        elif args.command == "status":
+            job = queue.wait(args.job_id, timeout=args.wait) if args.wait else queue.get(args.job_id)
+            if job is None:
+                print(f"No such job: {args.job_id}", file=sys.stderr)
+                return 1
+            print(json.dumps(job, indent=2))
+        elif args.command == "result":
+            finished = queue.result(args.job_id)
+            if finished is None:
+                print(f"Job {args.job_id} has not finished yet", file=sys.stderr)
+                return 1
+            for record in finished[1]:
+                print(json.dumps(record, ensure_ascii=False))
+        else:
+            print(json.dumps(queue.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import json
+import logging
+import sys
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message plus any extra={...} fields."""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level="WARNING", json_format=False, stream=None):
+    """
+    Set up the root logger once for scripts and services. Library modules
+    only call logging.getLogger(__name__) and pass arguments lazily
+    (logger.debug("tables: %s", tables)), so debug dumps are never
+    formatted unless DEBUG is enabled.
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    # pdfminer is very chatty at DEBUG and is never what we are debugging
+    logging.getLogger("pdfminer").setLevel(max(root.level, logging.WARNING))
+    return root
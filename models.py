@@ -0,0 +1,172 @@
+try:
+    import pyarrow
+except ImportError:  # optional columnar export
+    pyarrow = None
+
+
+class Entity:
+    """
+    One fund scheme / security. Builders share a single Entity between all
+    rows for the same scheme, so a batch holds one per scheme, not per row.
+    """
+
+    __slots__ = ("scrip_name", "scrip_code", "benchmark", "category", "subcategory", "nickname", "isin")
+
+    # (JSON key, attribute) in the order the entityTable has always been emitted
+    JSON_FIELDS = (("scrip_name", "scrip_name"), ("scrip_code", "scrip_code"), ("benchmark", "benchmark"),
+                   ("category", "category"), ("subcategory", "subcategory"), ("nickname", "nickname"),
+                   ("isin", "isin"))
+
+    def __init__(self, scrip_name, scrip_code, isin, category, subcategory, benchmark="0", nickname=None):
+        self.scrip_name = scrip_name
+        self.scrip_code = scrip_code
+        self.isin = isin
+        self.category = category
+        self.subcategory = subcategory
+        self.benchmark = benchmark
+        self.nickname = scrip_name if nickname is None else nickname
+
+    def to_dict(self):
+        return {key: getattr(self, attr) for key, attr in self.JSON_FIELDS}
+
+    def __eq__(self, other):
+        return type(other) is type(self) and all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.isin)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.isin!r}, {self.scrip_name!r})"
+
+
+class MotilalEntity(Entity):
+    """Motilal Oswal notes have always used scripname/scripcode in their entityTable."""
+
+    __slots__ = ()
+
+    JSON_FIELDS = (("scripname", "scrip_name"), ("scripcode", "scrip_code")) + Entity.JSON_FIELDS[2:]
+
+
+class Transaction:
+    """
+    One contract-note row. scrip_code, scrip_name and isin come from the
+    shared entity; to_dict() gives the {"entityTable", "actionTable"} shape
+    at the output edge. contract_note_no is only emitted when not None.
+    """
+
+    __slots__ = ("entity", "mode", "order_type", "order_number", "folio_number", "nav", "stt", "unit",
+                 "redeem_amount", "purchase_amount", "net_amount", "order_date", "stamp_duty", "page_number",
+                 "contract_note_no")
+
+    def __init__(self, entity, mode, order_type, order_number, folio_number, nav, stt, unit, redeem_amount,
+                 purchase_amount, net_amount, order_date, stamp_duty, page_number, contract_note_no=None):
+        self.entity = entity
+        self.mode = mode
+        self.order_type = order_type
+        self.order_number = order_number
+        self.folio_number = folio_number
+        self.nav = nav
+        self.stt = stt
+        self.unit = unit
+        self.redeem_amount = redeem_amount
+        self.purchase_amount = purchase_amount
+        self.net_amount = net_amount
+        self.order_date = order_date
+        self.stamp_duty = stamp_duty
+        self.page_number = page_number
+        self.contract_note_no = contract_note_no
+
+    @property
+    def isin(self):
+        return self.entity.isin
+
+    @property
+    def scrip_name(self):
+        return self.entity.scrip_name
+
+    @property
+    def scrip_code(self):
+        return self.entity.scrip_code
+
+    def action_dict(self):
+        entity = self.entity
+        action = {
+            "scrip_code": entity.scrip_code,
+            "mode": self.mode,
+            "order_type": self.order_type,
+            "scrip_name": entity.scrip_name,
+            "isin": entity.isin,
+            "order_number": self.order_number,
+            "folio_number": self.folio_number,
+            "nav": self.nav,
+            "stt": self.stt,
+            "unit": self.unit,
+            "redeem_amount": self.redeem_amount,
+            "purchase_amount": self.purchase_amount,
+            "net_amount": self.net_amount,
+            "order_date": self.order_date,
+            "stamp_duty": self.stamp_duty,
+            "page_number": self.page_number,
+        }
+        if self.contract_note_no is not None:
+            action["contract_note_no"] = self.contract_note_no
+        return action
+
+    def to_dict(self):
+        return {"entityTable": self.entity.to_dict(), "actionTable": self.action_dict()}
+
+    def __repr__(self):
+        return f"Transaction({self.entity.isin!r}, {self.order_type!r}, order={self.order_number!r})"
+
+
+class EntityCache:
+    """Hands out one shared Entity per distinct (scrip_name, scrip_code, isin) within a builder call."""
+
+    def __init__(self, category, subcategory, entity_type=Entity):
+        self.category = category
+        self.subcategory = subcategory
+        self.entity_type = entity_type
+        self.entities = {}
+
+    def get(self, scrip_name, scrip_code, isin):
+        key = (scrip_name, scrip_code, isin)
+        entity = self.entities.get(key)
+        if entity is None:
+            entity = self.entities[key] = self.entity_type(scrip_name, scrip_code, isin, self.category,
+                                                           self.subcategory)
+        return entity
+
+
+def to_dicts(transactions):
+    """Transactions -> the JSON records every consumer reads (records that already are dicts pass through)."""
+    return [t.to_dict() if isinstance(t, Transaction) else t for t in transactions]
+
+
+COLUMNS = ("isin", "scrip_name", "scrip_code", "category", "subcategory", "benchmark", "nickname", "mode",
+           "order_type", "order_number", "folio_number", "nav", "stt", "unit", "redeem_amount", "purchase_amount",
+           "net_amount", "order_date", "stamp_duty", "page_number", "contract_note_no")
+ENTITY_COLUMNS = frozenset(Entity.__slots__)
+
+
+def to_columns(transactions):
+    """Flatten transactions (entity fields included) into {column: list}."""
+    columns = {name: [] for name in COLUMNS}
+    appends = [(columns[name].append, name in ENTITY_COLUMNS, name) for name in COLUMNS]
+    for t in transactions:
+        entity = t.entity
+        for append, on_entity, name in appends:
+            append(getattr(entity if on_entity else t, name))
+    return columns
+
+
+def to_pandas(transactions):
+    import pandas as pd
+
+    return pd.DataFrame(to_columns(transactions), columns=list(COLUMNS))
+
+
+def to_arrow(transactions):
+    """pyarrow.Table with one column per field (requires pyarrow)."""
+    if pyarrow is None:
+        raise ValueError("to_arrow requires pyarrow, which is not installed")
+    return pyarrow.table(to_columns(transactions))
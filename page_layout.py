@@ -0,0 +1,135 @@
+class PageLayout:
+    """
+    One pdfplumber page analysed once. The pdfminer layout pass (chars,
+    lines, rects, curves) runs when the snapshot is taken; the text map
+    behind text and search() and the ruling edges are derived from it on
+    first use, and table extraction crops the same objects instead of
+    re-parsing the page. close() releases all of it, so only the page
+    being worked on is ever held in memory.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.objects = page.objects  # the one layout pass for this page
+        self._text = None
+        self._horizontal_edges = None
+
+    @property
+    def chars(self):
+        return self.objects.get("char", [])
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.page.extract_text() or ""
+        return self._text
+
+    def search(self, pattern):
+        """Case-insensitive regex hits, from the text map text already built."""
+        return self.page.search(pattern, regex=True, case=False)
+
+    @property
+    def horizontal_edges(self):
+        if self._horizontal_edges is None:
+            self._horizontal_edges = [edge["top"] for edge in self.page.horizontal_edges]
+        return self._horizontal_edges
+
+    def extract_tables(self, profile=None):
+        """
+        extract_tables() limited to the broker's transaction band, so
+        pdfplumber only runs its line/intersection analysis over that region.
+        Profile keys (all optional):
+          crop            (x0, top, x1, bottom) as fractions of the page size
+          stop_at         regex for the first row after the transactions
+                          (totals, GST); the band ends at the ruling line above it
+          table_settings  passed through to extract_tables, e.g.
+                          {"vertical_strategy": "text"} or explicit column lines
+        """
+        profile = profile or {}
+        page = region = self.page
+        crop, stop_at = profile.get("crop"), profile.get("stop_at")
+        if crop or stop_at:
+            x0, top, x1, bottom = crop or (0, 0, 1, 1)
+            px0, ptop, px1, pbottom = page.bbox
+            bbox = [px0 + x0 * page.width, ptop + top * page.height,
+                    px0 + x1 * page.width, ptop + bottom * page.height]
+            if stop_at:
+                stops = [hit["top"] for hit in self.search(stop_at) if bbox[1] <= hit["top"] <= bbox[3]]
+                if stops:
+                    stop_top = min(stops)
+                    rules = [top for top in self.horizontal_edges if bbox[1] <= top <= stop_top]
+                    bbox[3] = min(bbox[3], (max(rules) if rules else stop_top) + 1)
+            region = page.crop(bbox)
+        return region.extract_tables(profile.get("table_settings"))
+
+    def close(self):
+        self.page.close()
+        self.objects = self._text = self._horizontal_edges = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TextPageLayout:
+    """
+    PageLayout's interface over text from a faster engine (e.g. pdfium),
+    for notes whose transactions are one line each. extract_tables() builds
+    rows with the profile's text_rows grammar and only falls back to a
+    pdfplumber PageLayout when a page has transaction lines the grammar
+    doesn't account for (or none at all), so that layout pass is skipped
+    whenever the text is enough. text_rows keys:
+      hint    regex marking a line as a transaction line
+      row     regex matching a whole transaction line, one group per cell
+      header  the header row placed above the parsed rows
+    """
+
+    def __init__(self, page, text):
+        self.page = page  # the pdfplumber page, only analysed on fallback
+        self._text = text
+        self._fallback = None
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def layout(self):
+        if self._fallback is None:
+            self._fallback = PageLayout(self.page)
+        return self._fallback
+
+    def extract_text_rows(self, grammar):
+        """Rows parsed from the text, or None if any transaction line doesn't parse."""
+        hint, row = grammar["hint"], grammar["row"]
+        rows = []
+        for line in self._text.splitlines():
+            if not hint.search(line):
+                continue
+            match = row.match(line.strip())
+            if match is None:
+                return None
+            rows.append(list(match.groups()))
+        return rows or None
+
+    def extract_tables(self, profile=None):
+        grammar = (profile or {}).get("text_rows")
+        rows = self.extract_text_rows(grammar) if grammar else None
+        if rows is None:
+            return self.layout.extract_tables(profile)
+        return [[list(grammar["header"])] + rows]
+
+    def close(self):
+        if self._fallback is not None:
+            self._fallback.close()
+        else:
+            self.page.close()
+        self._text = self._fallback = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
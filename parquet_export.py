@@ -0,0 +1,226 @@
+import argparse
+import os
+import re
+import sys
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.fs
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional analytics export
+    pyarrow = None
+
+from entity_registry import FIELD_ALIASES
+from models import Transaction
+from record_writer import read_jsonl
+
+DEFAULT_EXPORT_DIR = "exports"
+# Rows buffered before part files are written, so partitions hold a few large
+# files rather than one tiny file per contract note
+DEFAULT_FLUSH_ROWS = 100_000
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Contract notes print dates either way round; Indian notes are day-first
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%b %d %Y", "%d %b %Y", "%d-%b-%Y", "%Y-%m-%d")
+
+STRING_COLUMNS = ("broker", "isin", "scrip_name", "scrip_code", "category", "subcategory", "mode", "order_type",
+                  "order_number", "folio_number", "contract_note_no", "source")
+FLOAT_COLUMNS = ("nav", "stt", "unit", "redeem_amount", "purchase_amount", "net_amount", "stamp_duty")
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ValueError("Columnar export requires pyarrow, which is not installed")
+
+
+def transaction_schema():
+    _require_pyarrow()
+    fields = [pyarrow.field(name, pyarrow.string()) for name in STRING_COLUMNS]
+    fields += [pyarrow.field(name, pyarrow.float64()) for name in FLOAT_COLUMNS]
+    fields += [pyarrow.field("order_date", pyarrow.date32()), pyarrow.field("page_number", pyarrow.int32())]
+    return pyarrow.schema(fields)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    """'11/04/2025' (day first), 'Jul 11 2025', ... -> date, None when unparseable."""
+    text = str(value or "").strip()
+    if not text or text == "Unknown":
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def partition_key(text):
+    """Filesystem-safe partition value: 'Phillip Capital (India) Pvt Ltd' -> 'phillip_capital_india_pvt_ltd'."""
+    return re.sub(r"[^a-z0-9]+", "_", str(text or "unknown").lower()).strip("_") or "unknown"
+
+
+def records_to_columns(records, broker=None, source=None):
+    """Builder records (dicts or Transactions) -> typed {column: list} in transaction_schema() order."""
+    columns = {name: [] for name in STRING_COLUMNS + FLOAT_COLUMNS + ("order_date", "page_number")}
+    for record in records:
+        if isinstance(record, Transaction):
+            record = record.to_dict()
+        entity = record.get("entityTable") or {}
+        action = record.get("actionTable") or {}
+        for name in STRING_COLUMNS:
+            if name == "broker":
+                value = action.get("broker") or broker
+            elif name == "source":
+                value = source
+            elif name in ("category", "subcategory"):
+                value = entity.get(name)
+            else:
+                value = action.get(name)
+                if value is None:
+                    value = next((entity[a] for a in FIELD_ALIASES.get(name, ()) if entity.get(a) is not None),
+                                 None)
+            columns[name].append(None if value is None else str(value))
+        for name in FLOAT_COLUMNS:
+            columns[name].append(_float(action.get(name)))
+        columns["order_date"].append(parse_date(action.get("order_date")))
+        columns["page_number"].append(_int(action.get("page_number")))
+    return columns
+
+
+class ColumnarExporter:
+    """
+    Append parsed transactions to a hive-partitioned dataset:
+        root/broker_key=<broker>/contract_month=<YYYY-MM>/part-<id>.parquet|.arrow
+    write() buffers rows; every flush (each flush_rows rows, and on close())
+    adds new part files per partition, so batches can be exported as they
+    finish without rewriting anything. "arrow" writes uncompressed Arrow IPC
+    files, which read back memory-mapped; "parquet" is smaller on disk.
+    """
+
+    def __init__(self, root=DEFAULT_EXPORT_DIR, format="parquet", compression="zstd", flush_rows=DEFAULT_FLUSH_ROWS):
+        _require_pyarrow()
+        if format not in FORMATS:
+            raise ValueError(f"Unknown export format: {format} (expected one of {', '.join(FORMATS)})")
+        self.root = root
+        self.format = format
+        self.compression = compression
+        self.schema = transaction_schema()
+        self.flush_rows = flush_rows
+        self.pending = {name: [] for name in self.schema.names}
+        self.files_written = 0
+        self.rows_written = 0
+
+    def write(self, records, broker=None, source=None):
+        """Buffer records for export; returns the part files written if this filled the buffer."""
+        columns = records_to_columns(records, broker=broker, source=source)
+        for name, values in columns.items():
+            self.pending[name].extend(values)
+        if len(self.pending["isin"]) >= self.flush_rows:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """Write the buffered rows as one part file per (broker, month); returns the paths."""
+        columns, self.pending = self.pending, {name: [] for name in self.schema.names}
+        if not columns["isin"]:
+            return []
+        table = pyarrow.table(columns, schema=self.schema)
+        months = [d.strftime("%Y-%m") if d else "unknown" for d in columns["order_date"]]
+        brokers = [partition_key(b) for b in columns["broker"]]
+        groups = {}
+        for i, key in enumerate(zip(brokers, months)):
+            groups.setdefault(key, []).append(i)
+        paths = []
+        for (broker_key, month), rows in sorted(groups.items()):
+            part = table.take(rows) if len(rows) != table.num_rows else table
+            directory = os.path.join(self.root, f"broker_key={broker_key}", f"contract_month={month}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{uuid.uuid4().hex}{FORMATS[self.format]}")
+            self._write_file(part, path)
+            paths.append(path)
+            self.rows_written += part.num_rows
+        self.files_written += len(paths)
+        return paths
+
+    def _write_file(self, table, path):
+        # Write to a hidden temp name and rename, so readers never see half a part
+        # file (dataset discovery skips names starting with ".")
+        directory, name = os.path.split(path)
+        tmp = os.path.join(directory, f".{name}.tmp")
+        if self.format == "parquet":
+            pyarrow.parquet.write_table(table, tmp, compression=self.compression)
+        else:
+            with pyarrow.OSFile(tmp, "wb") as sink, pyarrow.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+    def close(self):
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_dataset(root=DEFAULT_EXPORT_DIR, format="parquet"):
+    """The export as a pyarrow Dataset (one format per root); Arrow IPC parts are memory-mapped."""
+    _require_pyarrow()
+    return pyarrow.dataset.dataset(
+        root, format="ipc" if format == "arrow" else "parquet", partitioning="hive",
+        filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_month(month, root=DEFAULT_EXPORT_DIR, format="parquet", columns=None, broker=None):
+    """
+    One contract month ("2025-04") as a pyarrow Table. Only that month's
+    partition directories are opened and only the requested columns read.
+    """
+    dataset = open_dataset(root, format)
+    condition = pyarrow.dataset.field("contract_month") == month
+    if broker is not None:
+        condition &= pyarrow.dataset.field("broker_key") == partition_key(broker)
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export parsed contract-note records to partitioned Parquet/Arrow.")
+    parser.add_argument("inputs", nargs="+", help="JSON Lines files written by test5/batch --output")
+    parser.add_argument("--root", default=DEFAULT_EXPORT_DIR, metavar="DIR")
+    parser.add_argument("--format", default="parquet", choices=list(FORMATS))
+    parser.add_argument("--broker", default=None, help="broker for records that don't carry one")
+    args = parser.parse_args(argv)
+
+    with ColumnarExporter(args.root, format=args.format) as exporter:
+        for path in args.inputs:
+            exporter.write(read_jsonl(path), broker=args.broker, source=os.path.basename(path))
+    print(f"{exporter.rows_written} rows in {exporter.files_written} part files under {args.root}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import logging
+import re
+from datetime import date, datetime
+
+from pdfminer.pdfdocument import PDFDocument, PDFPasswordIncorrect
+from pdfminer.pdfparser import PDFParser
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:  # candidates are then checked through pdfminer
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+DOB_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d%m%Y", "%d.%m.%Y")
+_NAME_JUNK_RE = re.compile(r"[^A-Za-z]")
+
+# The passwords Indian brokers and RTAs derive from client details, in the
+# order they are most often used. Each rule gets (pan, dob, name) with pan
+# upper-cased, dob a date and name letters-only; rules whose inputs are
+# missing are skipped.
+PASSWORD_RULES = {
+    "pan": lambda pan, dob, name: pan,
+    "pan_lower": lambda pan, dob, name: pan.lower(),
+    "dob_ddmmyyyy": lambda pan, dob, name: dob.strftime("%d%m%Y"),
+    "dob_ddmmyy": lambda pan, dob, name: dob.strftime("%d%m%y"),
+    "pan_dob": lambda pan, dob, name: pan + dob.strftime("%d%m%Y"),
+    "pan_lower_dob": lambda pan, dob, name: pan.lower() + dob.strftime("%d%m%Y"),
+    "name4_ddmm": lambda pan, dob, name: name[:4].upper() + dob.strftime("%d%m"),
+    "name4_lower_ddmm": lambda pan, dob, name: name[:4].lower() + dob.strftime("%d%m"),
+    "pan5_ddmm": lambda pan, dob, name: pan[:5].lower() + dob.strftime("%d%m"),
+}
+
+# Winning passwords per (broker, client), for this process. Only notes whose
+# client is known are cached: without one, a password that opened one
+# client's note would be tried first on everybody else's.
+_resolved = {}
+
+
+def parse_dob(value):
+    if value is None or isinstance(value, date):
+        return value
+    for fmt in DOB_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date of birth: {value!r}")
+
+
+class PasswordCandidates:
+    """
+    Everything we know that might open one client's encrypted notes:
+    explicit passwords plus the PAN/DOB/name rules in PASSWORD_RULES
+    (all of them unless rules names a subset). Pass it wherever a
+    password goes; open_pdf then checks the candidates against the
+    encryption dictionary instead of prompting, and opens the document
+    once with the winner. When the client is known (client or pan),
+    passwords that worked before for them (with this broker first) are
+    tried first.
+    """
+
+    def __init__(self, client=None, pan=None, dob=None, name=None, passwords=(), rules=None, broker=None):
+        self.pan = pan.strip().upper() if pan else None
+        self.client = client or self.pan
+        self.dob = parse_dob(dob)
+        self.name = _NAME_JUNK_RE.sub("", name) if name else None
+        self.passwords = [passwords] if isinstance(passwords, str) else list(passwords)
+        self.rules = list(rules) if rules is not None else list(PASSWORD_RULES)
+        self.broker = broker
+        self.resolved = None
+
+    def derived(self):
+        for rule in self.rules:
+            try:
+                value = PASSWORD_RULES[rule](self.pan, self.dob, self.name)
+            except (TypeError, AttributeError):
+                continue  # the rule needs a field this client doesn't have
+            if value:
+                yield value
+
+    def __iter__(self):
+        seen = set()
+        cached = []
+        if self.client is not None:
+            cached.append(_resolved.get((self.broker, self.client)))
+            cached += [password for (_, client), password in _resolved.items() if client == self.client]
+        for password in (*cached, *self.passwords, *self.derived()):
+            if password and password not in seen:
+                seen.add(password)
+                yield password
+
+    def remember(self, broker):
+        """Cache the password that opened this client's note under the detected broker."""
+        self.broker = broker
+        if self.resolved is not None and self.client is not None:
+            _resolved[(broker, self.client)] = self.resolved
+
+
+def _probe_pypdf2(buffer, candidates):
+    reader = PdfReader(buffer)  # reads the xref and trailer, no page is parsed
+    for password in candidates:
+        if reader.decrypt(password):
+            return password
+    return None
+
+
+class _EncryptionProbe(PDFDocument):
+    """A PDFDocument that reads the xref and trailer once and checks passwords on demand."""
+
+    def _initialize_password(self, password=""):
+        pass  # deferred to check_password
+
+    def check_password(self, password):
+        if self.encryption is None:
+            return True
+        try:
+            PDFDocument._initialize_password(self, password)
+        except PDFPasswordIncorrect:
+            return False
+        return True
+
+
+def _probe_pdfminer(buffer, candidates):
+    buffer.seek(0)
+    probe = _EncryptionProbe(PDFParser(buffer))
+    for password in candidates:
+        if probe.check_password(password):
+            return password
+    return None
+
+
+def resolve_password(buffer, candidates):
+    """
+    Find which candidate opens an encrypted PDF, checking each one
+    against the /Encrypt dictionary (key derivation only). buffer is the
+    in-memory PDF from load_pdf_buffer; its position is restored.
+    """
+    pos = buffer.tell()
+    try:
+        password = None
+        if PdfReader is not None:
+            try:
+                password = _probe_pypdf2(buffer, candidates)
+            except Exception as e:
+                # e.g. AES-256 without PyPDF2's crypto dependency
+                logger.debug("PyPDF2 password probe failed (%s), trying pdfminer", e)
+                password = _probe_pdfminer(buffer, candidates)
+        else:
+            password = _probe_pdfminer(buffer, candidates)
+    finally:
+        buffer.seek(pos)
+    if password is None:
+        raise ValueError("❌ PDF is password protected and none of the candidate passwords match.")
+    candidates.resolved = password
+    if candidates.client is not None and candidates.broker is not None:
+        _resolved[(candidates.broker, candidates.client)] = password
+    return password
+
+
+def password_or_candidates(password=None, pan=None, dob=None, name=None):
+    """What CLIs pass on as password: the plain password, or candidates when client details are given."""
+    if not (pan or dob or name):
+        return password
+    return PasswordCandidates(pan=pan, dob=dob, name=name, passwords=[password] if password else ())
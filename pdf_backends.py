@@ -0,0 +1,119 @@
+import io
+import os
+from pathlib import Path
+
+from page_layout import PageLayout, TextPageLayout
+
+try:
+    import pypdfium2
+except ImportError:  # only the pdfplumber backend is available
+    pypdfium2 = None
+
+DEFAULT_BACKEND = "pdfplumber"
+
+
+class ExtractionBackend:
+    """
+    How page text and tables are pulled out of an open pdfplumber PDF.
+    layout(page_num, page) returns the PageLayout-like object (text,
+    extract_tables(profile), close()) for one page; page_text(page_num)
+    is just the text, used to sniff the broker before a backend is chosen.
+    """
+
+    name = None
+
+    def __init__(self, pdf, source=None):
+        self.pdf = pdf
+
+    def layout(self, page_num, page):
+        raise NotImplementedError
+
+    def page_text(self, page_num):
+        with self.layout(page_num, self.pdf.pages[page_num - 1]) as layout:
+            return layout.text
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """Full pdfminer layout analysis per page: ruled tables, any broker."""
+
+    name = "pdfplumber"
+
+    def layout(self, page_num, page):
+        return PageLayout(page)
+
+
+def _pdfium_input(source, stream):
+    # pdfium opens paths itself and can't read an mmap, so anything that
+    # isn't a path or bytes is handed over as a copy of its bytes
+    if isinstance(source, (str, os.PathLike)):
+        return Path(source)
+    if isinstance(source, bytes):
+        return source
+    if isinstance(stream, io.BytesIO):
+        return stream.getvalue()
+    pos = stream.tell()
+    stream.seek(0)
+    data = stream.read()
+    stream.seek(pos)
+    return data
+
+
+class PdfiumBackend(ExtractionBackend):
+    """
+    Page text from pdfium: no layout analysis, many times faster than
+    pdfplumber. Tables come from the broker profile's text_rows grammar
+    (see TextPageLayout), with pdfplumber as the per-page fallback.
+    """
+
+    name = "pypdfium2"
+
+    def __init__(self, pdf, source=None):
+        if pypdfium2 is None:
+            raise RuntimeError("The pypdfium2 backend needs the pypdfium2 package")
+        super().__init__(pdf, source)
+        self.doc = pypdfium2.PdfDocument(_pdfium_input(source, pdf.stream), password=pdf.password or None)
+        self._last_text = (None, None)  # page one is read twice when it was used to pick the backend
+
+    def page_text(self, page_num):
+        if self._last_text[0] == page_num:
+            return self._last_text[1]
+        page = self.doc[page_num - 1]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+        self._last_text = (page_num, text)
+        return text
+
+    def layout(self, page_num, page):
+        return TextPageLayout(page, self.page_text(page_num))
+
+    def close(self):
+        self.doc.close()
+
+
+BACKENDS = {backend.name: backend for backend in (PdfplumberBackend, PdfiumBackend)}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != PdfiumBackend.name or pypdfium2 is not None]
+
+
+def open_backend(name, pdf, source=None):
+    """A backend over an already opened pdfplumber PDF (which keeps ownership of the file)."""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extraction backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return backend(pdf, source)
@@ -0,0 +1,202 @@
+import argparse
+import sqlite3
+import sys
+import time
+
+from entity_registry import ENTITY_FIELDS, FIELD_ALIASES, EntityRegistry
+from models import Transaction
+from record_writer import read_jsonl
+
+DEFAULT_DB_PATH = "contract_notes.sqlite"
+DEFAULT_BATCH_SIZE = 5000
+
+ENTITY_COLUMNS = list(ENTITY_FIELDS)
+ACTION_COLUMNS = ["order_number", "isin", "scrip_code", "scrip_name", "mode", "order_type", "folio_number", "nav",
+                  "stt", "unit", "redeem_amount", "purchase_amount", "net_amount", "stamp_duty", "order_date",
+                  "page_number", "contract_note_no", "broker"]
+ENTITY_KEY = ("isin",)
+ACTION_KEY = ("order_number", "isin")
+NUMERIC_COLUMNS = {"nav", "stt", "unit", "redeem_amount", "purchase_amount", "net_amount", "stamp_duty"}
+
+
+def _column_type(name):
+    if name in NUMERIC_COLUMNS:
+        return "DOUBLE PRECISION"
+    if name == "page_number":
+        return "INTEGER"
+    return "TEXT"
+
+
+def _create_table_sql(table, columns, key):
+    body = ", ".join(f"{c} {_column_type(c)}" + (" NOT NULL" if c in key else "") for c in columns)
+    return f"CREATE TABLE IF NOT EXISTS {table} ({body}, PRIMARY KEY ({', '.join(key)}))"
+
+
+def _placeholder(paramstyle):
+    if paramstyle == "qmark":
+        return "?"
+    if paramstyle in ("format", "pyformat"):
+        return "%s"
+    raise ValueError(f"Unsupported DB-API paramstyle: {paramstyle}")
+
+
+def _upsert_sql(table, columns, key, paramstyle):
+    """INSERT ... ON CONFLICT (key) DO UPDATE, valid for both SQLite (3.24+) and PostgreSQL."""
+    values = ", ".join([_placeholder(paramstyle)] * len(columns))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) "
+            f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+
+
+def entity_row(entity):
+    """entityTable dict -> tuple in ENTITY_COLUMNS order, whichever builder made it."""
+    row = []
+    for column in ENTITY_COLUMNS:
+        value = None
+        for name in FIELD_ALIASES.get(column, (column,)):
+            value = entity.get(name)
+            if value is not None:
+                break
+        row.append(value)
+    return tuple(row)
+
+
+def action_row(action, broker=None):
+    row = [action.get(column) for column in ACTION_COLUMNS]
+    if row[-1] is None:
+        row[-1] = broker
+    return tuple(row)
+
+
+class RecordSink:
+    """
+    Batched writer for builder output ({"entityTable", "actionTable"} dicts).
+    Entities are upserted by ISIN, actions by (order_number, isin). Rows are
+    deduplicated in memory and written with one executemany per table per
+    batch, in one transaction, so a batch costs two round trips.
+    conn is any DB-API connection; paramstyle is its module's
+    (sqlite3: "qmark", psycopg: "format").
+    With an EntityRegistry, entities are normalised and each ISIN is only
+    upserted again when the registry learns something new about it, so
+    entity writes scale with unique ISINs rather than rows.
+    """
+
+    def __init__(self, conn, paramstyle="qmark", batch_size=DEFAULT_BATCH_SIZE, create=True, registry=None):
+        self.conn = conn
+        self.registry = registry
+        self.upserted_isins = set()
+        self.batch_size = batch_size
+        self.entity_sql = _upsert_sql("entities", ENTITY_COLUMNS, ENTITY_KEY, paramstyle)
+        self.action_sql = _upsert_sql("actions", ACTION_COLUMNS, ACTION_KEY, paramstyle)
+        self.entities = {}  # isin -> row, last one wins within a batch
+        self.actions = {}  # (order_number, isin) -> row
+        self.written_entities = 0
+        self.written_actions = 0
+        self.skipped = 0
+        if create:
+            self.create_schema()
+
+    def create_schema(self):
+        cursor = self.conn.cursor()
+        cursor.execute(_create_table_sql("entities", ENTITY_COLUMNS, ENTITY_KEY))
+        cursor.execute(_create_table_sql("actions", ACTION_COLUMNS, ACTION_KEY))
+        self.conn.commit()
+
+    def write(self, record, broker=None):
+        if isinstance(record, Transaction):
+            record = record.to_dict()
+        if self.registry is not None:
+            self._write_registered(record, broker)
+            return
+        entity = entity_row(record.get("entityTable") or {})
+        action = action_row(record.get("actionTable") or {}, broker)
+        isin = entity[0] or action[1]
+        if not isin or not action[0]:
+            # Totals/header rows some builders emit have no ISIN or order number
+            self.skipped += 1
+            return
+        self.entities[isin] = entity if entity[0] else (isin,) + entity[1:]
+        self.actions[(action[0], isin)] = action[:1] + (isin,) + action[2:]
+        if len(self.actions) >= self.batch_size:
+            self.flush()
+
+    def _write_registered(self, record, broker):
+        isin, changed = self.registry.intern(record.get("entityTable") or {})
+        action = action_row(record.get("actionTable") or {}, broker)
+        if not isin or not action[0]:
+            self.skipped += 1
+            return
+        if changed or isin not in self.upserted_isins:
+            entity = self.registry.entities[isin]
+            self.entities[isin] = tuple(entity[column] for column in ENTITY_COLUMNS)
+            self.upserted_isins.add(isin)
+        self.actions[(action[0], isin)] = action[:1] + (isin,) + action[2:]
+        if len(self.actions) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records, broker=None):
+        for record in records:
+            self.write(record, broker)
+
+    def flush(self):
+        if not self.actions and not self.entities:
+            return
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.entity_sql, list(self.entities.values()))
+            cursor.executemany(self.action_sql, list(self.actions.values()))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.written_entities += len(self.entities)
+        self.written_actions += len(self.actions)
+        self.entities.clear()
+        self.actions.clear()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.flush()
+
+
+def connect_sqlite(path=DEFAULT_DB_PATH):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load parsed contract-note records (JSON Lines) into SQLite.")
+    parser.add_argument("inputs", nargs="+", help="JSON Lines files written by test5/batch --output")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, metavar="PATH")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--broker", default=None, help="broker to record on actions that don't carry one")
+    parser.add_argument("--entities", default=None, metavar="PATH",
+                        help="entity registry snapshot to normalise entities with (updated in place)")
+    args = parser.parse_args(argv)
+
+    registry = EntityRegistry.load(args.entities) if args.entities else None
+    conn = connect_sqlite(args.db)
+    start = time.perf_counter()
+    with RecordSink(conn, batch_size=args.batch_size, registry=registry) as sink:
+        for path in args.inputs:
+            sink.write_many(read_jsonl(path), broker=args.broker)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    if registry is not None:
+        registry.save(args.entities)
+    total = sink.written_actions
+    print(f"{total} actions, {sink.written_entities} entity upserts, {sink.skipped} skipped rows "
+          f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
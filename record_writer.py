@@ -0,0 +1,90 @@
+import json
+import sys
+from functools import partial
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+
+def _to_json(obj):
+    # Builders' Transaction objects become JSON records only here, at the output edge
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def _dumps_json(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_to_json).encode("utf-8")
+
+
+def get_serializer(backend="auto"):
+    """
+    Record -> bytes for one JSON line. "auto" uses orjson when it is
+    installed and falls back to the standard library. Records may be
+    dicts or anything with to_dict() (e.g. models.Transaction), at any
+    depth.
+    """
+    if backend == "orjson" or (backend == "auto" and orjson is not None):
+        if orjson is None:
+            raise ValueError("orjson backend requested but orjson is not installed")
+        return partial(orjson.dumps, default=_to_json)
+    if backend in ("json", "auto"):
+        return _dumps_json
+    raise ValueError(f"Unknown serializer backend: {backend}")
+
+
+class JsonlWriter:
+    """
+    Write one JSON object per line to a file path, "-" (stdout) or a
+    binary file object, as records arrive. Nothing is kept in memory
+    beyond the file buffer, so batch size doesn't matter.
+    """
+
+    def __init__(self, sink, backend="auto", append=False):
+        self.dumps = get_serializer(backend)
+        self.count = 0
+        if sink == "-":
+            sys.stdout.flush()  # keep ordering with earlier print() output
+            self.stream = sys.stdout.buffer
+            self.owns_stream = False
+        elif hasattr(sink, "write"):
+            self.stream = sink
+            self.owns_stream = False
+        else:
+            self.stream = open(sink, "ab" if append else "wb")
+            self.owns_stream = True
+
+    def write(self, record):
+        self.stream.write(self.dumps(record))
+        self.stream.write(b"\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(path):
+    """Yield the records of a JSON Lines file one at a time."""
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import models
+import page_layout
+import pdf_backends
+import test5
+from test5 import process_pdf
+
+# Bump to invalidate every cached result by hand; edits to the parser
+# modules invalidate automatically because their source is hashed into the version.
+PARSER_VERSION = "1"
+# Everything that decides which records a PDF turns into: the parser, the
+# page layout/extraction backends and the record shapes
+PARSER_MODULES = (test5, page_layout, pdf_backends, models)
+
+DEFAULT_CACHE_PATH = ".contract_note_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def parser_version():
+    """Explicit version plus a hash of the parser modules' source."""
+    digest = hashlib.sha256()
+    for module in PARSER_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return f"{PARSER_VERSION}-{digest.hexdigest()[:16]}"
+
+
+def read_pdf_bytes(pdf_file):
+    """Raw bytes of a path, file-like object or bytes."""
+    if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "read"):
+        pos = pdf_file.tell() if hasattr(pdf_file, "tell") else None
+        data = pdf_file.read()
+        if pos is not None:
+            pdf_file.seek(pos)
+        return data
+    with open(pdf_file, "rb") as f:
+        return f.read()
+
+
+class ResultCache:
+    """
+    Persistent cache of parsed contract notes, keyed by
+    sha256(pdf bytes) + parser version + category + subcategory.
+    Least recently used entries are evicted once the stored records
+    exceed max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version or parser_version()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                   key TEXT PRIMARY KEY,
+                   version TEXT NOT NULL,
+                   broker TEXT,
+                   records TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)")
+        # Results from any other parser version can never be hit again
+        self.conn.execute("DELETE FROM results WHERE version != ?", (self.version,))
+
+    def key(self, pdf_bytes, category, subcategory):
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return f"{digest}:{self.version}:{category}:{subcategory}"
+
+    def get(self, key):
+        """Return (broker, records) or None."""
+        row = self.conn.execute("SELECT broker, records FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0], json.loads(row[1])
+
+    def put(self, key, broker, records):
+        payload = json.dumps(records, separators=(",", ":"))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, version, broker, records, size, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, self.version, broker, payload, len(payload), time.time()),
+        )
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_access"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def clear(self):
+        self.conn.execute("DELETE FROM results")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cached_process_pdf(pdf_file, category, subcategory, cache, password=None):
+    """
+    process_pdf with a content-hash cache in front of it.
+    The PDF bytes are read once and reused for parsing on a miss.
+    """
+    data = read_pdf_bytes(pdf_file)
+    key = cache.key(data, category, subcategory)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    broker, records = process_pdf(data, category, subcategory, password=password)
+    cache.put(key, broker, records)
+    return broker, records
+
+
+_worker_caches = {}
+
+
+def get_cache(path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+    """One ResultCache per path per process (SQLite connections can't cross fork)."""
+    key = (os.getpid(), path)
+    if key not in _worker_caches:
+        _worker_caches[key] = ResultCache(path, max_bytes=max_bytes)
+    return _worker_caches[key]
@@ -0,0 +1,318 @@
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from log_config import configure_logging
+from instrumentation import STAGE_METRIC, Metrics, count, get_metrics, use_metrics
+from record_writer import get_serializer
+from result_cache import cached_process_pdf, get_cache
+from test5 import process_pdf
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BODY = 20 * 1024 * 1024
+HEADER_TIMEOUT = 10.0
+MAX_HEADER_LINES = 100
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+    411: "Length Required", 413: "Payload Too Large", 415: "Unsupported Media Type",
+    422: "Unprocessable Entity", 429: "Too Many Requests", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None, close=False):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+        self.close = close
+
+
+def parse_upload(data, category, subcategory, password=None, cache_path=None):
+    """
+    Worker entry point: parse one uploaded PDF (raw bytes) and return
+    (broker, records, error, elapsed, metrics_state). Never raises, so a
+    bad upload cannot break the pool.
+    """
+    with use_metrics(Metrics()) as metrics:
+        start = time.perf_counter()
+        broker, records, error = None, [], None
+        try:
+            if cache_path:
+                broker, records = cached_process_pdf(data, category, subcategory, get_cache(cache_path),
+                                                     password=password)
+            else:
+                # Transactions pickle back smaller than dicts; the response serializer converts them
+                broker, records = process_pdf(data, category, subcategory, password=password, as_dicts=False)
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        metrics.observe(STAGE_METRIC, elapsed, stage="file", broker=broker or "failed")
+    return broker, records, error, elapsed, metrics.state()
+
+
+def parse_multipart(body, content_type):
+    """
+    Split a multipart/form-data body into ({field: str}, {field: bytes})
+    for plain fields and file uploads.
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    if not message.is_multipart():
+        raise HTTPError(400, "malformed multipart body")
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if not name:
+            continue
+        payload = part.get_payload(decode=True) or b""
+        if part.get_filename() is not None:
+            files[name] = payload
+        else:
+            fields[name] = payload.decode("utf-8", "replace")
+    return fields, files
+
+
+async def read_head(reader):
+    """
+    Read the request line and headers of one HTTP/1.1 request. Returns
+    (method, target, headers) or None when the client closed the
+    connection between requests.
+    """
+    request_line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line", close=True)
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(400, "too many headers", close=True)
+    if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+        headers["connection"] = "close"
+    return method.upper(), target, headers
+
+
+async def read_body(reader, headers, max_body):
+    if "transfer-encoding" in headers:
+        raise HTTPError(411, "chunked uploads are not supported; send Content-Length", close=True)
+    if "content-length" in headers:
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length", close=True)
+        if length > max_body:
+            # Don't read (or buffer) the oversized body; just hang up after replying
+            raise HTTPError(413, f"upload larger than {max_body} bytes", close=True)
+        return await reader.readexactly(length)
+    return b""
+
+
+class ParseService:
+    """
+    Accepts PDF uploads and parses them on a bounded process pool.
+    At most workers + queue_limit uploads are admitted at once; the
+    rest get 429 with Retry-After as soon as their headers arrive, so
+    shed uploads are never read into memory.
+    """
+
+    def __init__(self, workers=None, queue_limit=None, max_body=DEFAULT_MAX_BODY, timeout=120.0,
+                 cache_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + (self.workers * 2 if queue_limit is None else queue_limit)
+        self.max_body = max_body
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.in_flight = 0
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.dumps = get_serializer("auto")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    head = await read_head(reader)
+                    if head is None:
+                        break
+                    method, target, headers = head
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    # Uploads take a slot before their body is read, so concurrent
+                    # uploads can't overshoot capacity while still transferring
+                    slot = None
+                    if method == "POST" and urlsplit(target).path == "/parse":
+                        if self.in_flight >= self.capacity:
+                            # The unread body is still on the socket, so this connection is done
+                            raise HTTPError(429, "parser queue is full, retry later",
+                                            headers={"Retry-After": "1"}, close=True)
+                        self.in_flight += 1
+                        slot = []  # parse() appends the worker future that now holds the slot
+                    try:
+                        body = await read_body(reader, headers, self.max_body)
+                        status, payload, extra = await self.dispatch(method, target, headers, body, slot)
+                    finally:
+                        if slot == []:
+                            self.in_flight -= 1
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": e.message}, e.headers
+                    keep_alive = keep_alive and not e.close
+                except asyncio.TimeoutError:
+                    status, payload, extra, keep_alive = 408, {"error": "request timed out"}, {}, False
+                except asyncio.IncompleteReadError:
+                    break
+                count("contract_note_http_requests_total", status=status)
+                await self.respond(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond(self, writer, status, payload, headers=None, keep_alive=True):
+        if isinstance(payload, (bytes, str)):
+            body = payload.encode("utf-8") if isinstance(payload, str) else payload
+            content_type = "text/plain; version=0.0.4"
+        else:
+            body = self.dumps(payload)
+            content_type = "application/json"
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, headers, body, slot=None):
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok", "workers": self.workers, "in_flight": self.in_flight,
+                         "capacity": self.capacity}, {}
+        if url.path == "/metrics":
+            return 200, get_metrics().to_prometheus(), {}
+        if url.path != "/parse":
+            raise HTTPError(404, f"no route for {url.path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST", headers={"Allow": "POST"})
+        return await self.parse(url.query, headers, body, slot)
+
+    def read_upload(self, query, headers, body):
+        """(pdf bytes, category, subcategory, password) from a raw or multipart upload."""
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+        content_type = headers.get("content-type", "application/pdf")
+        if content_type.startswith("multipart/form-data"):
+            fields, files = parse_multipart(body, content_type)
+            params.update(fields)
+            data = files.get("file") or next(iter(files.values()), b"")
+        elif content_type.startswith(("application/pdf", "application/octet-stream")):
+            data = body
+        else:
+            raise HTTPError(415, "send the PDF as application/pdf or multipart/form-data")
+        if not data.startswith(b"%PDF"):
+            raise HTTPError(400, "upload is not a PDF")
+        # Prefer the header so passwords stay out of URLs and access logs
+        password = headers.get("x-pdf-password") or params.get("password") or None
+        return data, params.get("category", "Equity"), params.get("subcategory", "Mutual Fund"), password
+
+    async def parse(self, query, headers, body, slot=None):
+        loop = asyncio.get_running_loop()
+        # Splitting a large multipart body takes most of a second; do it on a
+        # thread so other connections are still served meanwhile
+        data, category, subcategory, password = await loop.run_in_executor(
+            None, self.read_upload, query, headers, body)
+        job = self.pool.submit(parse_upload, data, category, subcategory, password, self.cache_path)
+        if slot is not None:
+            # The admission slot is held until the worker is done, not until we
+            # respond: after a 504 the worker is still busy with this upload
+            slot.append(job)
+            job.add_done_callback(lambda _: self._release_from_worker(loop))
+        try:
+            broker, records, error, elapsed, state = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            # The worker process can't be interrupted; it keeps its pool slot until done
+            raise HTTPError(504, f"parsing took longer than {self.timeout}s")
+        get_metrics().merge(state)
+        if error:
+            logger.warning("Upload failed (%d bytes): %s", len(data), error)
+            raise HTTPError(422, error)
+        return 200, {"broker": broker, "records": records, "elapsed_ms": round(elapsed * 1000, 1)}, {}
+
+    def release_slot(self):
+        self.in_flight -= 1
+
+    def _release_from_worker(self, loop):
+        # Runs on the pool's thread when a job finishes
+        try:
+            loop.call_soon_threadsafe(self.release_slot)
+        except RuntimeError:
+            pass  # the event loop is already closed
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def serve(host="127.0.0.1", port=8080, **options):
+    service = ParseService(**options)
+    server = await asyncio.start_server(service.handle_connection, host, port, limit=64 * 1024)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    logger.info("Listening on http://%s:%d (%d workers, capacity %d)", host, port, service.workers,
+                service.capacity)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        # Let running parses finish without blocking the loop
+        await loop.run_in_executor(None, service.close)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP service that parses uploaded contract-note PDFs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--queue-limit", type=int, default=None,
+                        help="uploads allowed to wait for a worker before 429 (default: 2 x workers)")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_MAX_BODY, help="largest accepted upload in bytes")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a parse returns 504")
+    parser.add_argument("--cache", default=None, metavar="PATH", help="SQLite result cache to reuse parsed notes")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-json", action="store_true", help="emit logs as JSON lines")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, json_format=args.log_json)
+    asyncio.run(serve(args.host, args.port, workers=args.workers, queue_limit=args.queue_limit,
+                      max_body=args.max_body, timeout=args.timeout, cache_path=args.cache))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,173 @@
 import pdfplumber
 import pytesseract
 from pdf2image import convert_from_path
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import hashlib
+import logging
 import re
 import os
+from page_layout import PageLayout
 
-def extract_text_with_ocr(pdf_path):
+logger = logging.getLogger(__name__)
+
+# pdf2image's default, which the OCR fallback has always used; pass dpi= to trade speed for accuracy
+OCR_DPI = 200
+OCR_CACHE_DIR = ".ocr_cache"
+
+def file_sha256(pdf_path):
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def page_runs(page_numbers):
+    """Group sorted page numbers into contiguous (first, last) runs."""
+    runs = []
+    for n in sorted(set(page_numbers)):
+        if runs and n == runs[-1][1] + 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    return [tuple(run) for run in runs]
+
+def rasterize_pages(pdf_path, page_numbers, dpi=OCR_DPI, poppler_path=None):
+    """
+    Render the requested pages with one poppler call per contiguous run of
+    pages (normally a single call) instead of one process per page.
+    """
+    images = {}
+    for first, last in page_runs(page_numbers):
+        rendered = convert_from_path(
+            pdf_path, dpi=dpi, first_page=first, last_page=last,
+            thread_count=min(4, last - first + 1), poppler_path=poppler_path,
+        )
+        for page_num, img in zip(range(first, last + 1), rendered):
+            images[page_num] = img
+    return images
+
+def ocr_pages(pdf_path, page_numbers, dpi=OCR_DPI, workers=None, cache_dir=OCR_CACHE_DIR, poppler_path=None):
+    """
+    OCR text for the given pages, cached on disk per (file hash, page, dpi)
+    so text and table extraction share one result. Missing pages are
+    rasterised together and run through tesseract on a thread pool
+    (tesseract is a subprocess, so threads run in parallel).
+    """
+    if not page_numbers:
+        return {}
+    file_hash = file_sha256(pdf_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(page_num):
+        return os.path.join(cache_dir, f"{file_hash}_{page_num}_{dpi}.txt")
+
+    texts = {}
+    missing = []
+    for page_num in page_numbers:
+        path = cache_path(page_num)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                texts[page_num] = f.read()
+        else:
+            missing.append(page_num)
+
+    if missing:
+        logger.info("⚠️ Running OCR on pages %s at %d dpi...", missing, dpi)
+        images = rasterize_pages(pdf_path, missing, dpi=dpi, poppler_path=poppler_path)
+        order = sorted(images)
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = pool.map(pytesseract.image_to_string, [images[n] for n in order])
+            for page_num, text in zip(order, results):
+                texts[page_num] = text
+                with open(cache_path(page_num), "w", encoding="utf-8") as f:
+                    f.write(text)
+    return texts
+
+def extract_content_with_ocr(pdf_path, dpi=OCR_DPI, poppler_path=None):
+    """
+    Text and tables in one pass over the PDF: each page is layout-analysed
+    once and that snapshot serves both extract_text() and extract_tables().
+    Pages with no text go to OCR, and so do pages without a structured
+    table (their OCR text becomes a RawText table). Returns (text, tables).
+    """
+    page_texts = {}
+    page_tables = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            with PageLayout(page) as layout:
+                text = layout.text
+                found = layout.extract_tables()
+            if text.strip():
+                page_texts[page_num] = text
+            else:
+                logger.info("⚠️ Page %d: No text found, queued for OCR", page_num)
+                page_texts[page_num] = None
+            if found:
+                page_tables[page_num] = []
+                for t in found:
+                    df = pd.DataFrame(t[1:], columns=t[0])
+                    df["__page__"] = page_num
+                    page_tables[page_num].append(df)
+            else:
+                logger.info("⚠️ Page %d: No structured table, using OCR text.", page_num)
+                page_tables[page_num] = None
+
+    # OCR every page that needs it in one go; text and table fallbacks share the result
+    ocr_texts = ocr_pages(pdf_path, sorted({n for n, t in page_texts.items() if t is None}
+                                           | {n for n, t in page_tables.items() if t is None}),
+                          dpi=dpi, poppler_path=poppler_path)
+    text = "\n".join(t if t is not None else ocr_texts[n] for n, t in page_texts.items())
+    tables = []
+    for page_num, found in page_tables.items():
+        if found is not None:
+            tables.extend(found)
+        else:
+            # Here you can write regex to capture table-like text
+            raw = ocr_texts[page_num]
+            tables.append(pd.DataFrame({"RawText": raw.splitlines(), "__page__": page_num}))
+    return text, tables
+
+def extract_text_with_ocr(pdf_path, dpi=OCR_DPI, poppler_path=None):
     """
     Extracts text from PDF.
     First tries pdfplumber (native text).
     Falls back to OCR if page has no text.
     """
-    all_text = []
-    
+    page_texts = {}
+
     with pdfplumber.open(pdf_path) as pdf:
         for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text()
-            if text and text.strip():
-                all_text.append(text)
+            with PageLayout(page) as layout:
+                text = layout.text
+            if text.strip():
+                page_texts[page_num] = text
             else:
-                # Fallback: OCR
-                print(f"⚠️ Page {page_num}: No text found, running OCR...")
-                images = convert_from_path(pdf_path, first_page=page_num, last_page=page_num)
-                for img in images:
-                    text = pytesseract.image_to_string(img)
-                    all_text.append(text)
-    return "\n".join(all_text)
-
-def extract_tables_with_ocr(pdf_path):
+                logger.info("⚠️ Page %d: No text found, queued for OCR", page_num)
+                page_texts[page_num] = None
+
+    # Fallback: OCR every text-less page in one go
+    ocr_texts = ocr_pages(pdf_path, [n for n, t in page_texts.items() if t is None],
+                          dpi=dpi, poppler_path=poppler_path)
+    return "\n".join(text if text is not None else ocr_texts[n] for n, text in page_texts.items())
+
+def extract_tables_with_ocr(pdf_path, dpi=OCR_DPI, poppler_path=None):
     """
     Extracts tables. If no tables found with pdfplumber, tries OCR on images.
+    Use extract_content_with_ocr when the text is needed as well.
     """
-    tables = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            page_tables = page.extract_tables()
-            if page_tables:
-                for t in page_tables:
-                    df = pd.DataFrame(t[1:], columns=t[0])
-                    df["__page__"] = page_num
-                    tables.append(df)
-            else:
-                # OCR fallback (table as raw text, needs parsing later)
-                print(f"⚠️ Page {page_num}: No structured table, using OCR text.")
-                images = convert_from_path(pdf_path, first_page=page_num, last_page=page_num)
-                for img in images:
-                    text = pytesseract.image_to_string(img)
-                    # Here you can write regex to capture table-like text
-                    tables.append(pd.DataFrame({"RawText": text.splitlines(), "__page__": page_num}))
-    return tables
+    return extract_content_with_ocr(pdf_path, dpi=dpi, poppler_path=poppler_path)[1]
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+
+    configure_logging("INFO")
     pdf_file = "Phillip.pdf"
     POPPLER_PATH = r"C:\poppler\bin"   # 👈 update to your path
-    # ✅ Extract plain text
-    text = extract_text_with_ocr(pdf_file)
+    # ✅ Extract plain text and tables in one pass
+    text, tables = extract_content_with_ocr(pdf_file)
     print("📄 Extracted Text:\n", text[:1000], "...")  # print first 1000 chars
 
-    # ✅ Extract tables
-    tables = extract_tables_with_ocr(pdf_file)
     print(f"✅ Extracted {len(tables)} tables")
 
     if tables:
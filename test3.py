@@ -1,7 +1,11 @@
 import pdfplumber
 import pandas as pd
-import json
 import re
+import logging
+
+from record_writer import JsonlWriter
+
+logger = logging.getLogger(__name__)
 
 def extract_pdf_content(pdf_path):
     tables = []
@@ -10,7 +14,7 @@ def extract_pdf_content(pdf_path):
     with pdfplumber.open(pdf_path) as pdf:
         for page_num, page in enumerate(pdf.pages, start=1):
             text = page.extract_text() or ""
-            print(text)
+            logger.debug("page %d text: %s", page_num, text)
             # ✅ Detect broker from text
             if broker_name == "Unknown":
                 broker_name = detect_broker_name(text)
@@ -61,7 +65,8 @@ def build_json_motilal(tables, category, subcategory):
     for df in tables:
 
         for _, row in df.iterrows():
-            print("RAW ROW:", row.to_dict()) 
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("RAW ROW: %s", row.to_dict())
             scrip_name = str(row.get("Scrip Name", "")).strip()
             if not scrip_name or scrip_name.lower() == "none":
                 continue
@@ -149,18 +154,29 @@ def build_json_phillip(tables, category, subcategory):
 
 
 # -------------------- ROUTER --------------------
+def select_builder(broker):
+    if broker == "Motilal Oswal Financial Services Limited":
+        return build_json_motilal
+    elif broker == "Phillip Capital (India) Pvt Ltd":
+        return build_json_phillip
+    raise ValueError(f"❌ No parser available for broker: {broker}")
+
+
 def process_pdf(pdf_file, category, subcategory):
     extracted = extract_pdf_content(pdf_file)
     broker = extracted["broker"]
+    json_data = select_builder(broker)(extracted["tables"], category, subcategory)
+    return broker, json_data
 
-    if broker == "Motilal Oswal Financial Services Limited":
-        json_data = build_json_motilal(extracted["tables"], category, subcategory)
-    elif broker == "Phillip Capital (India) Pvt Ltd":
-        json_data = build_json_phillip(extracted["tables"], category, subcategory)
-    else:
-        raise ValueError(f"❌ No parser available for broker: {broker}")
 
-    return broker, json_data
+def iter_pdf_records(pdf_file, category, subcategory):
+    """Streaming process_pdf: yield (broker, record) one table at a time."""
+    extracted = extract_pdf_content(pdf_file)
+    broker = extracted["broker"]
+    builder = select_builder(broker)
+    for df in extracted["tables"]:
+        for record in builder([df], category, subcategory):
+            yield broker, record
 
 
 def try_float(val):
@@ -171,14 +187,18 @@ def try_float(val):
 
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+
+    configure_logging("INFO")
     pdf_file = "Motilal.pdf"
     category = "Equity"
     subcategory = "Mutual Fund"
     
-    broker, json_data = process_pdf(pdf_file, category, subcategory)
+    broker = None
+    # One JSON object per line, to stdout and to output.jsonl, as each table is parsed
+    with JsonlWriter("-") as stdout_writer, JsonlWriter("output.jsonl") as writer:
+        for broker, record in iter_pdf_records(pdf_file, category, subcategory):
+            stdout_writer.write(record)
+            writer.write(record)
 
     print(f"✅ Detected Broker: {broker}")
-    print(json.dumps(json_data, indent=4))
-
-    with open("output.json", "w") as f:
-        json.dump(json_data, f, indent=4)
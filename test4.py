@@ -1,17 +1,21 @@
 import pdfplumber
 import pandas as pd
-import json
 import re
+import logging
+
+from record_writer import JsonlWriter
+
+logger = logging.getLogger(__name__)
 
 def extract_pdf_content(pdf_path):
-    print("extract_pdf_content")
+    logger.debug("extract_pdf_content: %s", pdf_path)
     tables = []
     broker_name = "Unknown"
 
     with pdfplumber.open(pdf_path) as pdf:
         for page_num, page in enumerate(pdf.pages, start=1):
             text = page.extract_text() or ""
-            print(text)
+            logger.debug("page %d text: %s", page_num, text)
             # ✅ Detect broker from text (only once)
             if broker_name == "Unknown" and text:
                 broker_name = detect_broker_name(text)
@@ -72,7 +76,7 @@ def detect_broker_name(text: str) -> str:
     return "Unknown"
 
 def build_json_from_tables(tables, category, subcategory):
-    print("build_json_from_tables")
+    logger.debug("build_json_from_tables: %d tables", len(tables))
     results = []
 
     for df in tables:
@@ -130,26 +134,36 @@ def build_json_from_tables(tables, category, subcategory):
 
 def build_json_phillip(tables, category, subcategory):
     results = []
-    print( tables )
+    logger.debug("build_json_phillip tables: %s", tables)
     return results
 
 def process_pdf(pdf_file, category, subcategory):
-    print('process_pdf')
+    logger.debug("process_pdf: %s", pdf_file)
     extracted = extract_pdf_content(pdf_file)
     broker = extracted["broker"]
 
+    json_data = select_builder(broker, category, subcategory)(extracted["tables"], category, subcategory)
+    return broker, json_data
+
+def select_builder(broker, category, subcategory):
     # ✅ Dispatcher based on broker + category + subcategory
     if broker == "Motilal Oswal Financial Services Limited" and category == "Equity" and subcategory == "Mutual Fund":
-        json_data = build_json_from_tables(extracted["tables"], category, subcategory)
+        return build_json_from_tables
 
     elif broker == "PHILLIPCAPITAL (INDIA) PVT LTD" and category == "Equity" and subcategory == "Mutual Fund":
-        json_data = build_json_phillip(extracted["tables"], category, subcategory)
+        return build_json_phillip
 
-    else:
-        raise ValueError(f"❌ No parser available for Broker: {broker}, "
-                         f"Category: {category}, Subcategory: {subcategory}")
+    raise ValueError(f"❌ No parser available for Broker: {broker}, "
+                     f"Category: {category}, Subcategory: {subcategory}")
 
-    return broker, json_data
+def iter_pdf_records(pdf_file, category, subcategory):
+    """Streaming process_pdf: yield (broker, record) one table at a time."""
+    extracted = extract_pdf_content(pdf_file)
+    broker = extracted["broker"]
+    builder = select_builder(broker, category, subcategory)
+    for df in extracted["tables"]:
+        for record in builder([df], category, subcategory):
+            yield broker, record
 
 def try_float(val):
     try:
@@ -158,16 +172,19 @@ def try_float(val):
         return 0
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+
+    configure_logging("INFO")
     pdf_file = "Motilal.pdf"
     category = "Equity"
     subcategory = "Mutual Fund"
 
-    broker, json_data = process_pdf(pdf_file, category, subcategory)
+    broker = None
+    # One JSON object per line, to stdout and to output.jsonl, as each table is parsed
+    with JsonlWriter("-") as stdout_writer, JsonlWriter("output.jsonl") as writer:
+        for broker, record in iter_pdf_records(pdf_file, category, subcategory):
+            stdout_writer.write(record)
+            writer.write(record)
 
     print(f"✅ Detected Broker: {broker}")
-    print(json.dumps(json_data, indent=4))
-
-    with open("output.json", "w") as f:
-        json.dump(json_data, f, indent=4)
-
-    print("✅ JSON saved to output.json")
+    print("✅ JSON Lines saved to output.jsonl")
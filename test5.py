@@ -2,53 +2,114 @@ import pdfplumber
 import pandas as pd
 import re
 import json
+import logging
 import getpass
-from PyPDF2 import PdfReader
-
-def extract_pdf_content(pdf_path_or_file, category, subcategory, password=None):
+import io
+import mmap
+import os
+import sys
+from collections import namedtuple
+from itertools import islice
+from pdfminer.pdfdocument import PDFPasswordIncorrect
+from instrumentation import count, span
+from models import EntityCache, MotilalEntity, Transaction, to_dicts
+from page_layout import PageLayout
+from pdf_backends import DEFAULT_BACKEND, available_backends, open_backend
+from password_resolver import PasswordCandidates, resolve_password
+
+logger = logging.getLogger(__name__)
+
+PageContent = namedtuple("PageContent", ["page_num", "broker", "text", "tables", "header"])
+
+def choose_backend(pdf, source, backend=None):
     """
-    Extract tables and metadata from PDF (Mutual Fund contract notes).
-    Automatically dispatch to broker-specific parsing if recognized.
+    The extraction backend for a document: the one asked for, else the one
+    its broker's profile names. The broker is sniffed from page one with
+    the fast backend, which is kept only if that broker's profile wants it.
+    """
+    if backend:
+        return open_backend(backend, pdf, source)
+    fast = next((name for name in FAST_BACKENDS if name in available_backends()), None)
+    if fast is None:
+        return open_backend(DEFAULT_BACKEND, pdf, source)
+    with span("backend_sniff", backend=fast):
+        try:
+            engine = open_backend(fast, pdf, source)
+        except Exception as e:
+            logger.debug("%s backend unavailable for this PDF: %s", fast, e)
+            return open_backend(DEFAULT_BACKEND, pdf, source)
+        wanted = BROKER_BACKENDS.get(detect_broker_name(engine.page_text(1)), DEFAULT_BACKEND)
+    if wanted == engine.name:
+        return engine
+    engine.close()
+    return open_backend(DEFAULT_BACKEND, pdf, source)
+
+def iter_pdf_pages(pdf_path_or_file, password=None, backend=None):
+    """
+    Yield a PageContent for every page in the broker's page plan, as soon
+    as that page's tables are extracted. header is the document's
+    HeaderFieldExtractor, filled in up to and including this page.
+    backend names an extraction backend (see pdf_backends) to use instead
+    of the one the broker's profile picks.
     """
-    tables = []
     broker_name = "Unknown"
-    text = ""
-    print("function ectracted pdf content")
+    header = HeaderFieldExtractor()
 
-    with open_pdf(pdf_path_or_file, password=password) as pdf:
+    with span("open"):
+        pdf = open_pdf(pdf_path_or_file, password=password)
+
+    # The backend is picked once the PDF is open (it may need page one)
+    with pdf, choose_backend(pdf, pdf_path_or_file, backend) as engine:
+        page_plan = None
+        seen_tables = False
         for page_num, page in enumerate(pdf.pages, start=1):
-            page_text = page.extract_text() or ""
+            # ✅ Pages outside the broker's page plan are never layout-analysed
+            if page_plan is not None and page_num > page_plan.get("max_pages", page_num):
+                break
+
+            # One layout snapshot per page, shared by text and table extraction;
+            # this is the pdfminer layout pass (or pdfium's text extraction)
+            with span("page_layout", broker=broker_name, backend=engine.name):
+                layout = engine.layout(page_num, page)
+            with span("page_text", broker=broker_name):
+                page_text = layout.text
             
             # Detect broker once
             if broker_name == "Unknown" and page_text:
-                broker_name = detect_broker_name(page_text)
-
-              # ✅ Skip extra pages for Phillip Capital
-            if broker_name == "Phillip Capital (India) Pvt Ltd" and page_num > 1:
-                continue  
-
-            # Save only first page’s text (or concatenate for other brokers)
-            if broker_name == "Phillip Capital (India) Pvt Ltd":
-                if page_num == 1:
-                    text = page_text
-            else:
-                text += "\n" + page_text  # concat for others
-            
-            # Extract contract note date
-            contract_date = extract_date_from_text(text)
-               
-            # Stamp duty
-            stamp_match = re.search(r"STAMPDUTY\s+([\d.,]+)", text)
-            stamp_duty = float(stamp_match.group(1).replace(",", "")) if stamp_match else 0.0
+                with span("broker_detection"):
+                    broker_name = detect_broker_name(page_text)
+                page_plan = BROKER_PAGE_PLANS.get(broker_name, {})
+                if isinstance(password, PasswordCandidates):
+                    password.remember(broker_name)
+                if page_num > page_plan.get("max_pages", page_num):
+                    # Still report the broker even though this page is out of plan
+                    yield PageContent(page_num, broker_name, "", [], header)
+                    break
+
+            # Each page is scanned once for header fields that haven't been found yet
+            header.feed(page_text)
+            contract_date = header.contract_date
+            stamp_duty = header.stamp_duty
            
-            page_tables = [
-                pd.DataFrame(t[1:], columns=t[0])
-                for t in page.extract_tables() if t and len(t) > 1
-            ]
-            
-            
+            with span("page_tables", broker=broker_name):
+                page_tables = [
+                    pd.DataFrame(t[1:], columns=t[0])
+                    for t in layout.extract_tables(BROKER_TABLE_PROFILES.get(broker_name))
+                    if t and len(t) > 1
+                ]
+            count("contract_note_pages_total", broker=broker_name)
+
+            # Release this page's layout objects as soon as we are done with it
+            layout.close()
+
             if not page_tables:
+                yield PageContent(page_num, broker_name, page_text, [], header)
+                # Transaction pages come first; once they stop, the rest is
+                # terms-and-conditions boilerplate for brokers that say so.
+                if seen_tables and page_plan and page_plan.get("stop_after_tables"):
+                    break
                 continue
+            seen_tables = True
                
             # ✅ Count total rows across all tables on this page
             total_rows = 3
@@ -59,97 +120,301 @@ def extract_pdf_content(pdf_path_or_file, category, subcategory, password=None):
                 df["__contract_date__"] = contract_date
                 df["__stamp_duty__"] = per_row_stamp_duty
                 df["__broker__"] = broker_name
-                tables.append(df)        
 
-    return {"tables": tables, "broker": broker_name, "text": text,   }
+            yield PageContent(page_num, broker_name, page_text, page_tables, header)
+
+def extract_page_tables(page, profile=None):
+    """Tables in the broker's transaction band of a page (see PageLayout.extract_tables)."""
+    if isinstance(page, PageLayout):
+        return page.extract_tables(profile)
+    return PageLayout(page).extract_tables(profile)
+
+def extract_pdf_content(pdf_path_or_file, category, subcategory, password=None, include_text=True, backend=None):
+    """
+    Extract tables and metadata from PDF (Mutual Fund contract notes).
+    Automatically dispatch to broker-specific parsing if recognized.
+    The full document text is only joined when include_text is set
+    (Phillip Capital always gets its first-page text).
+    """
+    tables = []
+    broker_name = "Unknown"
+    page_texts = []
+    header_values = {}
+    logger.debug("extract_pdf_content: %s", pdf_path_or_file if isinstance(pdf_path_or_file, str) else "<buffer>")
+
+    for page in iter_pdf_pages(pdf_path_or_file, password=password, backend=backend):
+        broker_name = page.broker
+        header_values = page.header.values
+        # Keep page texts for a single join at the end
+        page_texts.append(page.text)
+        tables.extend(page.tables)
+
+    # Save only first page’s text (or concatenate for other brokers)
+    if broker_name == "Phillip Capital (India) Pvt Ltd":
+        text = page_texts[0] if page_texts else ""
+    elif include_text and page_texts:
+        text = "\n" + "\n".join(page_texts)
+    else:
+        text = ""
+
+    return {"tables": tables, "broker": broker_name, "text": text, "header": header_values}
+
+class HeaderFieldExtractor:
+    """
+    Incremental contract-note header parser.
+    Each page is fed once; the first match of every field is kept and a
+    field is no longer searched for once it has been found.
+    """
+
+    PATTERNS = {
+        "stamp_duty": re.compile(r"STAMPDUTY\s+([\d.,]+)"),
+        "sett_no": re.compile(r"Sett No\s+(\d+)"),
+    }
+
+    def __init__(self):
+        self.values = {}
+
+    def feed(self, page_text):
+        if not page_text:
+            return
+        if "contract_date" not in self.values:
+            date = extract_date_from_text(page_text)
+            if date:
+                self.values["contract_date"] = date
+        for name, pattern in self.PATTERNS.items():
+            if name not in self.values:
+                match = pattern.search(page_text)
+                if match:
+                    self.values[name] = match.group(1)
+
+    @property
+    def contract_date(self):
+        return self.values.get("contract_date")
+
+    @property
+    def stamp_duty(self):
+        value = self.values.get("stamp_duty")
+        return float(value.replace(",", "")) if value else 0.0
+
+    @property
+    def sett_no(self):
+        return self.values.get("sett_no")
+
+# How much of each end of the file the encryption probe looks at. The
+# /Encrypt entry lives in the trailer (end of file), or in the first-page
+# trailer for linearized files (start of file).
+ENCRYPT_PROBE_BYTES = 4096
+
+
+def load_pdf_buffer(pdf_path_or_file):
+    """
+    Get the PDF into memory exactly once.
+    Paths are memory-mapped, raw bytes are wrapped in BytesIO and
+    file-like objects (e.g. uploads) are used as-is.
+    Returns (buffer, owned) where owned means we must close the buffer.
+    """
+    if isinstance(pdf_path_or_file, (bytes, bytearray, memoryview)):
+        return io.BytesIO(pdf_path_or_file), True
+    if hasattr(pdf_path_or_file, "read"):
+        return pdf_path_or_file, False
+    with open(pdf_path_or_file, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), True
+
+
+def is_pdf_encrypted(pdf_path_or_buffer):
+    """
+    Cheap encryption probe: look for the /Encrypt trailer key in the first
+    and last few KB of the file instead of parsing the document.
+    """
+    if isinstance(pdf_path_or_buffer, (str, os.PathLike)):
+        with open(pdf_path_or_buffer, "rb") as f:
+            head = f.read(ENCRYPT_PROBE_BYTES)
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - ENCRYPT_PROBE_BYTES))
+            tail = f.read()
+    elif hasattr(pdf_path_or_buffer, "seek"):
+        # mmap and file-like objects: probe without disturbing the position
+        pos = pdf_path_or_buffer.tell()
+        pdf_path_or_buffer.seek(0)
+        head = pdf_path_or_buffer.read(ENCRYPT_PROBE_BYTES)
+        pdf_path_or_buffer.seek(0, os.SEEK_END)
+        pdf_path_or_buffer.seek(max(0, pdf_path_or_buffer.tell() - ENCRYPT_PROBE_BYTES))
+        tail = pdf_path_or_buffer.read()
+        pdf_path_or_buffer.seek(pos)
+    else:
+        head = bytes(pdf_path_or_buffer[:ENCRYPT_PROBE_BYTES])
+        tail = bytes(pdf_path_or_buffer[-ENCRYPT_PROBE_BYTES:])
+    return b"/Encrypt" in tail or b"/Encrypt" in head
+
+
+def _is_password_error(e):
+    # Newer pdfplumber wraps pdfminer errors in PdfminerException(original)
+    cause = e.args[0] if e.args and isinstance(e.args[0], Exception) else e
+    return isinstance(cause, PDFPasswordIncorrect)
+
+
+def ask_password():
+    """
+    Prompt for the PDF password on the terminal. Services and worker
+    processes have no terminal (stdin is not a TTY), so they fail fast
+    instead of blocking forever on getpass.
+    """
+    if sys.stdin is None or not sys.stdin.isatty():
+        raise ValueError("❌ PDF is password protected and no password was provided.")
+    return getpass.getpass("Enter PDF password: ")
+
+
+def supply_password(buffer, candidates=None):
+    """The password for an encrypted buffer: the matching candidate if we have candidates, else ask."""
+    if candidates is None:
+        return ask_password()
+    with span("password_probe"):
+        return resolve_password(buffer, candidates)
+
 
 def open_pdf(pdf_path_or_file, password=None):
     """
     Try opening a PDF with or without a password.
-    If encrypted, ask for password if not provided.
+    If encrypted, ask for password if not provided (interactive runs only).
+    password may also be a PasswordCandidates: the candidates are checked
+    against the encryption dictionary and the winner is used, no prompt.
+    The file is read once and parsed once: pdfplumber decrypts the same
+    in-memory buffer that the encryption probe looked at.
     """
-    # Step 1: Check encryption using PyPDF2
+    buffer, owned = None, False
+    candidates = password if isinstance(password, PasswordCandidates) else None
+    if candidates is not None:
+        password = None
     try:
-        reader = PdfReader(pdf_path_or_file)
-        if reader.is_encrypted:
-            print("⚠️ This PDF is password protected.")
+        buffer, owned = load_pdf_buffer(pdf_path_or_file)
+        encrypted = is_pdf_encrypted(buffer)
+        if encrypted:
+            logger.info("⚠️ This PDF is password protected.")
             if not password:
-                password = getpass.getpass("Enter PDF password: ")
-
-            if not reader.decrypt(password):
+                password = supply_password(buffer, candidates)
+
+        try:
+            pdf = pdfplumber.open(buffer, password=password)
+        except Exception as e:
+            if not _is_password_error(e):
+                raise
+            if encrypted:
                 raise ValueError("❌ Incorrect password provided.")
-            
-            # ✅ If decrypted successfully, reopen with pdfplumber
-            return pdfplumber.open(pdf_path_or_file, password=password)
-        else:
-            # Not encrypted, just open
-            return pdfplumber.open(pdf_path_or_file)
+            # The probe missed an /Encrypt entry buried mid-file; ask once and retry.
+            logger.info("⚠️ This PDF is password protected.")
+            if not password:
+                password = supply_password(buffer, candidates)
+            try:
+                pdf = pdfplumber.open(buffer, password=password)
+            except Exception as retry_error:
+                if _is_password_error(retry_error):
+                    raise ValueError("❌ Incorrect password provided.")
+                raise
+
+        # Hand ownership of our buffer to pdfplumber so pdf.close() releases it
+        pdf.stream_is_external = not owned
+        return pdf
     except Exception as e:
+        if owned and buffer is not None:
+            buffer.close()
         raise RuntimeError(f"Error opening PDF: {e}")
     
+# A Phillip Capital transaction line is any line with an ISIN and at least
+# 8 tokens: <fund code> <scheme name> <ISIN> ... <units> <rate> <total>.
+# The patterns are the ones the line parser has always used, compiled once;
+# time, order number and the amounts are looked for anywhere in the line.
+PHILLIP_LINE_ISIN_RE = re.compile(r"INF[A-Z0-9]{6}[A-Z0-9]*")
+PHILLIP_NUMBER_RE = re.compile(r"[\d,]+\.?\d*")
+PHILLIP_TIME_RE = re.compile(r"\d{2}:\d{2}:\d{2}")
+PHILLIP_ORDER_RE = re.compile(r"\d{10}")
+DATE_LABEL_RE = re.compile(r"Date\s+(\d{2}/\d{2}/\d{4})")
+DATE_RE = re.compile(r"(\d{2}/\d{2}/\d{4})")
+# A "Date" label whose date is on a following line (\s+ spans newlines)
+DATE_LABEL_TAIL_RE = re.compile(r"Date\s*$")
+DATE_LEAD_RE = re.compile(r"\s*(\d{2}/\d{2}/\d{4})")
+
+# One MFSS purchase line as the pdfium backend reads it, a group per table cell:
+#   <fund code> <scheme> <ISIN> <order time> <order no> <purchase units> <buy rate> <buy total>
+# The PDFs carry the same stray spaces pdfplumber leaves in the ISIN, time
+# and units cells ("INF769K0 1FP7", "13:16: 01", "1886233.9 1"); the
+# builder strips them as it does for pdfplumber cells.
+PHILLIP_MFSS_ROW_RE = re.compile(r"""
+    (\S+)\s+(.+?)\s+
+    (INF(?:\s?[A-Z0-9]){9})\s+
+    (\d{2}\s?:\s?\d{2}\s?:\s?\d{2})\s+
+    (\d{10})\s+
+    (\d[\d,.]*(?:\s\d+)?)\s+
+    ([\d,.]+)\s+
+    ([\d,.]+)$
+""", re.VERBOSE)
+# Any line like this must parse, or the page goes to pdfplumber instead
+PHILLIP_MFSS_HINT_RE = re.compile(r"\sINF\w{3}.*\s\d{10}\s")
+PHILLIP_MFSS_HEADER = ["MUTUAL FUND NAME", "MUTUAL FUND SCHEME", "ISIN", "ORDER TIME", "ORDER No",
+                       "PURCHASE UNITS", "BUY RATE", "BUY TOTAL"]
+
+def iter_text_lines(text):
+    """Lines of a str without building the list split() would, or any iterable of lines as-is."""
+    if isinstance(text, str):
+        return io.StringIO(text)
+    return text
+
 def parse_phillip_text_format(text):
     """
-    Parse Phillip Capital text format when table extraction fails
+    Parse Phillip Capital text format when table extraction fails.
+    text is the document text or an iterable of its lines (e.g. an open
+    file); the DATE column is resolved once for the whole document.
     """
-    lines = text.split('\n')
     transactions = []
-    print(" parse_phillip_text_format ",text)
-    
-    # Look for transaction lines
-    for i, line in enumerate(lines):
-        # Match lines that contain ISIN codes (format: INF followed by alphanumeric)
-        if re.search(r'INF[A-Z0-9]{6}', line):
-            # This line likely contains transaction data
-            parts = line.split()
-            if len(parts) >= 8:  # Ensure we have enough parts
-                try:
-                    # Extract data based on the format seen in your PDF
-                    mutual_fund_name = parts[0] if parts else ""
-                    
-                    # Find scheme name (everything before ISIN)
-                    isin_match = re.search(r'(INF[A-Z0-9]{6}[A-Z0-9]*)', line)
-                    if isin_match:
-                        isin = isin_match.group(1)
-                        scheme_part = line[:isin_match.start()].strip()
-                        # Extract scheme name (remove the fund code)
-                        scheme_parts = scheme_part.split(' ', 1)
-                        mutual_fund_scheme = scheme_parts[1] if len(scheme_parts) > 1 else scheme_part
-                    else:
-                        continue
-                    
-                    # Extract numerical values
-                    numbers = re.findall(r'[\d,]+\.?\d*', line)
-                    if len(numbers) >= 3:
-                        purchase_units = numbers[-3].replace(',', '') if len(numbers) >= 3 else "0"
-                        buy_rate = numbers[-2].replace(',', '') if len(numbers) >= 2 else "0"
-                        buy_total = numbers[-1].replace(',', '') if len(numbers) >= 1 else "0"
-                    else:
-                        continue
-                    
-                    # Extract time and order number
-                    time_match = re.search(r'(\d{2}:\d{2}:\d{2})', line)
-                    order_time = time_match.group(1) if time_match else ""
-                    
-                    order_match = re.search(r'(\d{10})', line)  # 10 digit order number
-                    order_no = order_match.group(1) if order_match else ""
-                    
-                    transactions.append({
-                        'MUTUAL FUND NAME': mutual_fund_name,
-                        'MUTUAL FUND SCHEME': mutual_fund_scheme,
-                        'ISIN': isin,
-                        'ORDER TIME': order_time,
-                        'ORDER No': order_no,
-                        'PURCHASE UNITS': purchase_units,
-                        'BUY RATE': buy_rate,
-                        'BUY TOTAL': buy_total,
-                        'DATE': extract_date_from_text(text)
-                    })
-                except Exception as e:
-                    print(f"Error parsing line: {line[:50]}... - {e}")
-                    continue
-    
+    logger.debug("parse_phillip_text_format: %s", text if isinstance(text, str) else "<lines>")
+    streamed = not isinstance(text, str)
+    labelled_date = first_date = None
+
+    label_pending = False
+    for line in iter_text_lines(text):
+        if streamed and labelled_date is None:
+            # No whole text to search afterwards: note the dates as they go by
+            found = DATE_LEAD_RE.match(line) if label_pending else None
+            if found is None and "/" in line:
+                found = DATE_LABEL_RE.search(line)
+                if found is None and first_date is None:
+                    first = DATE_RE.search(line)
+                    first_date = first.group(1) if first else None
+            if found:
+                labelled_date = found.group(1)
+            elif line.strip():
+                label_pending = DATE_LABEL_TAIL_RE.search(line) is not None
+        # Only lines with an ISIN (INF...) can be transactions
+        if "INF" not in line:
+            continue
+        isin = PHILLIP_LINE_ISIN_RE.search(line)
+        if isin is None:
+            continue
+        parts = line.split()
+        if len(parts) < 8:
+            continue
+        numbers = PHILLIP_NUMBER_RE.findall(line)
+        if len(numbers) < 3:
+            continue
+        scheme_part = line[:isin.start()].strip()
+        scheme_parts = scheme_part.split(' ', 1)
+        time_match = PHILLIP_TIME_RE.search(line)
+        order_match = PHILLIP_ORDER_RE.search(line)
+        transactions.append({
+            'MUTUAL FUND NAME': parts[0],
+            'MUTUAL FUND SCHEME': scheme_parts[1] if len(scheme_parts) > 1 else scheme_part,
+            'ISIN': isin.group(),
+            'ORDER TIME': time_match.group() if time_match else "",
+            'ORDER No': order_match.group() if order_match else "",
+            'PURCHASE UNITS': numbers[-3].replace(',', ''),
+            'BUY RATE': numbers[-2].replace(',', ''),
+            'BUY TOTAL': numbers[-1].replace(',', ''),
+        })
+
     if transactions:
-        return [pd.DataFrame(transactions)]
+        date = labelled_date or first_date if streamed else extract_date_from_text(text)
+        df = pd.DataFrame(transactions)
+        df['DATE'] = date
+        return [df]
     return []
 
 def extract_date_from_text(text):
@@ -169,20 +434,101 @@ def extract_date_from_text(text):
             return match.group(1)
     return None
 
+# Broker registry, in priority order: when several brokers are named on a
+# page (e.g. an "ICICI Prudential" scheme on a Motilal note) the earlier
+# entry wins. page_plan says which pages can hold transaction tables:
+#   max_pages:         never look past this page number
+#   stop_after_tables: the first page without tables after the transaction
+#                      pages marks the start of the disclaimer section
+BROKER_REGISTRY = [
+    {"name": "Motilal Oswal Financial Services Limited", "keys": ["motilal oswal"],
+     "page_plan": {"stop_after_tables": True},
+     # Skip the letterhead/client tables; the transactions end at the charges rows
+     "table_profile": {"crop": (0, 0.32, 1, 1), "stop_at": r"Total Brokerage"}},
+    {"name": "Zerodha Broking Limited", "keys": ["zerodha"]},
+    {"name": "HDFC Securities Limited", "keys": ["hdfc"]},
+    {"name": "ICICI Securities Limited", "keys": ["icici"]},
+    {"name": "Phillip Capital (India) Pvt Ltd", "keys": ["phillipcapital", "phillip capital"],
+     "page_plan": {"max_pages": 1},
+     # MFSS notes are one line per order, so pdfium text is enough; contract
+     # notes have no such lines and fall back to pdfplumber's ruled tables
+     "backend": "pypdfium2",
+     # Same band fits both the contract note and the MFSS note; each ends at its own charges rows
+     "table_profile": {"crop": (0, 0.32, 1, 1), "stop_at": r"Net Obligation|Securities Transaction Tax",
+                       "text_rows": {"hint": PHILLIP_MFSS_HINT_RE, "row": PHILLIP_MFSS_ROW_RE,
+                                     "header": PHILLIP_MFSS_HEADER}}},
+]
+
+BROKER_PAGE_PLANS = {broker["name"]: broker.get("page_plan", {}) for broker in BROKER_REGISTRY}
+BROKER_TABLE_PROFILES = {broker["name"]: broker.get("table_profile", {}) for broker in BROKER_REGISTRY}
+# Extraction backend per broker (see pdf_backends); the broker is sniffed
+# with the fast ones, so only they need listing in FAST_BACKENDS
+BROKER_BACKENDS = {broker["name"]: broker.get("backend", DEFAULT_BACKEND) for broker in BROKER_REGISTRY}
+FAST_BACKENDS = sorted(set(BROKER_BACKENDS.values()) - {DEFAULT_BACKEND})
+
+# Broker names sit in the letterhead, so only this much of the page is
+# scanned unless nothing matches there.
+BROKER_HEADER_CHARS = 1000
+
+BrokerMatch = namedtuple("BrokerMatch", ["name", "confidence", "span"])
+
+def compile_broker_pattern(keys):
+    """
+    Compile all broker keys into one trie-shaped regex, e.g. ["hdfc", "hdfc sec"]
+    becomes "hdfc(?: sec)?". Shared prefixes are tested once, so the
+    cost of a scan does not grow with the number of brokers.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a key
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional tail so the longest key wins over one of its prefixes
+        return f"(?:{body})?" if "" in node else body
+
+    return re.compile(emit(trie))
+
+BROKER_KEY_PRIORITY = {
+    key: (priority, broker["name"])
+    for priority, broker in enumerate(BROKER_REGISTRY)
+    for key in broker["keys"]
+}
+BROKER_PATTERN = compile_broker_pattern(BROKER_KEY_PRIORITY)
+
+def match_broker(text: str) -> BrokerMatch:
+    """
+    Find the highest-priority broker named in the page header in one pass.
+    Confidence is 1.0 for a single broker in the header, lower when the
+    header names several brokers or the name only appears further down.
+    Span is the (start, end) offset of the winning match in text.
+    """
+    for region_end, confidence in ((BROKER_HEADER_CHARS, 1.0), (len(text), 0.5)):
+        best = None
+        names = set()
+        for match in BROKER_PATTERN.finditer(text[:region_end].lower()):
+            priority, name = BROKER_KEY_PRIORITY[match.group()]
+            names.add(name)
+            if best is None or priority < best[0]:
+                best = (priority, name, match.span())
+        if best:
+            if len(names) > 1:
+                confidence *= 0.75
+            return BrokerMatch(best[1], confidence, best[2])
+        if region_end >= len(text):
+            break
+    return BrokerMatch("Unknown", 0.0, None)
+
 def detect_broker_name(text: str) -> str:
-    brokers = {
-        "motilal oswal": "Motilal Oswal Financial Services Limited",
-        "zerodha": "Zerodha Broking Limited", 
-        "hdfc": "HDFC Securities Limited",
-        "icici": "ICICI Securities Limited",
-        "phillipcapital": "Phillip Capital (India) Pvt Ltd",
-        "phillip capital": "Phillip Capital (India) Pvt Ltd"
-    }
-    text_lower = text.lower()
-    for key, fullname in brokers.items():
-        if key in text_lower:
-            return fullname
-    return "Unknown"
+    return match_broker(text).name
+
+PHILLIP_ISIN_RE = re.compile(r"isin[: ]+([A-Z0-9]+)", re.IGNORECASE)
 
 def try_float(val):
     if val is None:
@@ -195,12 +541,49 @@ def try_float(val):
     except (ValueError, TypeError):
         return 0.0
 
+def to_float_column(values):
+    """
+    Vectorized try_float over a whole column: strip thousands separators,
+    then a single to_numeric pass; anything unparseable becomes 0.0.
+    """
+    stripped = [v.replace(",", "") if isinstance(v, str) else v for v in values]
+    numbers = pd.to_numeric(pd.Series(stripped, dtype=object), errors="coerce")
+    return numbers.fillna(0.0).astype(float).tolist()
+
+def to_float_columns(columns):
+    """
+    Convert many columns with one to_numeric pass over all their cells,
+    so small per-page tables don't pay pandas call overhead per column.
+    """
+    numbers = iter(to_float_column([v for column in columns for v in column]))
+    return [list(islice(numbers, len(column))) for column in columns]
+
+def columns_as_lists(df):
+    """
+    Column name -> list of Python values, like row.to_dict() but for the
+    whole table at once (a duplicated header keeps its last column).
+    """
+    columns = {}
+    for name, (_, column) in zip(df.columns, df.items()):
+        columns[name] = column.tolist()
+    return columns
+
+def coalesce(*columns):
+    """row.get(a) or row.get(b) or ... for every row."""
+    values = columns[0]
+    for alt in columns[1:]:
+        values = [v or a for v, a in zip(values, alt)]
+    return values
+
 def build_json_from_tables(tables, category, subcategory):
     """
-    Build JSON for Motilal Oswal PDFs
+    Build Transactions for Motilal Oswal PDFs
     """
     results = []
-    
+    entities = EntityCache(category, subcategory, MotilalEntity)
+    prepared = []
+    numeric = []
+
     for df in tables:
         # Normalize columns
         df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
@@ -208,54 +591,54 @@ def build_json_from_tables(tables, category, subcategory):
         if "isin" not in df.columns:
             continue
 
-        for _, row in df.iterrows():
-            scrip_name = str(row.get("scrip_name") or row.get("scheme_name") or "").strip()
+        n = len(df)
+        cols = columns_as_lists(df)
+
+        def col(name, default=None):
+            return cols[name] if name in cols else [default] * n
+
+        def text_col(*names):
+            return [str(v) if v else "" for v in coalesce(*[col(name) for name in names])]
+
+        prepared.append((
+            [name.strip() for name in text_col("scrip_name", "scheme_name")],
+            [isin.strip() for isin in text_col("isin")],
+            text_col("scrip_code"), text_col("mode"), text_col("order_type"),
+            text_col("order_no"), text_col("folio_no"),
+            col("__contract_date__", "Unknown"), col("__stamp_duty__", 0.0), col("__page__"),
+        ))
+        numeric.extend([
+            col("nav"), col("stt"), col("unit"),
+            coalesce(col("redeem_amt"), col("reedem_amt")),
+            coalesce(col("purchase_amt"), col("purchase_amount")),
+        ])
+
+    numbers = to_float_columns(numeric)
+
+    for i, text_columns in enumerate(prepared):
+        navs, stts, units, redeems, purchases = numbers[i * 5:(i + 1) * 5]
+        rows = zip(*text_columns, navs, stts, units, redeems, purchases)
+        for (scrip_name, isin, scrip_code, mode, order_type, order_no, folio_no,
+             contract_date, per_row_stamp_duty, page, nav, stt, unit, redeem, purchase) in rows:
             if not scrip_name or scrip_name.lower() == "none":
                 continue
 
-            isin = str(row.get("isin") or "").strip()
-            contract_date = row.get("__contract_date__", "Unknown")
-            per_row_stamp_duty = row.get("__stamp_duty__", 0.0)
-            
-            entity_table = {
-                "scripname": scrip_name,
-                "scripcode": str(row.get("scrip_code") or ""),
-                "benchmark": "0",
-                "category": category,
-                "subcategory": subcategory,
-                "nickname": scrip_name,
-                "isin": isin
-            }
-
-            action_table = {
-                "scrip_code": str(row.get("scrip_code") or ""),
-                "mode": str(row.get("mode") or ""),
-                "order_type": str(row.get("order_type") or ""),
-                "scrip_name": scrip_name,
-                "isin": isin,
-                "order_number": str(row.get("order_no") or ""),
-                "folio_number": str(row.get("folio_no") or ""),
-                "nav": try_float(row.get("nav")),
-                "stt": try_float(row.get("stt")),
-                "unit": try_float(row.get("unit")),
-                "redeem_amount": try_float(row.get("redeem_amt") or row.get("reedem_amt")),
-                "purchase_amount": try_float(row.get("purchase_amt") or row.get("purchase_amount")),
-                "net_amount": try_float(row.get("purchase_amt") or row.get("purchase_amount")),
-                "order_date": contract_date,
-                "stamp_duty": per_row_stamp_duty,
-                "page_number": row.get("__page__", None),
-            }
-
-            results.append({"entityTable": entity_table, "actionTable": action_table})
+            results.append(Transaction(
+                entities.get(scrip_name, scrip_code, isin),
+                mode=mode, order_type=order_type, order_number=order_no, folio_number=folio_no,
+                nav=nav, stt=stt, unit=unit, redeem_amount=redeem, purchase_amount=purchase,
+                net_amount=purchase, order_date=contract_date, stamp_duty=per_row_stamp_duty,
+                page_number=page,
+            ))
 
     return results
 
 def build_json_phillip_with_contract_note(tables, category, subcategory):
     """Parser for Phillip Capital format WITH CONTRACT NOTE NO (equity contract notes)"""
     results = []
-    print("Parsing Phillip Contract Note (equity format)...")
-    print("working on phillips capital second format")
-    print("tables :- ", tables)
+    entities = EntityCache(category, subcategory)
+    logger.debug("Parsing Phillip Contract Note (equity format), %d tables", len(tables))
+    logger.debug("tables :- %s", tables)
     # column mapping to handle variations
     col_map = {
         "order_no": ["order_no.", "order_no"],
@@ -268,74 +651,69 @@ def build_json_phillip_with_contract_note(tables, category, subcategory):
         "stt": ["stt"],
         "net_total": ["net_total_(before_levies)_(rs.)", "net_total"],
     }
-
-    def get_val(row, keys, default=""):
-        for k in keys:
-            if k in row:
-                return row[k]
-        return default
+    prepared = []
+    numeric = []
 
     for df in tables:
         # normalize column names
         df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
-        print("df.columns :-", df.columns)
+        logger.debug("df.columns :- %s", df.columns)
 
         # drop "NSE - CAPITAL - Normal..." lines
         df = df[~df.iloc[:, 0].astype(str).str.contains("NSE - CAPITAL", na=False, case=False)]
-        print("cleaned df:-", df)
-
-        for _, row in df.iterrows():
-            try:
-                row = row.to_dict()
-
-                # ISIN is separate, may need to join with following row
-                isin_match = re.search(r"isin[: ]+([A-Z0-9]+)", " ".join([str(v) for v in row.values()]), re.IGNORECASE)
-                isin = isin_match.group(1) if isin_match else ""
-
-                scrip_name = str(get_val(row, col_map["security"], "")).strip()
-                order_type = "PURCHASE" if str(get_val(row, col_map["buy_sell"], "")).upper() == "BUY" else "SELL"
-
-                entity_table = {
-                    "scrip_name": scrip_name,
-                    "scrip_code": scrip_name.split()[0] if scrip_name else "",
-                    "benchmark": "0",
-                    "category": category,
-                    "subcategory": subcategory,
-                    "nickname": scrip_name,
-                    "isin": isin,
-                }
-
-                action_table = {
-                    "scrip_code": scrip_name.split()[0] if scrip_name else "",
-                    "mode": "DEMAT",
-                    "order_type": order_type,
-                    "scrip_name": scrip_name,
-                    "isin": isin,
-                    "order_number": str(get_val(row, col_map["order_no"], "")),
-                    "folio_number": "0",
-                    "nav": try_float(get_val(row, col_map["gross_rate"], 0)),
-                    "stt": try_float(get_val(row, col_map["stt"], 0)),
-                    "unit": try_float(get_val(row, col_map["quantity"], 0)),
-                    "redeem_amount": 0.0 if order_type == "PURCHASE" else try_float(get_val(row, col_map["net_total"], 0)),
-                    "purchase_amount": try_float(get_val(row, col_map["net_total"], 0)) if order_type == "PURCHASE" else 0.0,
-                    "net_amount": try_float(get_val(row, col_map["net_total"], 0)),
-                    "order_date": "",  # you can inject from header TRADE DATE
-                    "stamp_duty": 0.0,
-                    "page_number": row.get("__page__", None),
-                    "contract_note_no": "",  # inject from header CONTRACT NOTE NO
-                }
-
-                results.append({"entityTable": entity_table, "actionTable": action_table})
-
-            except Exception as e:
-                print("Parse error:", e)
-                continue
+        logger.debug("cleaned df:- %s", df)
+
+        n = len(df)
+        cols = columns_as_lists(df)
+
+        def get_col(keys, default=""):
+            # Every row has the same columns, so resolve the variant once per table
+            for k in keys:
+                if k in cols:
+                    return cols[k]
+            return [default] * n
+
+        # ISIN is separate, may need to join with following row
+        joined_rows = [" ".join(str(v) for v in values) for values in zip(*cols.values())]
+        scrip_names = [str(v).strip() for v in get_col(col_map["security"])]
+
+        prepared.append((
+            scrip_names,
+            [m.group(1) if m else "" for m in map(PHILLIP_ISIN_RE.search, joined_rows)],
+            ["PURCHASE" if str(v).upper() == "BUY" else "SELL" for v in get_col(col_map["buy_sell"])],
+            [str(v) for v in get_col(col_map["order_no"])],
+            cols.get("__page__", [None] * n),
+        ))
+        numeric.extend([
+            get_col(col_map["gross_rate"], 0), get_col(col_map["stt"], 0),
+            get_col(col_map["quantity"], 0), get_col(col_map["net_total"], 0),
+        ])
+
+    numbers = to_float_columns(numeric)
+
+    for i, text_columns in enumerate(prepared):
+        navs, stts, units, net_totals = numbers[i * 4:(i + 1) * 4]
+        rows = zip(*text_columns, navs, stts, units, net_totals)
+        for scrip_name, isin, order_type, order_no, page, nav, stt, unit, net_total in rows:
+            scrip_code = scrip_name.split()[0] if scrip_name else ""
+
+            results.append(Transaction(
+                entities.get(scrip_name, scrip_code, isin),
+                mode="DEMAT", order_type=order_type, order_number=order_no, folio_number="0",
+                nav=nav, stt=stt, unit=unit,
+                redeem_amount=0.0 if order_type == "PURCHASE" else net_total,
+                purchase_amount=net_total if order_type == "PURCHASE" else 0.0,
+                net_amount=net_total,
+                order_date="",  # you can inject from header TRADE DATE
+                stamp_duty=0.0, page_number=page,
+                contract_note_no="",  # inject from header CONTRACT NOTE NO
+            ))
 
     return results
 
 def build_json_phillip_without_contract_note(tables, category, subcategory):
     collected_values = []  # store only values
-    print("without contract note ")
+    logger.debug("Parsing Phillip MFSS note (without contract note), %d tables", len(tables))
     
     for df in tables:
         # Detect header row and normalize columns
@@ -350,10 +728,10 @@ def build_json_phillip_without_contract_note(tables, category, subcategory):
             )
             df = df.drop(index=0).reset_index(drop=True)
 
-        for _, row in df.iterrows():
-            collected_values.append(list(row.values))  # store all values
+        collected_values.extend(df.to_numpy(dtype=object).tolist())  # store all values
 
     # ✅ Filter out unnecessary rows and remove empty strings
+    # (the Phillip table profile normally crops the totals away already)
     filtered_values = []
     for row in collected_values:
         if not row or not row[0]:  # skip empty rows
@@ -370,49 +748,31 @@ def build_json_phillip_without_contract_note(tables, category, subcategory):
         cleaned_row = [value for value in row if value not in (None, '')]
         if cleaned_row:  # only add non-empty rows
             filtered_values.append(cleaned_row)
-      # Create objects with entityTable and actionTable
+    # Create one Transaction per row
     final_results = []
-    
-    for row in filtered_values:
-        # Build actionTable
-        action_table = {
-            "scrip_code": row[0] if len(row) > 0 else "",
-            "mode": "DEMAT",
-            "order_type": "PURCHASE",
-            "scrip_name": row[1] if len(row) > 1 else "",
-            "isin": str(row[2]).replace(' ', ''),
-            "order_number": str(row[4]),
-            "folio_number": "0",
-            "nav": float(str(row[6]).replace(' ', '')),
-            "stt":0.0,
-            "unit": float(str(row[5]).replace(' ', '')) ,
-            "redeem_amount": 0.0,
-            "purchase_amount": float(row[7]) ,
-            "net_amount": float(row[7]) ,
-            "order_date": row[9] if len(row) > 9 else "",
-            "stamp_duty": float(row[17]) if len(row) > 17 and str(row[17]).replace('.', '', 1).isdigit() else 0.0,
-            "page_number": None
-        }
-
-        # Build entityTable (example: some key info, can customize)
-        entity_table = {
-            "scrip_name": row[1] if len(row) > 1 else "",
-            "scrip_code": row[0] if len(row) > 0 else "",
-            "benchmark": "0",
-            "category": category,
-            "subcategory": subcategory,
-            "nickname": row[1] if len(row) > 1 else "",
-            "isin": str(row[2]).replace(' ', ''),
-        }
-
-        final_results.append({
-            "entityTable": entity_table,
-            "actionTable": action_table
-        })
-       
-       
+    entities = EntityCache(category, subcategory)
 
-    print("📌 Filtered & cleaned transaction rows:",final_results )
+    for row in filtered_values:
+        purchase_amount = float(row[7])
+        final_results.append(Transaction(
+            entities.get(row[1] if len(row) > 1 else "", row[0] if len(row) > 0 else "",
+                         str(row[2]).replace(' ', '')),
+            mode="DEMAT",
+            order_type="PURCHASE",
+            order_number=str(row[4]),
+            folio_number="0",
+            nav=float(str(row[6]).replace(' ', '')),
+            stt=0.0,
+            unit=float(str(row[5]).replace(' ', '')),
+            redeem_amount=0.0,
+            purchase_amount=purchase_amount,
+            net_amount=purchase_amount,
+            order_date=row[9] if len(row) > 9 else "",
+            stamp_duty=float(row[17]) if len(row) > 17 and str(row[17]).replace('.', '', 1).isdigit() else 0.0,
+            page_number=None,
+        ))
+
+    logger.debug("📌 Filtered & cleaned transaction rows: %s", final_results)
     return final_results
 
 def clean_columns(df):
@@ -449,7 +809,7 @@ def clean_columns(df):
     return mapping
 
 def detect_phillip_format(text: str) -> str:
-    print("detect phillips format:- ",text)
+    logger.debug("detect phillips format:- %s", text)
     text_lower = text.lower()
     
     if "contract note no" in text_lower:
@@ -459,61 +819,109 @@ def detect_phillip_format(text: str) -> str:
     else:
         return "unknown"
 
-def process_pdf(pdf_file, category, subcategory):
+def select_builder(broker, text):
+    """
+    Pick the JSON builder for a broker (and, for Phillip Capital, the
+    format found in the first-page text). None means no parser yet.
+    """
+    if broker == "Motilal Oswal Financial Services Limited":
+        return build_json_from_tables
+    if broker == "Phillip Capital (India) Pvt Ltd":
+        with span("format_detection", broker=broker):
+            format_type = detect_phillip_format(text)
+        if format_type == "contract_note":
+            return build_json_phillip_with_contract_note
+        if format_type == "mfss":
+            return build_json_phillip_without_contract_note
+        raise ValueError("Unsupported Phillip Capital format")
+    return None
+
+def process_pdf(pdf_file, category, subcategory, password=None, as_dicts=True, backend=None):
     """
-    Main function to process PDF and return JSON data
+    Main function to process PDF and return JSON data.
+    With as_dicts=False the builders' Transaction objects are returned
+    as-is (much smaller when holding large batches in memory).
     """
     json_data = []
     try:
-        extracted = extract_pdf_content(pdf_file, category, subcategory)  # ✅ Pass category + subcategory
+        extracted = extract_pdf_content(pdf_file, category, subcategory, password=password, include_text=False,
+                                        backend=backend)  # ✅ Pass category + subcategory
         broker = extracted["broker"]
-              
-        
-        for i, df in enumerate(extracted["tables"]):
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                print(f" df.columns df.columns")
-
-        if broker == "Motilal Oswal Financial Services Limited":
-            json_data = build_json_from_tables(extracted["tables"], category, subcategory)
-        elif broker == "Phillip Capital (India) Pvt Ltd":
-            format_type = detect_phillip_format(extracted["text"])
-            if format_type == "contract_note":
-                json_data = build_json_phillip_with_contract_note(extracted["tables"], category, subcategory)
-            elif format_type == "mfss":
-                json_data = build_json_phillip_without_contract_note(extracted["tables"], category, subcategory)
-            else:
-                raise ValueError("Unsupported Phillip Capital format")
-
-        print(f"DEBUG: JSON data length -> {len(json_data)}")
-        return broker, json_data
+        if logger.isEnabledFor(logging.DEBUG):
+            for df in extracted["tables"]:
+                logger.debug("table on page %s: %s", df["__page__"].iloc[0] if len(df) else None, list(df.columns))
+
+        builder = select_builder(broker, extracted["text"])
+        if builder:
+            with span("json_build", broker=broker):
+                json_data = builder(extracted["tables"], category, subcategory)
+        count("contract_note_files_total", broker=broker)
+        count("contract_note_records_total", len(json_data), broker=broker)
+
+        logger.debug("JSON data length -> %d", len(json_data))
+        return broker, to_dicts(json_data) if as_dicts else json_data
         
     except Exception as e:
-        print(f"ERROR: Failed to process PDF: {e}")
+        logger.error("Failed to process PDF: %s", e)
         raise
 
+def iter_pdf_records(pdf_file, category, subcategory, password=None, as_dicts=True, backend=None):
+    """
+    Streaming process_pdf: yield (broker, record) as soon as each page's
+    rows are built, so only one page of tables is held at a time.
+    """
+    builder = None
+    pending = []
+    for page in iter_pdf_pages(pdf_file, password=password, backend=backend):
+        if builder is None:
+            # Hold pages back until the broker (and so the builder) is known
+            pending.append(page)
+            if page.broker == "Unknown":
+                continue
+            builder = select_builder(page.broker, pending[0].text) or (lambda tables, category, subcategory: [])
+            # Pages read before the broker was detected belong to it too
+            pages, pending = [held._replace(broker=page.broker) for held in pending], None
+        else:
+            pages = [page]
+        for held in pages:
+            if held.tables:
+                with span("json_build", broker=held.broker):
+                    records = builder(held.tables, category, subcategory)
+                count("contract_note_records_total", len(records), broker=held.broker)
+                for record in records:
+                    yield held.broker, record.to_dict() if as_dicts else record
+
 if __name__ == "__main__":
+    from log_config import configure_logging
+    from record_writer import JsonlWriter
+
+    configure_logging("INFO")
+
     # Update this to your PDF file path
     pdf_file = "PDF/Password.pdf"  # Update with your actual file path
     category = "Equity"
     subcategory = "Mutual Fund"
 
     try:
-        broker, json_data = process_pdf(pdf_file, category, subcategory)
+        broker = None
+        sample = None
 
-        print(f"\nDetected Broker: {broker}")
-        print(f"Number of transactions processed: {len(json_data)}")
-        
-        if json_data:
-            print("\nSample transaction:")
-            # print(json.dumps(json_data[0], indent=2))
-            
-            # Validate data before saving
-            print("\n=== VALIDATION CHECK ===")
-            for i, record in enumerate(json_data[:3]):  # Check first 3 records
+        # Stream every transaction to output.jsonl as its page is parsed
+        with JsonlWriter("output.jsonl") as writer:
+            for broker, record in iter_pdf_records(pdf_file, category, subcategory):
+                writer.write(record)
+                if sample is None:
+                    sample = record
+
+                if writer.count > 3:
+                    continue
+                # Validate data before saving (first 3 records)
+                if writer.count == 1:
+                    print("\n=== VALIDATION CHECK ===")
                 entity = record.get("entityTable", {})
                 action = record.get("actionTable", {})
-                
-                print(f"Record {i+1}:")
+
+                print(f"Record {writer.count}:")
                 print(f"  - ISIN: {entity.get('isin', 'MISSING')}")
                 print(f"  - Script Name: {entity.get('scripname', 'MISSING')}")
                 print(f"  - Units: {action.get('unit', 'MISSING')}")
@@ -527,19 +935,20 @@ if __name__ == "__main__":
                     print(f"  ⚠️ WARNING: Zero units")
                 if action.get('purchase_amount', 0) == 0:
                     print(f"  ⚠️ WARNING: Zero purchase amount")
-            
-            # Save to file
-            with open("output.json", "w") as f:
-                json.dump(json_data, f, indent=4)
-            print(f"\nJSON saved to output.json")
-            
-            # Additional check - save raw extracted data for debugging
+
+        print(f"\nDetected Broker: {broker}")
+        print(f"Number of transactions processed: {writer.count}")
+
+        if writer.count:
+            print(f"\nJSON Lines saved to output.jsonl")
+
+            # Additional check - save a summary of the run for debugging
+            # (the records themselves are already in output.jsonl)
             with open("debug_raw_data.json", "w") as f:
                 debug_data = {
                     "broker": broker,
-                    "total_records": len(json_data),
-                    "sample_record": json_data[0] if json_data else None,
-                    "all_records": json_data
+                    "total_records": writer.count,
+                    "sample_record": sample,
                 }
                 json.dump(debug_data, f, indent=4)
             print("Debug data saved to debug_raw_data.json")
@@ -551,4 +960,4 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error processing PDF: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
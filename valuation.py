@@ -0,0 +1,269 @@
+import argparse
+import json
+import sys
+from datetime import date
+
+import numpy as np
+
+from models import Transaction
+from parquet_export import parse_date
+from record_writer import get_serializer, read_jsonl
+
+DAYS_PER_YEAR = 365.0
+NEWTON_GUESS = 0.1
+NEWTON_STEPS = 50
+TOLERANCE = 1e-9  # relative change in the rate that counts as converged
+BISECTION_BOUNDS = (-0.9999, 100.0)  # -99.99% .. +10000% a year
+BISECTION_STEPS = 64
+
+
+def _day(value):
+    """order_date as a day ordinal: date objects (Parquet reads) or contract-note strings."""
+    if isinstance(value, date):
+        return value.toordinal()
+    parsed = parse_date(value)
+    return parsed.toordinal() if parsed else None
+
+
+def _amount(value):
+    try:
+        return float(str(value).replace(",", "")) if value not in (None, "") else 0.0
+    except ValueError:
+        return 0.0
+
+
+class PortfolioFlows:
+    """
+    Cash flows of many portfolios (one per folio_number + ISIN) in flat
+    arrays: index[i] is the portfolio of flow i, amount is negative for
+    purchases and positive for redemptions, units is signed the same way.
+    Build with from_records() or from_columns(); keys[k] is portfolio k.
+    """
+
+    def __init__(self, keys, index, day, amount, units, nav):
+        self.keys = keys
+        self.index = np.asarray(index, dtype=np.int64)
+        self.day = np.asarray(day, dtype=np.int64)
+        self.amount = np.asarray(amount, dtype=np.float64)
+        self.units = np.asarray(units, dtype=np.float64)
+        self.nav = np.asarray(nav, dtype=np.float64)
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_records(cls, records):
+        """Builder output (dicts, Transactions or bare actionTables)."""
+        actions = (r.action_dict() if isinstance(r, Transaction) else r.get("actionTable", r) for r in records)
+        columns = {name: [] for name in ("folio_number", "isin", "order_date", "purchase_amount", "redeem_amount",
+                                         "unit", "nav")}
+        appends = [(columns[name].append, name) for name in columns]
+        for action in actions:
+            for append, name in appends:
+                append(action.get(name))
+        return cls.from_columns(columns)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        {column: sequence} as produced by models.to_columns() or a Parquet
+        export's to_pydict(). Rows without an ISIN, a date or an amount
+        (totals, headers) are skipped and counted.
+        """
+        keys, positions = [], {}
+        index, day, amount, units, nav = [], [], [], [], []
+        skipped = 0
+        rows = zip(columns["folio_number"], columns["isin"], columns["order_date"], columns["purchase_amount"],
+                   columns["redeem_amount"], columns["unit"], columns["nav"])
+        for folio, isin, order_date, purchase, redeem, unit, price in rows:
+            ordinal = _day(order_date)
+            purchase, redeem = _amount(purchase), _amount(redeem)
+            if not isin or ordinal is None or (purchase <= 0 and redeem <= 0):
+                skipped += 1
+                continue
+            key = (str(folio or ""), isin)
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(keys)
+                keys.append(key)
+            unit = abs(_amount(unit))
+            index.append(position)
+            day.append(ordinal)
+            if purchase > 0:
+                amount.append(-purchase)
+                units.append(unit)
+            else:
+                amount.append(redeem)
+                units.append(-unit)
+            nav.append(_amount(price))
+        flows = cls(keys, index, day, amount, units, nav)
+        flows.skipped = skipped
+        return flows
+
+
+def _npv(log_base, index, years, amount, n):
+    """NPV and its derivative for every portfolio at once (log_base = log1p(rate))."""
+    discounted = amount * np.exp(-years * log_base[index])
+    npv = np.bincount(index, discounted, n)
+    slope = -np.bincount(index, years * discounted, n) / np.exp(log_base)
+    return npv, slope
+
+
+def xirr(index, day, amount, n=None, guess=NEWTON_GUESS):
+    """
+    Annualised internal rate of return for n portfolios in one pass:
+    Newton steps run on all portfolios together, dropping each as it
+    converges, and any that diverge are settled by vectorised bisection.
+    Returns a float64 array; NaN where a portfolio has no sign change or
+    no root in BISECTION_BOUNDS.
+    """
+    index = np.asarray(index, dtype=np.int64)
+    day = np.asarray(day, dtype=np.float64)
+    amount = np.asarray(amount, dtype=np.float64)
+    if n is None:
+        n = int(index.max()) + 1 if len(index) else 0
+    rates = np.full(n, np.nan)
+    first = np.full(n, np.inf)
+    np.minimum.at(first, index, day)
+    years = (day - first[index]) / DAYS_PER_YEAR
+    solvable = (np.bincount(index, amount > 0, n) > 0) & (np.bincount(index, amount < 0, n) > 0)
+
+    # Work on the flows of still-active portfolios only, renumbered 0..m-1
+    active = np.flatnonzero(solvable)
+    keep = solvable[index]
+    local = (np.cumsum(solvable) - 1)[index[keep]]
+    years_a, amount_a = years[keep], amount[keep]
+    rate = np.full(len(active), guess)
+    failed = []
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(NEWTON_STEPS):
+            if not len(active):
+                break
+            npv, slope = _npv(np.log1p(rate), local, years_a, amount_a, len(active))
+            stepped = rate - npv / slope
+            diverged = ~np.isfinite(stepped) | (stepped <= -1)
+            converged = ~diverged & (np.abs(stepped - rate) <= TOLERANCE * (1 + np.abs(rate)))
+            rates[active[converged]] = stepped[converged]
+            failed.append(active[diverged])
+            still = ~(converged | diverged)
+            if not still.all():
+                flows = still[local]
+                local = (np.cumsum(still) - 1)[local[flows]]
+                years_a, amount_a = years_a[flows], amount_a[flows]
+                active = active[still]
+                stepped = stepped[still]
+            rate = stepped
+    failed.append(active)
+    # _bisect answers in portfolio order, not the order they diverged in
+    failed = np.sort(np.concatenate(failed))
+    if len(failed):
+        rates[failed] = _bisect(failed, index, years, amount, n)
+    return rates
+
+
+def _bisect(portfolios, index, years, amount, n):
+    wanted = np.zeros(n, dtype=bool)
+    wanted[portfolios] = True
+    flows = wanted[index]
+    local = (np.cumsum(wanted) - 1)[index[flows]]
+    years, amount = years[flows], amount[flows]
+    m = len(portfolios)
+    lo, hi = np.full(m, BISECTION_BOUNDS[0]), np.full(m, BISECTION_BOUNDS[1])
+    with np.errstate(over="ignore", invalid="ignore"):
+        f_lo, _ = _npv(np.log1p(lo), local, years, amount, m)
+        f_hi, _ = _npv(np.log1p(hi), local, years, amount, m)
+        bracketed = np.sign(f_lo) != np.sign(f_hi)
+        for _ in range(BISECTION_STEPS):
+            mid = (lo + hi) / 2
+            f_mid, _ = _npv(np.log1p(mid), local, years, amount, m)
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(left, mid, lo)
+            f_lo = np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+    return np.where(bracketed, (lo + hi) / 2, np.nan)
+
+
+def value_portfolios(flows, as_of=None, navs=None):
+    """
+    Holdings, average cost and XIRR for every portfolio in a PortfolioFlows.
+    Holdings are valued at navs[isin] when given, otherwise at the NAV of
+    the portfolio's latest transaction, and enter the XIRR as a final
+    inflow on as_of (default today). Average cost is total purchase amount
+    over purchased units. Returns {column: numpy array}, one row per key.
+    """
+    n = len(flows)
+    index, amount, units = flows.index, flows.amount, flows.units
+    as_of = as_of or date.today()
+    bought = amount < 0
+
+    held = np.bincount(index, units, n)
+    bought_units = np.bincount(index, np.where(bought, units, 0.0), n)
+    invested = np.bincount(index, np.where(bought, -amount, 0.0), n)
+    redeemed = np.bincount(index, np.where(bought, 0.0, amount), n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average_cost = np.where(bought_units > 0, invested / bought_units, np.nan)
+
+    # NAV of each portfolio's latest flow (ties resolved by input order)
+    latest = np.lexsort((np.arange(len(index)), flows.day, index))
+    last_flow = latest[np.r_[np.flatnonzero(np.diff(index[latest])), len(latest) - 1]] if len(latest) else latest
+    nav = np.full(n, np.nan)
+    nav[index[last_flow]] = flows.nav[last_flow]
+    if navs:
+        quoted = np.array([navs.get(isin, np.nan) for _, isin in flows.keys], dtype=np.float64)
+        nav = np.where(np.isnan(quoted), nav, quoted)
+    held = np.where(np.abs(held) < 1e-9, 0.0, held)
+    market_value = np.maximum(held, 0.0) * np.nan_to_num(nav)
+
+    holding = np.flatnonzero(market_value > 0)
+    rates = xirr(np.concatenate([index, holding]),
+                 np.concatenate([flows.day, np.full(len(holding), as_of.toordinal())]),
+                 np.concatenate([amount, market_value[holding]]), n)
+    return {
+        "folio_number": np.array([folio for folio, _ in flows.keys], dtype=object),
+        "isin": np.array([isin for _, isin in flows.keys], dtype=object),
+        "units": held,
+        "invested": invested,
+        "redeemed": redeemed,
+        "average_cost": average_cost,
+        "cost_value": held * np.nan_to_num(average_cost),
+        "nav": nav,
+        "market_value": market_value,
+        "gain": market_value + redeemed - invested,
+        "xirr": rates,
+    }
+
+
+def iter_rows(valuation):
+    """{column: array} -> one JSON-ready dict per portfolio (NaN becomes None)."""
+    names = list(valuation)
+    for values in zip(*(valuation[name].tolist() for name in names)):
+        yield {name: (None if isinstance(v, float) and v != v else v) for name, v in zip(names, values)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Holdings, average cost and XIRR per folio and ISIN.")
+    parser.add_argument("inputs", nargs="+", help="JSON Lines files written by test5/batch --output")
+    parser.add_argument("--as-of", default=None, metavar="YYYY-MM-DD", help="valuation date (default today)")
+    parser.add_argument("--navs", default=None, metavar="PATH", help='JSON file of current NAVs: {"<isin>": nav}')
+    args = parser.parse_args(argv)
+
+    navs = None
+    if args.navs:
+        with open(args.navs, encoding="utf-8") as f:
+            navs = json.load(f)
+    records = [record for path in args.inputs for record in read_jsonl(path)]
+    flows = PortfolioFlows.from_records(records)
+    as_of = date.fromisoformat(args.as_of) if args.as_of else None
+    dumps = get_serializer()
+    out = sys.stdout.buffer
+    for row in iter_rows(value_portfolios(flows, as_of=as_of, navs=navs)):
+        out.write(dumps(row) + b"\n")
+    out.flush()
+    print(f"{len(flows)} portfolios from {len(flows.index)} transactions ({flows.skipped} rows skipped)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
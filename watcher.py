@@ -0,0 +1,349 @@
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import signal
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+from batch import collect_pdf_paths, iter_batch
+from log_config import configure_logging
+from models import to_dicts
+from password_resolver import password_or_candidates
+from record_writer import JsonlWriter
+from result_cache import parser_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = ".contract_note_manifest.sqlite"
+DEFAULT_INTERVAL = 2.0
+DEFAULT_SETTLE = 1.0
+# Failed files are retried after RETRY_BASE seconds, doubling up to RETRY_MAX
+RETRY_BASE = 5.0
+RETRY_MAX = 600.0
+HASH_CHUNK = 1024 * 1024
+
+# status is "new", "changed" or "deleted"; removed holds the (order_number, isin)
+# keys of records the file no longer produces
+Delta = namedtuple("Delta", ["path", "status", "broker", "added", "removed", "error"])
+
+ManifestEntry = namedtuple("ManifestEntry", ["path", "size", "mtime_ns", "sha256", "version", "broker", "records",
+                                             "error"])
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_digest(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def record_key(record):
+    action = record.get("actionTable") or {}
+    return [action.get("order_number"), action.get("isin")]
+
+
+class Manifest:
+    """
+    What was last parsed for every watched file: size, mtime, content
+    hash, parser version and the digest -> (order_number, isin) of each
+    record it produced. A file whose size and mtime still match is never
+    re-read; one that was only touched is re-hashed but not re-parsed.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   sha256 TEXT NOT NULL,
+                   version TEXT NOT NULL,
+                   broker TEXT,
+                   records TEXT NOT NULL,
+                   error TEXT
+               )"""
+        )
+
+    def entries(self):
+        rows = self.conn.execute("SELECT path, size, mtime_ns, sha256, version, broker, records, error FROM files")
+        return {row[0]: ManifestEntry(*row[:6], json.loads(row[6]), row[7]) for row in rows}
+
+    def put(self, path, size, mtime_ns, sha256, version, broker, records, error=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, version, broker, records, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, sha256, version, broker, json.dumps(records, separators=(",", ":")), error),
+        )
+
+    def touch(self, path, size, mtime_ns):
+        self.conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime_ns, path))
+
+    def delete(self, path):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def close(self):
+        self.conn.close()
+
+
+# inotify through libc, so no extra dependency; None where it isn't available
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def _load_libc_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWaiter:
+    """Blocks until something changes in the watched directories (or the timeout passes)."""
+
+    def __init__(self, directories, libc):
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for directory in directories:
+            if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 65536):  # drain; the scan works out what changed
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWaiter:
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return True
+
+    def close(self):
+        pass
+
+
+def make_waiter(sources, polling=False):
+    """inotify on Linux, polling elsewhere or when inotify can't be set up."""
+    directories = sorted({s if os.path.isdir(s) else os.path.dirname(os.path.abspath(s)) for s in sources})
+    libc = None if polling else _load_libc_inotify()
+    if libc is not None:
+        try:
+            return InotifyWaiter(directories, libc)
+        except OSError as e:
+            logger.warning("inotify unavailable (%s), falling back to polling", e)
+    return PollingWaiter()
+
+
+class DirectoryWatcher:
+    """
+    Parse contract notes as they appear in the watched sources and report
+    only what changed. Each sync() stats every file against the manifest;
+    files that are new, changed on disk or last parsed by another parser
+    version go through batch.iter_batch, and on_delta gets a Delta with
+    the records that file didn't produce before. Files modified within
+    the last `settle` seconds are left for a later sync, so half-copied
+    PDFs aren't parsed. Files whose last parse failed are retried with
+    exponential backoff even if they haven't changed (the failure may have
+    been a partial write, a missing password or a crashed worker).
+    """
+
+    def __init__(self, sources, category, subcategory, manifest, workers=1, password=None, cache_path=None,
+                 settle=DEFAULT_SETTLE, version=None):
+        self.sources = sources
+        self.category = category
+        self.subcategory = subcategory
+        self.manifest = manifest
+        self.workers = workers
+        self.password = password
+        self.cache_path = cache_path
+        self.settle = settle
+        self.version = version or parser_version()
+        self.deferred = 0
+        self.retries = {}  # path -> (failed attempts, monotonic time of the next retry)
+        self.stopped = False
+
+    def retry_due(self, path):
+        return time.monotonic() >= self.retries.get(path, (0, 0.0))[1]
+
+    def next_retry(self):
+        """Seconds until the earliest pending retry, or None."""
+        if not self.retries:
+            return None
+        return max(0.0, min(due for _, due in self.retries.values()) - time.monotonic())
+
+    def scan(self):
+        """-> (manifest entries, files to parse as (path, size, mtime_ns, sha256), deleted paths)."""
+        known = self.manifest.entries()
+        now = time.time_ns()
+        changed = []
+        self.deferred = 0
+        paths = collect_pdf_paths(self.sources)
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = known.get(path)
+            retry = entry is not None and entry.error is not None
+            if retry and not self.retry_due(path):
+                continue
+            if not retry and entry and (entry.size, entry.mtime_ns, entry.version) == (
+                    st.st_size, st.st_mtime_ns, self.version):
+                continue
+            if now - st.st_mtime_ns < self.settle * 1e9:
+                self.deferred += 1
+                continue
+            sha256 = file_sha256(path)
+            if not retry and entry and (entry.sha256, entry.version) == (sha256, self.version):
+                self.manifest.touch(path, st.st_size, st.st_mtime_ns)
+                continue
+            changed.append((path, st.st_size, st.st_mtime_ns, sha256))
+        deleted = sorted(set(known) - set(paths))
+        for path in deleted:
+            self.retries.pop(path, None)
+        return known, changed, deleted
+
+    def sync(self, on_delta):
+        """One pass: parse what changed and call on_delta for each file. Returns the number of deltas."""
+        known, changed, deleted = self.scan()
+        for path in deleted:
+            entry = known[path]
+            self.manifest.delete(path)
+            on_delta(Delta(path, "deleted", entry.broker, [], list(entry.records.values()), None))
+        files = {path: (size, mtime_ns, sha256) for path, size, mtime_ns, sha256 in changed}
+        for result in iter_batch(list(files), self.category, self.subcategory, workers=self.workers,
+                                 password=self.password, cache_path=self.cache_path):
+            entry = known.get(result.path)
+            old = entry.records if entry else {}
+            records = to_dicts(result.records)
+            digests = [record_digest(r) for r in records]
+            new = {digest: record_key(r) for digest, r in zip(digests, records)}
+            added = [r for r, digest in zip(records, digests) if digest not in old]
+            new_keys = {tuple(key) for key in new.values()}
+            removed = [key for digest, key in old.items() if digest not in new and tuple(key) not in new_keys]
+            self.manifest.put(result.path, *files[result.path], self.version, result.broker, new, result.error)
+            if result.error:
+                attempts = self.retries.get(result.path, (0, 0.0))[0] + 1
+                delay = min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1))
+                self.retries[result.path] = (attempts, time.monotonic() + delay)
+            else:
+                self.retries.pop(result.path, None)
+            on_delta(Delta(result.path, "changed" if entry else "new", result.broker, added, removed, result.error))
+        return len(deleted) + len(files)
+
+    def run(self, on_delta, interval=DEFAULT_INTERVAL, polling=False):
+        """sync() now, then again whenever the directories change (inotify) or every interval seconds."""
+        waiter = make_waiter(self.sources, polling=polling)
+        logger.info("Watching %s with %s", ", ".join(self.sources), type(waiter).__name__)
+        try:
+            self.sync(on_delta)
+            while not self.stopped:
+                # Come back soon for files that were still being written
+                timeout = min(interval, self.settle) if self.deferred else interval
+                retry_in = self.next_retry()
+                if retry_in is not None:
+                    timeout = min(timeout, retry_in)
+                if waiter.wait(timeout) or self.deferred or self.next_retry() == 0:
+                    self.sync(on_delta)
+        finally:
+            waiter.close()
+
+    def stop(self, *_):
+        self.stopped = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch folders of contract notes and parse only new or changed PDFs.")
+    parser.add_argument("sources", nargs="+", help="directories (or PDF paths/globs) to watch")
+    parser.add_argument("--category", default="Equity")
+    parser.add_argument("--subcategory", default="Mutual Fund")
+    parser.add_argument("--workers", type=int, default=1, help="process pool size for each sync")
+    parser.add_argument("--password", default=None, help="password for encrypted notes")
+    parser.add_argument("--pan", default=None, help="client PAN, to derive candidate passwords for encrypted notes")
+    parser.add_argument("--dob", default=None, help="client date of birth (DD/MM/YYYY), for candidate passwords")
+    parser.add_argument("--holder-name", default=None, help="client name, for candidate passwords")
+    parser.add_argument("--cache", default=None, metavar="PATH", help="SQLite result cache to reuse parsed notes")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH, metavar="PATH")
+    parser.add_argument("--output", default="-", metavar="PATH",
+                        help="append added records as JSON Lines to PATH (default stdout)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls (and the idle wake-up with inotify)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help="skip files modified less than this many seconds ago")
+    parser.add_argument("--polling", action="store_true", help="poll even where inotify is available")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-json", action="store_true", help="emit logs as JSON lines")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, json_format=args.log_json)
+
+    password = password_or_candidates(args.password, args.pan, args.dob, args.holder_name)
+    manifest = Manifest(args.manifest)
+    watcher = DirectoryWatcher(args.sources, args.category, args.subcategory, manifest, workers=args.workers,
+                               password=password, cache_path=args.cache, settle=args.settle)
+    writer = JsonlWriter(args.output, append=True)
+
+    def report(delta):
+        writer.write_many(delta.added)
+        writer.flush()
+        if delta.error:
+            logger.warning("FAILED  %s: %s", delta.path, delta.error)
+        else:
+            logger.info("%-7s %s: %s (+%d/-%d records)", delta.status.upper(), delta.path, delta.broker,
+                        len(delta.added), len(delta.removed))
+
+    signal.signal(signal.SIGTERM, watcher.stop)
+    try:
+        if args.once:
+            watcher.sync(report)
+        else:
+            watcher.run(report, interval=args.interval, polling=args.polling)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        manifest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())